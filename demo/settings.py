@@ -98,6 +98,15 @@ DATABASES = {
 }
 
 
+# Computed figures are only cached if the cache is shared by all processes
+# https://docs.djangoproject.com/en/2.1/topics/cache/
+# CACHES = {
+#     'default': {
+#         'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+#         'LOCATION': '127.0.0.1:11211',
+#     }
+# }
+
 # Password validation
 # https://docs.djangoproject.com/en/1.10/ref/settings/#auth-password-validators
 
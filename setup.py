@@ -38,6 +38,7 @@ setup(
     ],
     extras_require={
         'OFX Importing': ['ofxparse'],
+        'Fast charts': ['numpy'],
     },
     classifiers=[
         'Development Status :: 3 - Alpha',
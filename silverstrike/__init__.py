@@ -1,2 +1,4 @@
 __version__ = '0.1.3'
 VERSION = __version__
+
+default_app_config = 'silverstrike.apps.SilverStrikeConfig'
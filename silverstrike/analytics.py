@@ -0,0 +1,112 @@
+"""
+Columnar computations for the chart endpoints.
+
+Rows are loaded once into numpy arrays and aggregated with searchsorted, bincount and
+cumsum instead of walking them day by day. numpy is optional, callers have to check
+``analytics.numpy`` and fall back to the pure python implementation if it is None.
+"""
+from datetime import date, timedelta
+
+from silverstrike.lib import sample_dates
+from silverstrike.models import Account, Amount, BalanceSnapshot
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def to_cents(amount):
+    return Amount(amount).cents
+
+
+def from_cents(cents):
+    return Amount.from_cents(int(cents))
+
+
+def ordinals(dates):
+    return numpy.array([d.toordinal() for d in dates], dtype=numpy.int64)
+
+
+class LedgerColumns(object):
+    """
+    (date ordinal, account id, amount in cents) rows stored as three parallel arrays,
+    ordered by date.
+    """
+
+    def __init__(self, rows):
+        rows = list(rows)
+        self.dates = numpy.array([r[0].toordinal() for r in rows], dtype=numpy.int64)
+        self.accounts = numpy.array([r[1] for r in rows], dtype=numpy.int64)
+        self.cents = numpy.array([to_cents(r[2]) for r in rows], dtype=numpy.int64)
+
+    @classmethod
+    def from_splits(cls, queryset):
+        return cls(queryset.order_by('date').values_list('date', 'account_id', 'amount'))
+
+    @classmethod
+    def from_snapshots(cls, queryset):
+        return cls(queryset.order_by('date').values_list('date', 'account_id', 'balance'))
+
+    def __len__(self):
+        return len(self.dates)
+
+    def running_total(self, dates, opening=0):
+        """
+        Returns opening plus the sum of all amounts up to and including each of the dates.
+        """
+        buckets = numpy.searchsorted(ordinals(dates), self.dates, side='left')
+        sums = numpy.bincount(buckets, weights=self.cents, minlength=len(dates) + 1)
+        totals = numpy.cumsum(numpy.rint(sums[:len(dates)]).astype(numpy.int64))
+        return [from_cents(t) for t in totals + to_cents(opening)]
+
+    def last_date(self, dstart, dend):
+        """
+        Returns the date of the latest row from dstart to dend or None if there is none.
+        """
+        index = numpy.searchsorted(self.dates, dend.toordinal(), side='right')
+        if index and self.dates[index - 1] >= dstart.toordinal():
+            return date.fromordinal(int(self.dates[index - 1]))
+        return None
+
+    def latest_by_account(self, accounts, dates, initial):
+        """
+        Returns a dict mapping each account id to the amount of its latest row on or before
+        each of the dates, or to its value in initial if there is none.
+        """
+        samples = ordinals(dates)
+        # a stable sort groups the rows by account and keeps each group ordered by date
+        order = numpy.argsort(self.accounts, kind='mergesort')
+        grouped = self.accounts[order]
+        grouped_dates = self.dates[order]
+        grouped_cents = self.cents[order]
+        series = {}
+        for account_id in accounts:
+            start = numpy.searchsorted(grouped, account_id, side='left')
+            end = numpy.searchsorted(grouped, account_id, side='right')
+            cents = numpy.append(to_cents(initial.get(account_id, 0)), grouped_cents[start:end])
+            positions = numpy.searchsorted(grouped_dates[start:end], samples, side='right')
+            series[account_id] = [from_cents(c) for c in cents[positions]]
+        return series
+
+
+def balance_series(accounts, dstart, dend, steps=30):
+    """
+    numpy version of BalanceSnapshotManager.series
+    """
+    return balance_series_for_ranges(accounts, [(dstart, dend)], steps)[0]
+
+
+def balance_series_for_ranges(accounts, ranges, steps=30):
+    """
+    numpy version of BalanceSnapshotManager.series_for_ranges
+    """
+    ranges = [sample_dates(dstart, dend, steps) for dstart, dend in ranges]
+    first = min(dates[0] for dates in ranges)
+    last = max(dates[-1] for dates in ranges)
+    accounts = list(accounts)
+    initial = dict(Account.objects.filter(pk__in=accounts).with_balance(
+        first - timedelta(days=1)).values_list('id', 'balance'))
+    columns = LedgerColumns.from_snapshots(BalanceSnapshot.objects.filter(
+        account_id__in=accounts, date__gte=first, date__lte=last))
+    return [(dates, columns.latest_by_account(accounts, dates, initial)) for dates in ranges]
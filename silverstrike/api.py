@@ -1,13 +1,119 @@
 import datetime
+from bisect import bisect_right
 
 from django.contrib.auth.decorators import login_required
 from django.db import models
+from django.db.models import Q
 from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
 
-from .models import Account, Split
+from . import analytics, caching, dashboard
+from .conditional import LEDGER_MODELS, conditional
+from .lib import lttb
+from .models import Account, BalanceSnapshot, Job, RecurringTransaction, Split
+
+MAX_POINTS = 500
+MAX_RANGES = 12
+CHART_SERIES = ('accounts_balance', 'balance', 'category_spending')
+
+
+def _balance_series_for_ranges(accounts, ranges):
+    if analytics.numpy:
+        return analytics.balance_series_for_ranges(accounts, ranges)
+    return BalanceSnapshot.objects.series_for_ranges(accounts, ranges)
+
+
+def _balance_series(accounts, dstart, dend):
+    return _balance_series_for_ranges(accounts, [(dstart, dend)])[0]
+
+
+class _DailyBalances(object):
+    """
+    Pure python counterpart of analytics.LedgerColumns for the balance chart, with the
+    splits summed up per day by the database.
+    """
+
+    def __init__(self, splits):
+        self.days = []
+        self.totals = []
+        total = 0
+        for row in splits.order_by('date').values('date').annotate(total=models.Sum('amount')):
+            total += row['total']
+            self.days.append(row['date'])
+            self.totals.append(total)
+
+    def last_date(self, dstart, dend):
+        index = bisect_right(self.days, dend)
+        if index and self.days[index - 1] >= dstart:
+            return self.days[index - 1]
+        return None
+
+    def running_total(self, dates, opening=0):
+        totals = []
+        for day in dates:
+            index = bisect_right(self.days, day)
+            totals.append(opening + self.totals[index - 1] if index else opening)
+        return totals
+
+
+def _balance_dates(dstart, dend, last):
+    """
+    Returns the days the balance chart shows from dstart to dend, evenly spaced up to last,
+    the day of the latest split in the range, followed by dend. last is None if there
+    are no splits in the range.
+    """
+    days = (dend - dstart).days
+    step = datetime.timedelta(days=days / 50 + 1 if days > 50 else 1)
+    dates = []
+    day = dstart
+    while last is not None and day < last:
+        dates.append(day)
+        day += step
+    dates.append(dend)
+    return dates
+
+
+def _get_points(request):
+    """
+    Returns the number of points requested with ?points=N, limited to MAX_POINTS,
+    or None if the parameter is missing. Raises ValueError for invalid values.
+    """
+    points = request.GET.get('points')
+    if points is None:
+        return None
+    points = int(points)
+    if points < 1:
+        raise ValueError(points)
+    return min(points, MAX_POINTS)
+
+
+def _bad_points():
+    return JsonResponse({'error': 'points must be a positive number'}, status=400)
+
+
+@login_required
+@conditional(*LEDGER_MODELS, RecurringTransaction)
+def get_dashboard(request):
+    recurrences = list(RecurringTransaction.objects.due_in_month())
+    summary = dashboard.get_summary(recurrences=recurrences)
+    summary['upcoming_recurrences'] = [
+        {'id': r.id, 'title': r.title, 'date': r.date, 'amount': r.amount,
+         'transaction_type': r.transaction_type} for r in recurrences]
+    return JsonResponse(summary)
 
 
 @login_required
+def get_cache_stats(request):
+    return JsonResponse(caching.get_stats())
+
+
+@login_required
+def get_job(request, job_id):
+    return JsonResponse(get_object_or_404(Job, pk=job_id).as_dict())
+
+
+@login_required
+@conditional(Account)
 def get_accounts(request, account_type):
     accounts = Account.objects.exclude(account_type=Account.SYSTEM)
     if account_type != 'all':
@@ -18,55 +124,79 @@ def get_accounts(request, account_type):
 
 
 @login_required
+@conditional(Account, Split)
 def get_accounts_balance(request, dstart, dend):
     dstart = datetime.datetime.strptime(dstart, '%Y-%m-%d').date()
     dend = datetime.datetime.strptime(dend, '%Y-%m-%d').date()
-    dataset = []
-    for account in Account.objects.personal().active():
-        data = list(zip(*account.get_data_points(dstart, dend)))
-        dataset.append({'name': account.name, 'data': data[1]})
+    try:
+        points = _get_points(request)
+    except ValueError:
+        return _bad_points()
+    accounts = list(Account.objects.personal().active().values_list('id', 'name'))
+    if points:
+        dates, series = BalanceSnapshot.objects.buckets(
+            [id for id, name in accounts], dstart, dend, points)
+        dataset = [{'name': name, 'data': series[id]['close'], 'low': series[id]['low'],
+                    'high': series[id]['high']} for id, name in accounts]
+    else:
+        dates, series = _balance_series([id for id, name in accounts], dstart, dend)
+        dataset = [{'name': name, 'data': series[id]} for id, name in accounts]
     if dataset:
-        labels = [datetime.datetime.strftime(x, '%d %b %Y') for x in data[0]]
+        labels = [datetime.datetime.strftime(x, '%d %b %Y') for x in dates]
     else:
         labels = []
     return JsonResponse({'labels': labels, 'dataset': dataset})
 
 
 @login_required
+@conditional(Account, Split)
 def get_account_balance(request, account_id, dstart, dend):
     dstart = datetime.datetime.strptime(dstart, '%Y-%m-%d').date()
     dend = datetime.datetime.strptime(dend, '%Y-%m-%d').date()
+    try:
+        points = _get_points(request)
+    except ValueError:
+        return _bad_points()
     account = Account.objects.get(pk=account_id)
-    labels, data = zip(*account.get_data_points(dstart, dend))
-    return JsonResponse({'data': data, 'labels': labels})
+    if points:
+        labels, series = BalanceSnapshot.objects.buckets([account.pk], dstart, dend, points)
+        series = series[account.pk]
+        return JsonResponse({'data': series['close'], 'low': series['low'],
+                             'high': series['high'], 'labels': labels})
+    labels, series = _balance_series([account.pk], dstart, dend)
+    return JsonResponse({'data': series[account.pk], 'labels': labels})
 
 
 @login_required
+@conditional(Account, Split)
 def get_balances(request, dstart, dend):
     dstart = datetime.datetime.strptime(dstart, '%Y-%m-%d').date()
     dend = datetime.datetime.strptime(dend, '%Y-%m-%d').date()
+    try:
+        points = _get_points(request)
+    except ValueError:
+        return _bad_points()
+    if not points:
+        return JsonResponse(_balance_for_ranges([(dstart, dend)])[0])
     balance = Split.objects.personal().exclude_transfers().filter(date__lt=dstart).aggregate(
             models.Sum('amount'))['amount__sum'] or 0
-    splits = Split.objects.personal().exclude_transfers().date_range(dstart, dend).order_by('date')
-    data_points = []
-    labels = []
-    days = (dend - dstart).days
-    if days > 50:
-        step = days / 50 + 1
-    else:
-        step = 1
-    for split in splits:
-        while split.date > dstart:
-            data_points.append(balance)
-            labels.append(datetime.datetime.strftime(dstart, '%Y-%m-%d'))
-            dstart += datetime.timedelta(days=step)
-        balance += split.amount
-    data_points.append(balance)
-    labels.append(datetime.datetime.strftime(dend, '%Y-%m-%d'))
-    return JsonResponse({'labels': labels, 'data': data_points})
+    # the database sums up each day, the daily balances are then reduced to points
+    balances = _DailyBalances(
+        Split.objects.personal().exclude_transfers().date_range(dstart, dend))
+    daily = [(dstart, balance)]
+    for day, total in zip(balances.days, balances.totals):
+        if day == dstart:
+            daily.pop()
+        daily.append((day, balance + total))
+    if daily[-1][0] < dend:
+        daily.append((dend, daily[-1][1]))
+    daily = lttb(daily, points)
+    return JsonResponse({'labels': [d.strftime('%Y-%m-%d') for d, b in daily],
+                         'data': [b for d, b in daily]})
 
 
 @login_required
+@conditional(*LEDGER_MODELS)
 def category_spending(request, dstart, dend):
     dstart = datetime.datetime.strptime(dstart, '%Y-%m-%d')
     dend = datetime.datetime.strptime(dend, '%Y-%m-%d')
@@ -78,3 +208,83 @@ def category_spending(request, dstart, dend):
     else:
         categories, spent = [], []
     return JsonResponse({'categories': categories, 'spent': spent})
+
+
+def _accounts_balance_for_ranges(ranges):
+    accounts = list(Account.objects.personal().active().values_list('id', 'name'))
+    results = _balance_series_for_ranges([id for id, name in accounts], ranges)
+    data = []
+    for dates, series in results:
+        dataset = [{'name': name, 'data': series[id]} for id, name in accounts]
+        labels = [datetime.datetime.strftime(x, '%d %b %Y') for x in dates] if dataset else []
+        data.append({'labels': labels, 'dataset': dataset})
+    return data
+
+
+def _balance_for_ranges(ranges):
+    """
+    The data of get_balances for each range, computed from the splits of the widest range.
+    """
+    splits = Split.objects.personal().exclude_transfers()
+    first = min(dstart for dstart, dend in ranges)
+    last = max(dend for dstart, dend in ranges)
+    opening = splits.filter(date__lt=first).aggregate(
+        models.Sum('amount'))['amount__sum'] or 0
+    splits = splits.date_range(first, last)
+    if analytics.numpy:
+        balances = analytics.LedgerColumns.from_splits(splits)
+    else:
+        balances = _DailyBalances(splits)
+    data = []
+    for dstart, dend in ranges:
+        dates = _balance_dates(dstart, dend, balances.last_date(dstart, dend))
+        data.append({'labels': [d.strftime('%Y-%m-%d') for d in dates],
+                     'data': balances.running_total(dates, opening)})
+    return data
+
+
+def _category_spending_for_ranges(ranges):
+    first = min(dstart for dstart, dend in ranges)
+    last = max(dend for dstart, dend in ranges)
+    sums = {'spent{}'.format(i): models.Sum('amount', filter=Q(date__gte=dstart, date__lte=dend))
+            for i, (dstart, dend) in enumerate(ranges)}
+    rows = list(Split.objects.expense().past().date_range(first, last).order_by(
+        'category').values('category__name').annotate(**sums))
+    data = []
+    for i in range(len(ranges)):
+        res = [(row['category__name'] or 'No category', abs(row['spent{}'.format(i)]))
+               for row in rows if row['spent{}'.format(i)]]
+        categories, spent = zip(*res) if res else ([], [])
+        data.append({'categories': categories, 'spent': spent})
+    return data
+
+
+@login_required
+@conditional(*LEDGER_MODELS)
+def get_chart_data(request):
+    """
+    Returns the data of several chart endpoints for several ranges in one response.
+    ranges is a comma separated list of dstart:dend pairs and series a comma separated list
+    of accounts_balance, balance and category_spending.
+    Each series is computed once for the widest range and then split up.
+    """
+    try:
+        ranges = []
+        for r in request.GET.get('ranges', '').split(','):
+            dstart, dend = r.split(':')
+            ranges.append((datetime.datetime.strptime(dstart, '%Y-%m-%d').date(),
+                           datetime.datetime.strptime(dend, '%Y-%m-%d').date()))
+    except ValueError:
+        return JsonResponse({'error': 'ranges must be a list of dstart:dend dates'}, status=400)
+    series = request.GET.get('series', ','.join(CHART_SERIES)).split(',')
+    if len(ranges) > MAX_RANGES or not set(series).issubset(CHART_SERIES):
+        return JsonResponse({'error': 'too many ranges or unknown series'}, status=400)
+
+    results = [{'dstart': dstart, 'dend': dend} for dstart, dend in ranges]
+    for name, compute in (('accounts_balance', _accounts_balance_for_ranges),
+                          ('balance', _balance_for_ranges),
+                          ('category_spending', _category_spending_for_ranges)):
+        if name in series:
+            for result, data in zip(results, compute(ranges)):
+                result[name] = data
+    return JsonResponse({'ranges': results})
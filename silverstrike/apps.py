@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class SilverStrikeConfig(AppConfig):
     name = 'silverstrike'
+
+    def ready(self):
+        from silverstrike import signals  # noqa: F401
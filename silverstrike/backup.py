@@ -0,0 +1,166 @@
+"""
+Snapshots of the whole ledger for backup and restore.
+
+A snapshot is a gzip compressed file of JSON lines. It starts with a header, followed
+by a line with the model and the columns of every table and then one line per row with
+its values in the same order. Amounts are written as cents.
+
+Derived tables, like balance snapshots, split counters and search documents, are written
+as they are. Restoring inserts the rows raw, so they keep their ids and last_modified
+times and nothing has to be recomputed. Uploaded import files live outside the database
+and jobs are transient, so neither is part of a snapshot.
+"""
+import gzip
+import json
+
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db import transaction as db_transaction
+
+from silverstrike.caching import bump_ledger_version
+from silverstrike.models import (Account, Amount, AmountField, BalanceSnapshot, Budget,
+                                 Category, RecurringTransaction, SearchDocument, Split,
+                                 Tombstone, Transaction)
+
+FORMAT = 'silverstrike-snapshot'
+VERSION = 1
+
+# tables in the order they are restored, referenced tables first
+MODELS = (Account, Category, RecurringTransaction, Transaction, Split, Budget,
+          BalanceSnapshot, SearchDocument, Tombstone)
+
+# rows read from the database and inserted at a time
+BATCH_SIZE = 5000
+
+
+def _encoders(fields):
+    encoders = []
+    for field in fields:
+        if isinstance(field, AmountField):
+            encoders.append(lambda value: value if value is None else value.cents)
+        elif field.get_internal_type() in ('DateField', 'DateTimeField'):
+            encoders.append(lambda value: value if value is None else value.isoformat())
+        else:
+            encoders.append(None)
+    return encoders
+
+
+def _decoders(fields):
+    decoders = []
+    for field in fields:
+        if isinstance(field, AmountField):
+            decoders.append(lambda value: value if value is None else Amount.from_cents(value))
+        else:
+            decoders.append(field.to_python)
+    return decoders
+
+
+def write_snapshot(path, using=DEFAULT_DB_ALIAS):
+    """
+    Writes all rows of MODELS to a snapshot at path and returns the number of rows.
+    """
+    rows = 0
+    with gzip.open(path, 'wt', encoding='utf-8', compresslevel=6) as snapshot:
+        snapshot.write(json.dumps({'format': FORMAT, 'version': VERSION}) + '\n')
+        # all tables have to be read from the same snapshot of the database, which
+        # a transaction on SQLite and MySQL is, but one on PostgreSQL only with
+        # repeatable read instead of the default read committed. It can only be set
+        # by the outermost transaction.
+        connection = connections[using]
+        repeatable_read = connection.vendor == 'postgresql' and not connection.in_atomic_block
+        with db_transaction.atomic(using=using):
+            if repeatable_read:
+                with connection.cursor() as cursor:
+                    cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+            for model in MODELS:
+                fields = model._meta.concrete_fields
+                encoders = _encoders(fields)
+                snapshot.write(json.dumps({
+                    'model': model._meta.label_lower,
+                    'columns': [field.attname for field in fields],
+                }) + '\n')
+                values = model._base_manager.using(using).order_by('pk').values_list(
+                    *[field.attname for field in fields])
+                for row in values.iterator(BATCH_SIZE):
+                    snapshot.write(json.dumps([
+                        encode(value) if encode else value
+                        for encode, value in zip(encoders, row)]) + '\n')
+                    rows += 1
+    return rows
+
+
+def _read(path):
+    """
+    Yields the model, fields and decoded values of every row of the snapshot at path.
+    """
+    models = {model._meta.label_lower: model for model in MODELS}
+    with gzip.open(path, 'rt', encoding='utf-8') as snapshot:
+        header = json.loads(snapshot.readline() or 'null')
+        if not isinstance(header, dict) or header.get('format') != FORMAT:
+            raise ValueError('{} is not a snapshot'.format(path))
+        if header.get('version') != VERSION:
+            raise ValueError('Unsupported snapshot version {}'.format(header.get('version')))
+        model = None
+        for line in snapshot:
+            row = json.loads(line)
+            if isinstance(row, dict):
+                if row['model'] not in models:
+                    raise ValueError('Unknown model {}'.format(row['model']))
+                model = models[row['model']]
+                attnames = {field.attname: field for field in model._meta.concrete_fields}
+                unknown = set(row['columns']).difference(attnames)
+                if unknown:
+                    raise ValueError('Unknown columns of {}: {}'.format(
+                        row['model'], ', '.join(sorted(unknown))))
+                fields = [attnames[column] for column in row['columns']]
+                decoders = _decoders(fields)
+                continue
+            if model is None:
+                raise ValueError('{} is not a snapshot'.format(path))
+            yield model, fields, [decode(value) for decode, value in zip(decoders, row)]
+
+
+def _insert(model, fields, rows, using):
+    objs = [model(**{field.attname: value for field, value in zip(fields, row)})
+            for row in rows]
+    # like bulk_create, but raw so that auto_now fields keep their values
+    batch_size = min(BATCH_SIZE, max(connections[using].ops.bulk_batch_size(fields, objs), 1))
+    for start in range(0, len(objs), batch_size):
+        model._base_manager._insert(objs[start:start + batch_size], fields=fields,
+                                    using=using, raw=True)
+
+
+def restore_snapshot(path, using=DEFAULT_DB_ALIAS):
+    """
+    Replaces the rows of MODELS with the ones of the snapshot at path and returns the
+    number of restored rows. Raises ValueError if path is not a snapshot.
+    """
+    connection = connections[using]
+    tables = [model._meta.db_table for model in MODELS]
+    rows = 0
+    with db_transaction.atomic(using=using):
+        # foreign keys are checked once all rows are in, like loaddata does
+        with connection.constraint_checks_disabled():
+            with connection.cursor() as cursor:
+                for table in reversed(tables):
+                    cursor.execute('DELETE FROM {}'.format(connection.ops.quote_name(table)))
+            model = fields = None
+            batch = []
+            for row_model, row_fields, values in _read(path):
+                if row_model is not model or row_fields is not fields or (
+                        len(batch) >= BATCH_SIZE):
+                    if batch:
+                        _insert(model, fields, batch, using)
+                        rows += len(batch)
+                    model, fields, batch = row_model, row_fields, []
+                batch.append(values)
+            if batch:
+                _insert(model, fields, batch, using)
+                rows += len(batch)
+        connection.check_constraints(table_names=tables)
+        # make new rows continue after the restored ids
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), MODELS):
+                cursor.execute(sql)
+    bump_ledger_version()
+    return rows
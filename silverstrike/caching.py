@@ -0,0 +1,95 @@
+"""
+Caches computed view data until the ledger changes.
+
+Every cache key contains the ledger version, a counter that is bumped whenever an
+object that affects balances, categories or budgets is saved or deleted. Entries of
+older versions are never read again and simply expire.
+
+The version has to be shared by all processes that serve the ledger, so nothing is
+cached unless the default cache is shared as well. A local memory cache would keep
+serving the figures of one process after another one changed the ledger.
+"""
+import time
+from datetime import date
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction as db_transaction
+
+VERSION_KEY = 'silverstrike:ledger_version'
+HITS_KEY = 'silverstrike:cache_hits'
+MISSES_KEY = 'silverstrike:cache_misses'
+TIMEOUT = 60 * 60 * 24
+
+
+def _increment(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        return cache.incr(key)
+
+
+def get_ledger_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # start from the current time so that entries stored before the version was
+        # evicted are not mistaken for current ones
+        cache.add(VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _increment_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        get_ledger_version()
+
+
+def bump_ledger_version(*args, **kwargs):
+    """
+    Bumps the version once the current database transaction commits. Bumping it
+    earlier would let a concurrent reader cache figures of the old data under the
+    new version. Takes the arguments of signal receivers.
+    """
+    db_transaction.on_commit(_increment_version, using=kwargs.get('using'))
+
+
+def is_shared():
+    """
+    Returns whether the default cache is shared between processes.
+    """
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], (DummyCache, LocMemCache))
+
+
+def get_or_compute(name, compute, *key_parts):
+    """
+    Returns the cached result of compute() for name and key_parts, computing and
+    storing it if the ledger changed since it was cached.
+    The key contains today's date as well because most views depend on it.
+    """
+    if not is_shared():
+        return compute()
+    key = ':'.join(str(part) for part in (
+        'silverstrike', name, get_ledger_version(), date.today()) + key_parts)
+    value = cache.get(key)
+    if value is not None:
+        _increment(HITS_KEY)
+        return value
+    _increment(MISSES_KEY)
+    value = compute()
+    cache.set(key, value, TIMEOUT)
+    return value
+
+
+def get_stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': hits / (hits + misses) if hits + misses else 0,
+        'ledger_version': get_ledger_version(),
+    }
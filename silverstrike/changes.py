@@ -0,0 +1,185 @@
+"""
+Change feed of transactions and splits.
+
+Saved transactions and splits are read in the order of their last_modified time, deleted
+ones from their tombstones. A cursor encodes the position after the last change that was
+read, so a consumer that keeps it only fetches what changed since. Saves that happen in
+the same microsecond are ordered by model and id.
+
+last_modified is the time a row was written, not the time it was committed. A row
+written by a long transaction can become visible after rows with later times, which a
+consumer may have read already. Changes are therefore only served once they are older
+than SETTLE_TIME, which has to be longer than the longest write transaction, such as
+an import chunk.
+
+Tombstones are deleted by the prunetombstones command once they are older than
+Tombstone.RETENTION. Consumers whose cursor is older than that miss deletes and have to
+read all changes again.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from silverstrike.models import Split, Tombstone, Transaction
+
+# changes read from each table at a time
+PAGE_SIZE = 500
+# how old changes have to be before they are served
+SETTLE_TIME = timedelta(minutes=5)
+
+TRANSACTION = 'transaction'
+SPLIT = 'split'
+DELETED = 'deleted'
+# the order of changes saved at the same time
+KINDS = (TRANSACTION, SPLIT, DELETED)
+
+TRANSACTION_FIELDS = ('title', 'date', 'notes', 'transaction_type', 'recurrence_id')
+SPLIT_FIELDS = ('transaction_id', 'account_id', 'opposing_account_id', 'title', 'date',
+                'amount', 'category_id')
+TOMBSTONE_MODELS = {
+    Transaction._meta.label_lower: TRANSACTION,
+    Split._meta.label_lower: SPLIT,
+}
+
+CURSOR_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+
+def encode_cursor(last_modified, kind, pk):
+    return '{}_{}_{}'.format(
+        timezone.localtime(last_modified, timezone.utc).strftime(CURSOR_FORMAT), kind, pk)
+
+
+def decode_cursor(cursor):
+    """
+    Returns the time, kind and id encoded in cursor. Raises ValueError if it is invalid.
+    """
+    last_modified, kind, pk = cursor.split('_')
+    last_modified = timezone.make_aware(
+        datetime.strptime(last_modified, CURSOR_FORMAT), timezone.utc)
+    return last_modified, int(kind), int(pk)
+
+
+def parse_since(value):
+    """
+    Returns a cursor for value, which is either a cursor or an ISO 8601 date or time.
+    The cursor of a time includes the changes made at that time. Raises ValueError if
+    value is neither.
+    """
+    try:
+        decode_cursor(value)
+        return value
+    except ValueError:
+        pass
+    since = parse_datetime(value)
+    if since is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError('Invalid date or cursor: {}'.format(value))
+        since = datetime.combine(day, time())
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return encode_cursor(since, -1, 0)
+
+
+class ChangePage(object):
+    def __init__(self, changes, cursor, has_next):
+        self.changes = changes
+        self.cursor = cursor
+        self.has_next = has_next
+
+    def __iter__(self):
+        return iter(self.changes)
+
+    def __len__(self):
+        return len(self.changes)
+
+
+def _after(kind, position):
+    last_modified, after_kind, pk = position
+    if kind > after_kind:
+        return Q(last_modified__gte=last_modified)
+    if kind < after_kind:
+        return Q(last_modified__gt=last_modified)
+    return Q(last_modified__gt=last_modified) | Q(last_modified=last_modified, pk__gt=pk)
+
+
+def _change(kind, pk, last_modified, data):
+    return {
+        'model': kind,
+        'id': pk,
+        'deleted': data is None,
+        'last_modified': last_modified.isoformat(),
+        'data': data,
+    }
+
+
+def _saved(model, kind, fields, position, until, limit):
+    queryset = model.objects.filter(last_modified__lte=until)
+    if position:
+        queryset = queryset.filter(_after(KINDS.index(kind), position))
+    rows = queryset.order_by('last_modified', 'pk').values_list(
+        'pk', 'last_modified', *fields)[:limit]
+    for row in rows:
+        data = {}
+        for field, value in zip(fields, row[2:]):
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            elif field == 'amount':
+                value = str(value)
+            data[field] = value
+        yield (row[1], KINDS.index(kind), row[0]), _change(kind, row[0], row[1], data)
+
+
+def _deleted(position, until, limit):
+    queryset = Tombstone.objects.filter(model__in=TOMBSTONE_MODELS, last_modified__lte=until)
+    if position:
+        queryset = queryset.filter(_after(KINDS.index(DELETED), position))
+    rows = queryset.order_by('last_modified', 'pk').values_list(
+        'pk', 'last_modified', 'model', 'object_id')[:limit]
+    for pk, last_modified, model, object_id in rows:
+        yield ((last_modified, KINDS.index(DELETED), pk),
+               _change(TOMBSTONE_MODELS[model], object_id, last_modified, None))
+
+
+def get_changes(after=None, limit=None):
+    """
+    Returns the page of the oldest changes after the cursor after, at most limit of them,
+    which defaults to PAGE_SIZE. Changes made in the last SETTLE_TIME are left for later
+    pages. Raises ValueError for invalid cursors.
+    """
+    limit = limit or PAGE_SIZE
+    position = decode_cursor(after) if after else None
+    until = timezone.now() - SETTLE_TIME
+    changes = []
+    changes.extend(_saved(Transaction, TRANSACTION, TRANSACTION_FIELDS, position, until,
+                          limit + 1))
+    changes.extend(_saved(Split, SPLIT, SPLIT_FIELDS, position, until, limit + 1))
+    changes.extend(_deleted(position, until, limit + 1))
+    changes.sort(key=lambda change: change[0])
+    page = changes[:limit]
+    cursor = encode_cursor(*page[-1][0]) if page else after
+    return ChangePage([change for key, change in page], cursor, len(changes) > limit)
+
+
+class ChangeFeed(object):
+    """
+    Iterates over all changes after the cursor after, a page at a time. Once it is
+    exhausted, cursor is the cursor after the last change.
+    """
+
+    def __init__(self, after=None, page_size=None):
+        self.cursor = after
+        self.page_size = page_size
+        self.count = 0
+
+    def __iter__(self):
+        while True:
+            page = get_changes(self.cursor, self.page_size)
+            for change in page:
+                yield change
+            self.count += len(page)
+            self.cursor = page.cursor
+            if not page.has_next:
+                return
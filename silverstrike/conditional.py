@@ -0,0 +1,81 @@
+"""
+Conditional GET support.
+
+Responses get an ETag and a Last-Modified header derived from the latest last_modified
+of the models they are built from and the tombstones of their deleted objects. Requests
+that send them back get a 304 Not Modified without the view being run.
+"""
+import hashlib
+from datetime import datetime, time
+from functools import wraps
+
+from django.contrib import messages
+from django.db import models
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from silverstrike.models import Account, Category, Split, Tombstone, Transaction
+
+LEDGER_MODELS = (Account, Category, Split, Transaction)
+
+
+def last_change(*model_classes):
+    """
+    Returns the time of the latest save or delete of any object of the models.
+    """
+    times = [m.objects.aggregate(models.Max('last_modified'))['last_modified__max']
+             for m in model_classes]
+    times.append(Tombstone.objects.filter(
+        model__in=[m._meta.label_lower for m in model_classes]).aggregate(
+            models.Max('last_modified'))['last_modified__max'])
+    # most views depend on the current date as well
+    times.append(timezone.make_aware(datetime.combine(timezone.localdate(), time())))
+    return max(t for t in times if t is not None)
+
+
+def conditional(*model_classes):
+    """
+    Decorator for view functions that answers GET and HEAD requests with 304 Not Modified
+    if none of the models changed since the client fetched the response.
+    """
+    def decorator(view):
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            changed = last_change(*model_classes)
+            etag = quote_etag(hashlib.md5('{}:{}:{}:{}'.format(
+                changed.isoformat(), request.get_full_path(), request.user.pk,
+                getattr(request, 'LANGUAGE_CODE', '')).encode()).hexdigest())
+            last_modified = int(changed.timestamp())
+            # Last-Modified only has seconds, so it is only sent once the second of the
+            # change is over. A later write in the same second would not change it.
+            if last_modified >= int(timezone.now().timestamp()):
+                last_modified = None
+            response = get_conditional_response(request, etag, last_modified)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code == 200:
+                    response.setdefault('ETag', etag)
+                    if last_modified is not None:
+                        response.setdefault('Last-Modified', http_date(last_modified))
+            # make browsers revalidate instead of guessing how long the response is fresh
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return inner
+    return decorator
+
+
+class ConditionalMixin(object):
+    """
+    Adds conditional GET to class based views. Pages with pending messages are always
+    rendered so that the messages are shown. Pages with forms must not use it, the CSRF
+    token they contain changes with every login.
+    """
+    conditional_models = LEDGER_MODELS
+
+    def get(self, request, *args, **kwargs):
+        if len(messages.get_messages(request)):
+            return super().get(request, *args, **kwargs)
+        return conditional(*self.conditional_models)(super().get)(request, *args, **kwargs)
@@ -0,0 +1,64 @@
+"""
+Figures shown on the dashboard.
+
+All sums are computed by a single query over the splits of personal accounts with
+one conditional aggregate per figure.
+"""
+from datetime import date, timedelta
+
+from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Coalesce
+
+from silverstrike.models import Account, AmountField, RecurringTransaction, Split, Transaction
+
+
+def _sum(condition):
+    return Coalesce(models.Sum('amount', filter=condition), 0, output_field=AmountField())
+
+
+def get_summary(today=None, recurrences=None):
+    """
+    Returns the dashboard figures as a dict.
+
+    recurrences are the recurrences due this month, they are loaded if they are not given.
+    """
+    today = today or date.today()
+    first = today.replace(day=1)
+    previous_last = first - timedelta(days=1)
+    previous_first = previous_last.replace(day=1)
+    if recurrences is None:
+        recurrences = RecurringTransaction.objects.due_in_month(today)
+
+    income = Q(opposing_account__account_type=Account.FOREIGN, amount__gt=0)
+    expense = Q(opposing_account__account_type=Account.FOREIGN, amount__lt=0)
+    this_month = Q(date__gte=first, date__lte=today)
+    last_month = Q(date__gte=previous_first, date__lte=previous_last)
+    upcoming = (Q(date__gt=today) & ~Q(transaction_type=Transaction.TRANSFER) &
+                ~Q(opposing_account__account_type=Account.PERSONAL, amount__gte=0))
+    summary = Split.objects.personal().aggregate(
+        balance=_sum(Q(date__lte=today)),
+        income=_sum(this_month & income),
+        expenses=_sum(this_month & expense),
+        previous_income=_sum(last_month & income),
+        previous_expenses=_sum(last_month & expense),
+        upcoming=_sum(upcoming))
+
+    summary['expenses'] = abs(summary['expenses'])
+    summary['previous_expenses'] = abs(summary['previous_expenses'])
+    summary['difference'] = summary['income'] - summary['expenses']
+    summary['previous_difference'] = summary['previous_income'] - summary['previous_expenses']
+    summary['working_balance'] = summary['balance'] + summary.pop('upcoming')
+
+    outstanding = 0
+    summary['overdue_transactions'] = False
+    for r in recurrences:
+        if r.transaction_type == Transaction.WITHDRAW:
+            outstanding -= r.amount
+        elif r.transaction_type == Transaction.DEPOSIT:
+            outstanding += r.amount
+        if r.date <= today:
+            summary['overdue_transactions'] = True
+    summary['outstanding'] = outstanding
+    summary['expected_balance'] = summary['working_balance'] + outstanding
+    return summary
@@ -0,0 +1,76 @@
+"""
+CSV export of splits and JSON lines export of changes.
+
+The rows are streamed from a database cursor in chunks and written in blocks, optionally
+gzip compressed, so exports of any size use constant memory and the first bytes are
+sent before the last rows are read. Account and category names are looked up in dicts
+instead of being joined for every row.
+"""
+import csv
+import json
+import zlib
+
+from silverstrike.models import Account, Category
+
+HEADERS = ['account', 'opposing_account', 'date', 'amount', 'category']
+# rows fetched from the database at a time
+CHUNK_SIZE = 2000
+# bytes written at a time
+BLOCK_SIZE = 64 * 1024
+
+
+class _Echo(object):
+    def write(self, value):
+        return value
+
+
+def iter_rows(splits):
+    accounts = dict(Account.objects.values_list('pk', 'name'))
+    categories = dict(Category.objects.values_list('pk', 'name'))
+    yield HEADERS
+    rows = splits.order_by('-date', '-pk').values_list(
+        'account_id', 'opposing_account_id', 'date', 'amount', 'category_id')
+    for account, opposing_account, day, amount, category in rows.iterator(CHUNK_SIZE):
+        yield [accounts[account], accounts[opposing_account], day, amount,
+               categories.get(category)]
+
+
+def iter_blocks(lines, compress=False):
+    """
+    Joins lines into blocks of bytes, gzip compressed if compress is set.
+    """
+    # 16 + MAX_WBITS writes a gzip header and trailer
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if compress else None
+    buffer = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= BLOCK_SIZE:
+            block = ''.join(buffer).encode('utf-8')
+            buffer = []
+            size = 0
+            if compressor:
+                block = compressor.compress(block)
+            if block:
+                yield block
+    block = ''.join(buffer).encode('utf-8')
+    if compressor:
+        block = compressor.compress(block) + compressor.flush()
+    if block:
+        yield block
+
+
+def iter_csv(splits, compress=False):
+    """
+    Yields the CSV export of splits as blocks of bytes, gzip compressed if compress is set.
+    """
+    writer = csv.writer(_Echo(), delimiter=';')
+    return iter_blocks((writer.writerow(row) for row in iter_rows(splits)), compress)
+
+
+def iter_json_lines(changes, compress=False):
+    """
+    Yields changes as JSON lines in blocks of bytes, gzip compressed if compress is set.
+    """
+    return iter_blocks((json.dumps(change) + '\n' for change in changes), compress)
@@ -237,6 +237,7 @@ class ExportForm(forms.Form):
     end = forms.DateField()
     accounts = forms.ModelMultipleChoiceField(
         queryset=models.Account.objects.personal())
+    compress = forms.BooleanField(required=False, label=_('Compress with gzip'))
 
 
 CategoryAssignFormset = forms.modelformset_factory(models.Split, fields=('category',), extra=0)
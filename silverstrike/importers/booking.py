@@ -0,0 +1,136 @@
+"""
+Books the lines of imported statements.
+
+Lines are booked in chunks, each in its own database transaction. Booked lines keep
+their fingerprint, so booking the same lines again after a failure skips the chunks
+that made it and never books a line twice.
+"""
+from django.db import transaction as db_transaction
+
+from silverstrike import models
+from silverstrike.importers.import_statement import iter_fingerprints
+
+# lines booked per database transaction
+CHUNK_SIZE = 500
+
+
+def get_duplicates(fingerprints):
+    """
+    Returns the fingerprints of lines that were already imported.
+    """
+    duplicates = set()
+    for start in range(0, len(fingerprints), CHUNK_SIZE):
+        duplicates.update(models.Split.objects.filter(
+            import_fingerprint__in=fingerprints[start:start + CHUNK_SIZE]).values_list(
+            'import_fingerprint', flat=True))
+    return duplicates
+
+
+def get_lines(statements, account_id, choices):
+    """
+    Returns the lines to book as (title, account name, recurrence, amount, statement,
+    fingerprint) tuples. choices are the (index, title, account name, recurrence) the
+    user entered for the statements. statements are iterated once, only the chosen
+    ones are kept.
+    """
+    choices = {i: (title, account, recurrence)
+               for i, title, account, recurrence in choices if title or account}
+    lines = []
+    for i, (statement, fingerprint) in enumerate(iter_fingerprints(statements, account_id)):
+        if i not in choices:
+            continue
+        amount = float(statement.amount)
+        if amount == 0:
+            continue
+        title, account, recurrence = choices[i]
+        lines.append((title, account, recurrence, amount, statement, fingerprint))
+    return lines
+
+
+def get_accounts(lines):
+    """
+    Returns the opposing accounts of lines by name, creating missing ones as
+    foreign accounts.
+    """
+    ibans = {}
+    for title, name, recurrence, amount, statement, fingerprint in lines:
+        if statement.iban:
+            ibans.setdefault(name, statement.iban)
+    names = {line[1] for line in lines}
+    accounts = {}
+    # personal accounts win over foreign ones of the same name
+    for account in models.Account.objects.filter(name__in=names).order_by('-account_type'):
+        accounts[account.name] = account
+    for account in accounts.values():
+        if not account.iban and account.name in ibans:
+            account.iban = ibans[account.name]
+            account.save(update_fields=['iban'])
+    missing = names.difference(accounts)
+    if missing:
+        models.Account.objects.bulk_create(
+            [models.Account(name=name, account_type=models.Account.FOREIGN,
+                            iban=ibans.get(name)) for name in missing])
+        accounts.update((account.name, account) for account in models.Account.objects.filter(
+            name__in=missing, account_type=models.Account.FOREIGN))
+    return accounts
+
+
+def book(lines, account_id, accounts):
+    transactions = []
+    for title, name, recurrence, amount, statement, fingerprint in lines:
+        account = accounts[name]
+        transaction_type = -1
+        if account.account_type == models.Account.PERSONAL:
+            transaction_type = models.Transaction.TRANSFER
+        elif account.account_type == models.Account.FOREIGN:
+            if amount < 0:
+                transaction_type = models.Transaction.WITHDRAW
+            else:
+                transaction_type = models.Transaction.DEPOSIT
+        transactions.append(models.Transaction(
+            title=title,
+            date=statement.transaction_date,
+            transaction_type=transaction_type,
+            recurrence_id=recurrence if recurrence > 0 else None))
+    models.Transaction.objects.bulk_create(transactions)
+
+    splits = []
+    for transaction, line in zip(transactions, lines):
+        title, name, recurrence, amount, statement, fingerprint = line
+        splits.append(models.Split(
+            title=title,
+            amount=amount,
+            date=statement.book_date,
+            transaction=transaction,
+            account_id=account_id,
+            opposing_account=accounts[name],
+            import_fingerprint=fingerprint))
+        splits.append(models.Split(
+            title=title,
+            amount=-amount,
+            date=statement.transaction_date,
+            transaction=transaction,
+            account=accounts[name],
+            opposing_account_id=account_id))
+    models.Split.objects.bulk_create(splits)
+
+
+def book_statements(statements, account_id, choices, progress=None):
+    """
+    Books the statements into the account and returns the number of booked lines.
+    Lines that were imported before are skipped. progress is called with the number
+    of processed and of all lines after every chunk.
+    """
+    lines = get_lines(statements, account_id, choices)
+    booked = 0
+    for start in range(0, len(lines), CHUNK_SIZE):
+        with db_transaction.atomic():
+            chunk = lines[start:start + CHUNK_SIZE]
+            duplicates = get_duplicates([line[-1] for line in chunk])
+            chunk = [line for line in chunk if line[-1] not in duplicates]
+            if chunk:
+                book(chunk, account_id, get_accounts(chunk))
+            booked += len(chunk)
+        if progress:
+            progress(min(start + CHUNK_SIZE, len(lines)), len(lines))
+    return booked
@@ -1,115 +1,153 @@
+"""
+Imports the CSV export of Firefly III.
+
+The rows are read in chunks. For every chunk the missing accounts and categories are
+created first, then the transactions and their splits, each with a single bulk insert
+and all of it in one database transaction. Imported splits keep a fingerprint of their
+row, so importing the same export again after a failure skips the chunks that made it.
+"""
 import csv
 import datetime
+import hashlib
+from itertools import islice
+
+from django.db import transaction as db_transaction
 
 from silverstrike import models
+from silverstrike.importers.booking import get_duplicates
+
+# rows imported per database transaction
+CHUNK_SIZE = 5000
+
+COLUMNS = ('date', 'description', 'amount', 'transaction_type', 'asset_account_name',
+           'opposing_account_name', 'category_name', 'notes')
+
+# the transaction type and the type of the opposing account of each Firefly type
+TYPES = {
+    'Withdrawal': (models.Transaction.WITHDRAW, models.Account.FOREIGN),
+    'Deposit': (models.Transaction.DEPOSIT, models.Account.FOREIGN),
+    'Transfer': (models.Transaction.TRANSFER, models.Account.PERSONAL),
+    'Opening balance': (models.Transaction.SYSTEM, models.Account.SYSTEM),
+}
 
 
-def import_firefly(csv_path):
-    date = 'date'
-    title = 'description'
-    amount = 'amount'
-    source = 'asset_account_name'
-    destination = 'opposing_account_name'
-    category = 'category_name'
-    notes = 'notes'
-    transaction_type = 'transaction_type'
-
-    system_account, _ = models.Account.objects.get_or_create(account_type=models.Account.SYSTEM,
-                                                             defaults={'name': 'System Account'})
-
-    personal_accounts = dict()
-    foreign_accounts = dict()
-    for name, id, t in models.Account.objects.all().values_list('name', 'id', 'account_type'):
-        if t == models.Account.PERSONAL:
-            personal_accounts[name] = id
-        elif t == models.Account.FOREIGN:
-            foreign_accounts[name] = id
-
-    categories = dict()
-    for name, id in models.Category.objects.all().values_list('name', 'id'):
-        categories[name] = id
-
-    first_time = True
+def read_rows(csv_path):
+    """
+    Yields the rows of the export as dicts of COLUMNS and a fingerprint.
+    """
     with open(csv_path) as csv_file:
-        for line in csv.reader(csv_file):
-            if first_time:
-                first_time = False
-                line = {k: v for v, k in enumerate(line)}
-                date = line[date]
-                title = line[title]
-                amount = line[amount]
-                transaction_type = line[transaction_type]
-                source = line[source]
-                destination = line[destination]
-                category = line[category]
-                notes = line[notes]
-                continue
-            if line[source] in personal_accounts:
-                line[source] = personal_accounts[line[source]]
-            else:
-                a = models.Account.objects.create(name=line[source],
-                                                  account_type=models.Account.PERSONAL)
-                personal_accounts[a.name] = a.id
-                line[source] = a.id
-
-            line[amount] = float(line[amount])
-
-            if line[transaction_type] == 'Withdrawal':
-                t_type = models.Transaction.WITHDRAW
-                if line[destination] in foreign_accounts:
-                    line[destination] = foreign_accounts[line[destination]]
-                else:
-                    a = models.Account.objects.create(name=line[destination],
-                                                      account_type=models.Account.FOREIGN)
-                    foreign_accounts[a.name] = a.id
-                    line[destination] = a.id
-
-            elif line[transaction_type] == 'Transfer':
-                # positive transfers are wrong
-                if line[amount] > 0:
-                    continue
-                t_type = models.Transaction.TRANSFER
-                if line[destination] in personal_accounts:
-                    line[destination] = personal_accounts[line[destination]]
-                else:
-                    a = models.Account.objects.create(name=line[destination],
-                                                      account_type=models.Account.PERSONAL)
-                    personal_accounts[a.name] = a.id
-                    line[destination] = a.id
-
-            elif line[transaction_type] == 'Deposit':
-                t_type = models.Transaction.DEPOSIT
-                if line[destination] in foreign_accounts:
-                    line[destination] = foreign_accounts[line[destination]]
-                else:
-                    a = models.Account.objects.create(name=line[destination],
-                                                      account_type=models.Account.FOREIGN)
-                    foreign_accounts[a.name] = a.id
-                    line[destination] = a.id
-            elif line[transaction_type] == 'Opening balance':
-                line[destination] = system_account.id
-
-            if line[category] in categories:
-                line[category] = categories[line[category]]
-            elif line[category]:
-                c = models.Category.objects.create(name=line[category])
-                categories[c.name] = c.id
-                line[category] = c.id
-            else:
-                line[category] = None
-            line[date] = datetime.datetime.strptime(line[date], '%Y%m%d')
-
-            transaction = models.Transaction.objects.create(
-                title=line[title], date=line[date],
-                transaction_type=t_type)
-            models.Split.objects.bulk_create(
-                [models.Split(
-                    account_id=line[source], title=line[title],
-                    date=line[date],
-                    opposing_account_id=line[destination], amount=line[amount],
-                    transaction_id=transaction.id, category_id=line[category]),
-                 models.Split(
-                    account_id=line[destination], title=line[title],
-                    date=line[date],
-                    opposing_account_id=line[source], amount=-line[amount],
-                    transaction_id=transaction.id, category_id=line[category])])
+        reader = csv.reader(csv_file)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = {name: header.index(name) for name in COLUMNS}
+        seen = {}
+        for line in reader:
+            row = {name: line[i] for name, i in columns.items()}
+            key = hashlib.sha1('|'.join(['firefly'] + line).encode('utf-8')).hexdigest()
+            # identical rows get different fingerprints
+            occurrence = seen.get(key, 0)
+            seen[key] = occurrence + 1
+            row['fingerprint'] = hashlib.sha1(
+                '{}|{}'.format(key, occurrence).encode('utf-8')).hexdigest()
+            yield row
+
+
+def count_rows(csv_path):
+    with open(csv_path) as csv_file:
+        return max(sum(1 for line in csv.reader(csv_file)) - 1, 0)
+
+
+def import_firefly(csv_path, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Imports the export at csv_path and returns the number of imported transactions.
+    progress is called with the number of rows read after every chunk.
+    """
+    system_account, _ = models.Account.objects.get_or_create(
+        account_type=models.Account.SYSTEM, defaults={'name': 'System Account'})
+    accounts = {models.Account.PERSONAL: {}, models.Account.FOREIGN: {}}
+    for name, id, t in models.Account.objects.values_list('name', 'id', 'account_type'):
+        if t in accounts:
+            accounts[t][name] = id
+    accounts[models.Account.SYSTEM] = {'': system_account.id}
+    categories = dict(models.Category.objects.values_list('name', 'id'))
+
+    imported = 0
+    read = 0
+    rows = read_rows(csv_path)
+    chunk = list(islice(rows, chunk_size))
+    while chunk:
+        with db_transaction.atomic():
+            imported += _import_chunk(chunk, accounts, categories)
+        read += len(chunk)
+        if progress:
+            progress(read)
+        chunk = list(islice(rows, chunk_size))
+    return imported
+
+
+def _create_accounts(accounts, account_type, names):
+    missing = set(names).difference(accounts[account_type])
+    if not missing:
+        return
+    models.Account.objects.bulk_create(
+        [models.Account(name=name, account_type=account_type) for name in missing])
+    accounts[account_type].update(models.Account.objects.filter(
+        name__in=missing, account_type=account_type).values_list('name', 'id'))
+
+
+def _create_categories(categories, names):
+    missing = set(names).difference(categories)
+    if not missing:
+        return
+    models.Category.objects.bulk_create([models.Category(name=name) for name in missing])
+    categories.update(models.Category.objects.filter(name__in=missing).values_list('name', 'id'))
+
+
+def _import_chunk(rows, accounts, categories):
+    duplicates = get_duplicates([row['fingerprint'] for row in rows])
+    todo = []
+    for row in rows:
+        if row['fingerprint'] in duplicates or row['transaction_type'] not in TYPES:
+            continue
+        row['amount'] = float(row['amount'])
+        # positive transfers are wrong
+        if row['transaction_type'] == 'Transfer' and row['amount'] > 0:
+            continue
+        row['type'], row['opposing_type'] = TYPES[row['transaction_type']]
+        if row['opposing_type'] == models.Account.SYSTEM:
+            row['opposing_account_name'] = ''
+        todo.append(row)
+
+    _create_accounts(accounts, models.Account.PERSONAL, [
+        row['asset_account_name'] for row in todo] + [
+        row['opposing_account_name'] for row in todo
+        if row['opposing_type'] == models.Account.PERSONAL])
+    _create_accounts(accounts, models.Account.FOREIGN, [
+        row['opposing_account_name'] for row in todo
+        if row['opposing_type'] == models.Account.FOREIGN])
+    _create_categories(categories, [row['category_name'] for row in todo if row['category_name']])
+
+    transactions = []
+    for row in todo:
+        row['date'] = datetime.datetime.strptime(row['date'], '%Y%m%d').date()
+        transactions.append(models.Transaction(
+            title=row['description'], date=row['date'], transaction_type=row['type'],
+            notes=row['notes'] or None))
+    models.Transaction.objects.bulk_create(transactions)
+
+    splits = []
+    for transaction, row in zip(transactions, todo):
+        source = accounts[models.Account.PERSONAL][row['asset_account_name']]
+        destination = accounts[row['opposing_type']][row['opposing_account_name']]
+        category = categories.get(row['category_name'])
+        splits.append(models.Split(
+            account_id=source, opposing_account_id=destination, title=row['description'],
+            date=row['date'], amount=row['amount'], transaction=transaction,
+            category_id=category, import_fingerprint=row['fingerprint']))
+        splits.append(models.Split(
+            account_id=destination, opposing_account_id=source, title=row['description'],
+            date=row['date'], amount=-row['amount'], transaction=transaction,
+            category_id=category))
+    models.Split.objects.bulk_create(splits)
+    return len(todo)
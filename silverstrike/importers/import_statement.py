@@ -1,12 +1,77 @@
+import datetime
+import hashlib
+from decimal import Decimal
+
+
+def _format_date(day):
+    return day.isoformat() if day else ''
+
+
+def _parse_date(day):
+    return datetime.datetime.strptime(day, '%Y-%m-%d').date() if day else ''
+
+
+def iter_fingerprints(statements, account_id):
+    """
+    Yields every statement imported into the account with its fingerprint, see
+    ImportStatement.fingerprint. Identical lines get different fingerprints by
+    counting how often they occurred before.
+    """
+    seen = {}
+    for statement in statements:
+        fingerprint = statement.fingerprint(account_id)
+        occurrence = seen.get(fingerprint, 0)
+        seen[fingerprint] = occurrence + 1
+        yield statement, statement.fingerprint(account_id, occurrence)
+
+
+def get_fingerprints(statements, account_id):
+    """
+    Returns the fingerprints of statements imported into the account.
+    """
+    return [fingerprint for statement, fingerprint in iter_fingerprints(statements, account_id)]
+
+
 class ImportStatement(object):
-    account = ''
-    book_date = ''
-    transaction_date = ''
-    amount = 0
-    notes = ''
-    iban = ''
-
-    def __init__(self, **kwargs):
-        for name, value in kwargs.items():
-            setattr(self, name, value)
-        self.transaction_date = self.transaction_date or self.book_date
+    """
+    A single line of a bank statement.
+
+    Importers yield these one by one, __slots__ keeps them small when a statement has
+    thousands of lines.
+    """
+    __slots__ = ('account', 'book_date', 'transaction_date', 'amount', 'notes', 'iban')
+
+    def __init__(self, account='', book_date='', transaction_date='', amount=0, notes='',
+                 iban=''):
+        self.account = account
+        self.book_date = book_date
+        self.transaction_date = transaction_date or book_date
+        self.amount = amount
+        self.notes = notes
+        self.iban = iban
+
+    def __repr__(self):
+        return '<ImportStatement {} {} {}>'.format(self.book_date, self.amount, self.notes)
+
+    def fingerprint(self, account_id, occurrence=0):
+        """
+        Returns a hash of the account, book date, amount, counterparty and normalized
+        notes that identifies the line when it is imported again.
+        """
+        parts = [account_id, _format_date(self.book_date),
+                 Decimal(str(self.amount)).quantize(Decimal('0.01')),
+                 self.iban or self.account, ' '.join(self.notes.lower().split()), occurrence]
+        return hashlib.sha1('|'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+
+    def to_row(self):
+        """
+        Returns the statement as a list of JSON serializable values, see from_row.
+        """
+        return [self.account, _format_date(self.book_date),
+                _format_date(self.transaction_date), float(self.amount), self.notes, self.iban]
+
+    @classmethod
+    def from_row(cls, row):
+        account, book_date, transaction_date, amount, notes, iban = row
+        return cls(account, _parse_date(book_date), _parse_date(transaction_date), amount,
+                   notes, iban)
@@ -8,8 +8,7 @@ from silverstrike.importers.import_statement import ImportStatement
 logger = logging.getLogger(__name__)
 
 
-def import_transactions(csv_path):
-    lines = []
+def iter_transactions(csv_path):
     with open(csv_path) as csv_file:
         logger.info('Opened csv file %s', csv_path)
         csviter = csv.reader(csv_file, delimiter=',')
@@ -18,15 +17,17 @@ def import_transactions(csv_path):
             logger.info('Line %s', line)
             try:
                 transaction_time = datetime.datetime.strptime(line[2], '%m/%d/%Y').date()
-                lines.append(ImportStatement(
+                yield ImportStatement(
                     notes=line[0],
                     account=line[1],
                     book_date=transaction_time,
                     transaction_date=transaction_time,
                     amount=-float(line[4])
-                    ))
+                    )
             except ValueError as e:
-                logger.error('Error' + e)
+                logger.error('Error %s', e)
                 pass
 
-    return lines
+
+def import_transactions(csv_path):
+    return list(iter_transactions(csv_path))
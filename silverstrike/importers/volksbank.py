@@ -1,11 +1,11 @@
 import csv
 import datetime
+from collections import deque
 
 from silverstrike.importers.import_statement import ImportStatement
 
 
-def import_transactions(csv_path):
-    lines = []
+def _parse(csv_path):
     with open(csv_path, encoding='latin-1') as csv_file:
         for line in csv.reader(csv_file, delimiter=';'):
             if len(line) < 7:
@@ -14,16 +14,30 @@ def import_transactions(csv_path):
                 amount = float(line[11].replace('.', '').replace(',', '.'))
                 if line[12] == 'S':
                     amount = -amount
-                lines.append(ImportStatement(
+                yield ImportStatement(
                     book_date=datetime.datetime.strptime(line[1], '%d.%m.%Y').date(),
                     transaction_date=datetime.datetime.strptime(line[0], '%d.%m.%Y').date(),
                     account=line[3],
                     notes=line[8],
                     iban=line[5],
                     amount=amount
-                    ))
+                    )
             except ValueError as e:
                 # first line contains headers...
                 print(e)
                 pass
-    return lines[1:-2]
+
+
+def iter_transactions(csv_path):
+    statements = _parse(csv_path)
+    # the first parsed line and the last two are not bookings
+    next(statements, None)
+    pending = deque()
+    for statement in statements:
+        pending.append(statement)
+        if len(pending) > 2:
+            yield pending.popleft()
+
+
+def import_transactions(csv_path):
+    return list(iter_transactions(csv_path))
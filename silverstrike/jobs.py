@@ -0,0 +1,62 @@
+"""
+A job queue in the database.
+
+Views queue long running work with Job.objects.enqueue(kind, **arguments) and the
+runworker command runs it by calling the handler registered for kind with the job and
+the arguments. Handlers report their progress with job.set_progress.
+
+Jobs whose worker was killed stop reporting progress. runworker queues them again,
+up to Job.MAX_ATTEMPTS times, so handlers have to be safe to run again.
+"""
+import json
+import logging
+import traceback
+
+from silverstrike.importers import booking, firefly
+from silverstrike.models import ImportFile, Job
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+
+def handler(kind):
+    def decorator(func):
+        HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def run(job):
+    try:
+        HANDLERS[job.kind](job, **json.loads(job.arguments))
+    except Exception:
+        logger.exception('Job %s failed', job)
+        job.finish(error=traceback.format_exc())
+    else:
+        job.finish()
+
+
+def run_pending():
+    """
+    Runs queued jobs until there are none left and returns how many were run.
+    """
+    count = 0
+    job = Job.objects.claim()
+    while job:
+        run(job)
+        count += 1
+        job = Job.objects.claim()
+    return count
+
+
+@handler('import_statements')
+def import_statements(job, uuid, importer, account, choices):
+    statements = ImportFile.objects.get(uuid=uuid).get_statements(importer)
+    booking.book_statements(statements, account, choices, job.set_progress)
+
+
+@handler('import_firefly')
+def import_firefly(job, path):
+    job.set_progress(0, firefly.count_rows(path))
+    firefly.import_firefly(path, progress=job.set_progress)
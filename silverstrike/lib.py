@@ -4,3 +4,67 @@ import datetime
 def last_day_of_month(any_day):
     next_month = any_day.replace(day=28) + datetime.timedelta(days=4)
     return next_month - datetime.timedelta(days=next_month.day)
+
+
+def sample_dates(dstart, dend, steps=30):
+    """
+    Returns steps dates starting at dstart in equal distances, followed by dend.
+    The distance is at least one day.
+    """
+    step = (dend - dstart) / steps
+    if step < datetime.timedelta(days=1):
+        step = datetime.timedelta(days=1)
+        steps = int((dend - dstart) / step)
+    dates = []
+    for i in range(steps):
+        dates.append(dstart)
+        dstart += step
+    dates.append(dend)
+    return dates
+
+
+def bucket_ends(dstart, dend, buckets):
+    """
+    Splits the days from dstart to dend into at most buckets ranges of about equal length
+    and returns the last day of each range.
+    """
+    days = (dend - dstart).days + 1
+    buckets = max(1, min(buckets, days))
+    return [dstart + datetime.timedelta(days=(i + 1) * days // buckets - 1)
+            for i in range(buckets)]
+
+
+def lttb(points, threshold):
+    """
+    Reduces a list of (date, value) points to threshold points with the
+    largest-triangle-three-buckets algorithm. The first and last points are kept, only
+    the last one if threshold is 1.
+    """
+    if threshold >= len(points):
+        return list(points)
+    if threshold == 1:
+        return [points[-1]]
+    if threshold == 2:
+        return [points[0], points[-1]]
+    x = [p[0].toordinal() for p in points]
+    y = [float(p[1]) for p in points]
+    every = (len(points) - 2) / (threshold - 2)
+    sampled = [points[0]]
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        # average of the next bucket is the third corner of the triangle
+        next_start = end
+        next_end = min(int((i + 2) * every) + 1, len(points))
+        avg_x = sum(x[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(y[next_start:next_end]) / (next_end - next_start)
+        best, best_area = start, -1
+        for j in range(start, end):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+    sampled.append(points[-1])
+    return sampled
@@ -0,0 +1,50 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+
+from silverstrike.models import Account, Category, RecurringTransaction, Split, Transaction
+
+
+def sample_id(model):
+    return model.objects.values_list('id', flat=True).first() or 0
+
+
+def get_querysets():
+    today = date.today()
+    first_of_month = today.replace(day=1)
+    account = sample_id(Account)
+    category = sample_id(Category)
+    recurrence = sample_id(RecurringTransaction)
+    return [
+        ('account balance', Split.objects.filter(
+            account_id=account, date__lte=today).values('account').annotate(Sum('amount'))),
+        ('account splits', Split.objects.filter(account_id=account).select_related(
+            'opposing_account', 'category', 'transaction')),
+        ('opposing account splits', Split.objects.filter(opposing_account_id=account)),
+        ('month income and expenses', Split.objects.personal().date_range(
+            first_of_month, today).values('transaction_type').annotate(Sum('amount'))),
+        ('category spending', Split.objects.filter(
+            category_id=category, date__gte=first_of_month).values(
+                'category').annotate(Sum('amount'))),
+        ('recurrence transactions', Transaction.objects.filter(
+            recurrence_id=recurrence).order_by('-date')),
+        ('latest transactions', Transaction.objects.all()[:10]),
+        ('personal accounts', Account.objects.personal().active()),
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Print the query plans of the most frequent queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*',
+                            help='Only explain the queries with these names')
+
+    def handle(self, *args, **options):
+        for name, queryset in get_querysets():
+            if options['names'] and name not in options['names']:
+                continue
+            print(name)
+            print(queryset.explain())
+            print()
@@ -1,8 +1,9 @@
-import csv
 import sys
 
 from django.core.management.base import BaseCommand, CommandError
 
+from silverstrike.changes import ChangeFeed, parse_since
+from silverstrike.export import iter_csv, iter_json_lines
 from silverstrike.models import Split
 
 
@@ -13,28 +14,47 @@ class Command(BaseCommand):
             dest='file',
             type=str,
             help='File to write to')
+        parser.add_argument(
+            '--gzip',
+            dest='gzip',
+            action='store_true',
+            help='Compress the export with gzip')
+        parser.add_argument(
+            '--since',
+            dest='since',
+            type=str,
+            help='Export the changes since an ISO 8601 date or time or the cursor of an '
+                 'earlier export as JSON lines')
 
     def handle(self, *args, **options):
-        output = sys.stdout
+        feed = None
+        if options['since']:
+            try:
+                feed = ChangeFeed(parse_since(options['since']))
+            except ValueError as e:
+                raise CommandError(str(e))
+
+        output = sys.stdout.buffer
         if options['file']:
             try:
-                output = open(options['file'], 'w')
+                output = open(options['file'], 'wb')
             except FileNotFoundError:
                 raise CommandError('Could not open {} for writing'.format(options['file']))
 
-        splits = Split.objects.transfers_once().personal()
-        csv_writer = csv.writer(output, delimiter=';')
-        headers = [
-            'account',
-            'opposing_account',
-            'date',
-            'amount',
-            'category'
-            ]
-        csv_writer.writerow(headers)
-        for split in splits.values_list('account__name', 'opposing_account__name',
-                                        'date', 'amount', 'category'):
-            csv_writer.writerow(split)
+        if feed is None:
+            blocks = iter_csv(Split.objects.transfers_once().personal(), options['gzip'])
+        else:
+            blocks = iter_json_lines(feed, options['gzip'])
+        for block in blocks:
+            output.write(block)
         if options['file']:
             output.close()
-            print('Exported transactions to {}'.format(options['file']))
+            if feed is None:
+                print('Exported transactions to {}'.format(options['file']))
+            else:
+                print('Exported {} changes to {}'.format(feed.count, options['file']))
+        else:
+            output.flush()
+        if feed is not None and feed.cursor:
+            # on stderr so that it does not end up in the exported changes
+            self.stderr.write('Continue with --since {}'.format(feed.cursor))
@@ -1,19 +1,31 @@
 from django.core.management.base import BaseCommand, CommandError
 
-from silverstrike.lib import import_firefly
+from silverstrike.importers import firefly
 
 
 class Command(BaseCommand):
+    help = 'Import a CSV export of Firefly III'
+
     def add_arguments(self, parser):
         parser.add_argument(
             'file',
             type=str,
             help='File to import')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=firefly.CHUNK_SIZE,
+            help='Rows imported per database transaction')
 
     def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('The chunk size has to be positive')
         try:
-            import_firefly(options['file'])
+            total = firefly.count_rows(options['file'])
+            imported = firefly.import_firefly(
+                options['file'], options['chunk_size'],
+                progress=lambda read: print('Read {} of {} rows'.format(read, total)))
         except FileNotFoundError:
-            raise CommandError('Could not open {} for writing'.format(options['file']))
+            raise CommandError('Could not open {} for reading'.format(options['file']))
         else:
-            print('Imported transactions from {}'.format(options['file']))
+            print('Imported {} transactions from {}'.format(imported, options['file']))
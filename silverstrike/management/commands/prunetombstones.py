@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from silverstrike.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = 'Delete the records of deleted objects that are older than {} days'.format(
+        Tombstone.RETENTION.days)
+
+    def handle(self, *args, **options):
+        print('Deleted {} tombstones'.format(Tombstone.objects.prune()))
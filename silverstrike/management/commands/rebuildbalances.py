@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from silverstrike.models import BalanceSnapshot
+
+
+class Command(BaseCommand):
+    help = 'Recreate the daily balance snapshots of all accounts from their splits'
+
+    def handle(self, *args, **options):
+        count = BalanceSnapshot.objects.rebuild()
+        print('Rebuilt {} balance snapshots'.format(count))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from silverstrike.models import Account, Category
+
+
+class Command(BaseCommand):
+    help = 'Recount the splits of all accounts and categories'
+
+    def handle(self, *args, **options):
+        accounts = Account.objects.rebuild_split_counters()
+        categories = Category.objects.rebuild_split_counters()
+        print('Rebuilt split counters of {} accounts and {} categories'.format(
+            accounts, categories))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from silverstrike.models import SearchDocument
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search index of all transactions'
+
+    def handle(self, *args, **options):
+        documents = SearchDocument.objects.rebuild()
+        print('Indexed {} transactions'.format(documents))
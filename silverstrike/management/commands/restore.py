@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from silverstrike.backup import restore_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Replace all accounts, transactions, budgets and recurrences with a snapshot'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', type=str, help='Snapshot to restore')
+
+    def handle(self, *args, **options):
+        try:
+            rows = restore_snapshot(options['file'])
+        except FileNotFoundError:
+            raise CommandError('Could not open {}'.format(options['file']))
+        except (OSError, ValueError) as e:
+            raise CommandError('Could not restore {}: {}'.format(options['file'], e))
+        print('Restored {} rows from {}'.format(rows, options['file']))
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from silverstrike.jobs import run_pending
+from silverstrike.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Run queued jobs such as imports'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit when there are no queued jobs left instead of waiting for new ones')
+        parser.add_argument(
+            '--interval', type=float, default=2,
+            help='Seconds to wait before looking for new jobs again')
+
+    def handle(self, *args, **options):
+        while True:
+            # jobs of workers that were killed or restarted
+            queued, failed = Job.objects.recover()
+            if queued or failed:
+                print('Queued {} stopped jobs again and gave up on {}'.format(queued, failed))
+            count = run_pending()
+            if count:
+                print('Ran {} jobs'.format(count))
+            if options['once']:
+                return
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                return
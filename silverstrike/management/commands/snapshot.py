@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from silverstrike.backup import write_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Write all accounts, transactions, budgets and recurrences to a snapshot file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', type=str, help='File to write the snapshot to')
+
+    def handle(self, *args, **options):
+        try:
+            rows = write_snapshot(options['file'])
+        except FileNotFoundError:
+            raise CommandError('Could not open {} for writing'.format(options['file']))
+        print('Wrote {} rows to {}'.format(rows, options['file']))
@@ -0,0 +1,47 @@
+# Generated by Django 2.1.15 on 2026-10-18 17:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_balance_snapshots(apps, schema_editor):
+    Split = apps.get_model('silverstrike', 'Split')
+    BalanceSnapshot = apps.get_model('silverstrike', 'BalanceSnapshot')
+    snapshots = []
+    account_id = None
+    for row in Split.objects.order_by('account_id', 'date').values(
+            'account_id', 'date').annotate(total=models.Sum('amount')).iterator():
+        if row['account_id'] != account_id:
+            account_id = row['account_id']
+            balance = 0
+        balance += row['total']
+        snapshots.append(BalanceSnapshot(account_id=account_id, date=row['date'],
+                                         balance=balance))
+    BalanceSnapshot.objects.bulk_create(snapshots, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('silverstrike', '0007_auto_20181230_2157'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='silverstrike.Account')),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='balancesnapshot',
+            unique_together={('account', 'date')},
+        ),
+        migrations.RunPython(create_balance_snapshots, migrations.RunPython.noop),
+    ]
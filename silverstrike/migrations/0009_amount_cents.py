@@ -0,0 +1,139 @@
+from decimal import Decimal
+
+from django.db import migrations, models
+import silverstrike.models
+
+
+AMOUNT_FIELDS = [
+    ('Split', 'amount'),
+    ('Budget', 'amount'),
+    ('RecurringTransaction', 'amount'),
+    ('BalanceSnapshot', 'balance'),
+]
+
+
+def decimal_to_cents(apps, schema_editor):
+    for model_name, field in AMOUNT_FIELDS:
+        model = apps.get_model('silverstrike', model_name)
+        # one update per distinct value instead of one per row
+        values = model.objects.order_by().values_list(field, flat=True).distinct()
+        for value in list(values):
+            cents = int((Decimal(str(value)) * 100).to_integral_value())
+            model.objects.filter(**{field: value}).update(**{field + '_cents': cents})
+
+
+def cents_to_decimal(apps, schema_editor):
+    for model_name, field in AMOUNT_FIELDS:
+        model = apps.get_model('silverstrike', model_name)
+        values = model.objects.order_by().values_list(field + '_cents', flat=True).distinct()
+        for cents in list(values):
+            model.objects.filter(**{field + '_cents': cents}).update(
+                **{field: Decimal(cents).scaleb(-2)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('silverstrike', '0008_balancesnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='split',
+            name='amount_cents',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='budget',
+            name='amount_cents',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='recurringtransaction',
+            name='amount_cents',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='balancesnapshot',
+            name='balance_cents',
+            field=models.BigIntegerField(default=0),
+        ),
+        # nullable so that the columns can be added back when migrating backwards
+        migrations.AlterField(
+            model_name='split',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AlterField(
+            model_name='budget',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10, null=True),
+        ),
+        migrations.AlterField(
+            model_name='recurringtransaction',
+            name='amount',
+            field=models.DecimalField(decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AlterField(
+            model_name='balancesnapshot',
+            name='balance',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14, null=True),
+        ),
+        migrations.RunPython(decimal_to_cents, cents_to_decimal),
+        migrations.RemoveField(
+            model_name='split',
+            name='amount',
+        ),
+        migrations.RemoveField(
+            model_name='budget',
+            name='amount',
+        ),
+        migrations.RemoveField(
+            model_name='recurringtransaction',
+            name='amount',
+        ),
+        migrations.RemoveField(
+            model_name='balancesnapshot',
+            name='balance',
+        ),
+        migrations.RenameField(
+            model_name='split',
+            old_name='amount_cents',
+            new_name='amount',
+        ),
+        migrations.RenameField(
+            model_name='budget',
+            old_name='amount_cents',
+            new_name='amount',
+        ),
+        migrations.RenameField(
+            model_name='recurringtransaction',
+            old_name='amount_cents',
+            new_name='amount',
+        ),
+        migrations.RenameField(
+            model_name='balancesnapshot',
+            old_name='balance_cents',
+            new_name='balance',
+        ),
+        migrations.AlterField(
+            model_name='split',
+            name='amount',
+            field=silverstrike.models.AmountField(),
+        ),
+        migrations.AlterField(
+            model_name='budget',
+            name='amount',
+            field=silverstrike.models.AmountField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='recurringtransaction',
+            name='amount',
+            field=silverstrike.models.AmountField(),
+        ),
+        migrations.AlterField(
+            model_name='balancesnapshot',
+            name='balance',
+            field=silverstrike.models.AmountField(default=0),
+        ),
+    ]
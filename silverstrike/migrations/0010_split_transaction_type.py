@@ -0,0 +1,27 @@
+# Generated by Django 2.1.15 on 2026-10-18 17:26
+
+from django.db import migrations, models
+
+
+def copy_transaction_types(apps, schema_editor):
+    Split = apps.get_model('silverstrike', 'Split')
+    Transaction = apps.get_model('silverstrike', 'Transaction')
+    for transaction_type, name in Transaction._meta.get_field('transaction_type').choices:
+        Split.objects.filter(transaction__transaction_type=transaction_type).update(
+            transaction_type=transaction_type)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('silverstrike', '0009_amount_cents'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='split',
+            name='transaction_type',
+            field=models.IntegerField(blank=True, choices=[(1, 'Deposit'), (2, 'Withdrawal'), (3, 'Transfer'), (4, 'Reconcile')], db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(copy_transaction_types, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 2.1.15 on 2026-10-18 17:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('silverstrike', '0010_split_transaction_type'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='account',
+            index=models.Index(fields=['account_type', 'active'], name='account_type_active'),
+        ),
+        migrations.AddIndex(
+            model_name='split',
+            index=models.Index(fields=['account', 'date', 'amount'], name='split_account_date'),
+        ),
+        migrations.AddIndex(
+            model_name='split',
+            index=models.Index(fields=['date', 'account', 'amount'], name='split_date_account'),
+        ),
+        migrations.AddIndex(
+            model_name='split',
+            index=models.Index(fields=['opposing_account', 'date'], name='split_opposing_date'),
+        ),
+        migrations.AddIndex(
+            model_name='split',
+            index=models.Index(fields=['category', 'date', 'amount'], name='split_category_date'),
+        ),
+        migrations.AddIndex(
+            model_name='split',
+            index=models.Index(fields=['transaction_type', 'date'], name='split_type_date'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['date'], name='transaction_date'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['recurrence', 'date'], name='transaction_recurrence_date'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 2.1.15 on 2026-10-18 17:30
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_splits(apps, schema_editor):
+    Split = apps.get_model('silverstrike', 'Split')
+    for model_name, field in (('Account', 'account'), ('Category', 'category')):
+        model = apps.get_model('silverstrike', model_name)
+        splits = Split.objects.filter(**{field: models.OuterRef('pk')}).order_by()
+        counts = splits.values(field).annotate(count=models.Count('id')).values('count')
+        model.objects.update(
+            split_count=Coalesce(models.Subquery(counts), 0),
+            first_split_date=models.Subquery(splits.order_by('date').values('date')[:1]),
+            last_split_date=models.Subquery(splits.order_by('-date').values('date')[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('silverstrike', '0011_split_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='first_split_date',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='account',
+            name='last_split_date',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='account',
+            name='split_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='first_split_date',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='last_split_date',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='split_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_splits, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 2.1.15 on 2026-10-18 17:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('silverstrike', '0013_tombstones'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='split',
+            index=models.Index(fields=['date', 'id'], name='split_date_id'),
+        ),
+        migrations.AddIndex(
+            model_name='split',
+            index=models.Index(fields=['account', 'date', 'id'], name='split_account_date_id'),
+        ),
+    ]
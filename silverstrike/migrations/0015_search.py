@@ -0,0 +1,95 @@
+# Generated by Django 2.1.15 on 2026-10-18 17:46
+
+from django.db import migrations, models
+from django.db.utils import OperationalError
+import django.db.models.deletion
+
+
+SQLITE_INDEX = [
+    """CREATE VIRTUAL TABLE silverstrike_search USING fts5(
+        text, content='silverstrike_searchdocument', content_rowid='transaction_id',
+        tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER silverstrike_search_insert AFTER INSERT ON silverstrike_searchdocument
+        BEGIN
+            INSERT INTO silverstrike_search(rowid, text) VALUES (new.transaction_id, new.text);
+        END""",
+    """CREATE TRIGGER silverstrike_search_delete AFTER DELETE ON silverstrike_searchdocument
+        BEGIN
+            INSERT INTO silverstrike_search(silverstrike_search, rowid, text)
+                VALUES ('delete', old.transaction_id, old.text);
+        END""",
+    """CREATE TRIGGER silverstrike_search_update AFTER UPDATE ON silverstrike_searchdocument
+        BEGIN
+            INSERT INTO silverstrike_search(silverstrike_search, rowid, text)
+                VALUES ('delete', old.transaction_id, old.text);
+            INSERT INTO silverstrike_search(rowid, text) VALUES (new.transaction_id, new.text);
+        END""",
+]
+
+POSTGRESQL_INDEX = [
+    """CREATE INDEX silverstrike_search ON silverstrike_searchdocument
+        USING gin (to_tsvector('simple', text))""",
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        try:
+            schema_editor.execute(SQLITE_INDEX[0])
+        except OperationalError:
+            # SQLite was built without FTS5, searches fall back to scanning the documents
+            return
+        for sql in SQLITE_INDEX[1:]:
+            schema_editor.execute(sql)
+    elif vendor == 'postgresql':
+        for sql in POSTGRESQL_INDEX:
+            schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for trigger in ('insert', 'delete', 'update'):
+            schema_editor.execute('DROP TRIGGER IF EXISTS silverstrike_search_' + trigger)
+        schema_editor.execute('DROP TABLE IF EXISTS silverstrike_search')
+    elif vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS silverstrike_search')
+
+
+def build_documents(apps, schema_editor):
+    Split = apps.get_model('silverstrike', 'Split')
+    Transaction = apps.get_model('silverstrike', 'Transaction')
+    SearchDocument = apps.get_model('silverstrike', 'SearchDocument')
+    split_titles = {}
+    for transaction_id, title in Split.objects.order_by('pk').values_list(
+            'transaction_id', 'title'):
+        titles = split_titles.setdefault(transaction_id, [])
+        if title not in titles:
+            titles.append(title)
+    documents = []
+    for t in Transaction.objects.values('id', 'title', 'notes', 'date').iterator():
+        parts = [t['title'], t['notes'], t['date'].isoformat()]
+        parts += [title for title in split_titles.get(t['id'], []) if title != t['title']]
+        documents.append(SearchDocument(transaction_id=t['id'],
+                                        text='\n'.join(p for p in parts if p)))
+    SearchDocument.objects.bulk_create(documents, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('silverstrike', '0014_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('transaction', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='silverstrike.Transaction')),
+                ('text', models.TextField()),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(build_documents, migrations.RunPython.noop),
+    ]
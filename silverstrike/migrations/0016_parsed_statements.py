@@ -0,0 +1,28 @@
+# Generated by Django 2.1.15 on 2026-10-18 17:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('silverstrike', '0015_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParsedStatements',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('importer', models.PositiveSmallIntegerField()),
+                ('content_hash', models.CharField(max_length=64)),
+                ('statements', models.BinaryField()),
+                ('import_file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='parsed_statements', to='silverstrike.ImportFile')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='parsedstatements',
+            unique_together={('import_file', 'importer')},
+        ),
+    ]
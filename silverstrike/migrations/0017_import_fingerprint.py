@@ -0,0 +1,18 @@
+# Generated by Django 2.1.15 on 2026-10-18 17:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('silverstrike', '0016_parsed_statements'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='split',
+            name='import_fingerprint',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=40, null=True),
+        ),
+    ]
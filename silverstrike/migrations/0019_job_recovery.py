@@ -0,0 +1,30 @@
+# Generated by Django 2.1.15 on 2026-10-18 18:22
+
+from django.db import migrations, models
+
+
+def set_heartbeats(apps, schema_editor):
+    # running jobs reported no progress since they were started as far as we know
+    apps.get_model('silverstrike', 'Job').objects.filter(state=2).update(
+        heartbeat=models.F('started'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('silverstrike', '0018_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='heartbeat',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(set_heartbeats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.1.15 on 2026-10-18 18:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('silverstrike', '0019_job_recovery'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recurringtransaction',
+            name='transaction_type',
+            field=models.IntegerField(choices=[(1, 'Deposit'), (2, 'Withdrawal'), (3, 'Transfer')]),
+        ),
+        migrations.AlterField(
+            model_name='transaction',
+            name='transaction_type',
+            field=models.IntegerField(choices=[(1, 'Deposit'), (2, 'Withdrawal'), (3, 'Transfer'), (4, 'Reconcile')]),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.1.15 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+def delete_parsed_statements(apps, schema_editor):
+    # their count is unknown, they are parsed again when they are used next
+    apps.get_model('silverstrike', 'ParsedStatements').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('silverstrike', '0020_transaction_type_choices'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='parsedstatements',
+            name='count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(delete_parsed_statements, migrations.RunPython.noop),
+    ]
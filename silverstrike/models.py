@@ -1,14 +1,154 @@
+import hashlib
+import json
 import uuid
+import zlib
 from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
 
 from dateutil.relativedelta import relativedelta
 
-from django.db import models
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import connections, models, transaction as db_transaction
+from django.db.models.functions import Coalesce
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.translation import ugettext as _
 
+from .caching import bump_ledger_version
+
+
+class Amount(Decimal):
+    """
+    A Decimal with exactly two decimal places, stored in the database as integer cents.
+    """
+    CENT = Decimal('0.01')
+
+    def __new__(cls, value=0):
+        if isinstance(value, float):
+            value = str(value)
+        return super().__new__(cls, Decimal(value).quantize(cls.CENT))
+
+    @classmethod
+    def from_cents(cls, cents):
+        if isinstance(cents, float):
+            cents = str(cents)
+        return cls(Decimal(cents).scaleb(-2))
+
+    @property
+    def cents(self):
+        return int(self.scaleb(2))
+
+
+class AmountField(models.BigIntegerField):
+    """
+    Stores an Amount as integer cents so that sums are exact and cheap.
+    Values are converted to Amount when they are loaded and to cents when they are saved.
+    """
+    description = _('Amount in cents')
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return Amount.from_cents(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, Amount):
+            return value
+        try:
+            return Amount(value)
+        except (InvalidOperation, TypeError, ValueError):
+            raise ValidationError(_('Enter a number.'), code='invalid')
+
+    def get_prep_value(self, value):
+        if value is None:
+            return value
+        return self.to_python(value).cents
+
+    def formfield(self, **kwargs):
+        defaults = {'form_class': forms.DecimalField, 'max_digits': 15, 'decimal_places': 2}
+        defaults.update(kwargs)
+        return models.Field.formfield(self, **defaults)
+
+
+class SplitCounterQuerySet(models.QuerySet):
+    """
+    Maintains split_count, first_split_date and last_split_date of the objects that
+    splits point to through split_field.
+    """
+    split_field = None
+
+    def count_splits(self, splits, sign=1):
+        """
+        Adds the splits to the counters, or removes them if sign is negative.
+        """
+        date_field = Split._meta.get_field('date')
+        stats = {}
+        for split in splits:
+            pk = getattr(split, self.split_field + '_id')
+            if pk is None:
+                continue
+            day = date_field.to_python(split.date)
+            count, first, last = stats.get(pk, (0, day, day))
+            stats[pk] = (count + 1, min(first, day), max(last, day))
+        if not stats:
+            return
+        with db_transaction.atomic():
+            for pk, (count, first, last) in stats.items():
+                if sign < 0:
+                    self.filter(pk=pk).update(split_count=models.F('split_count') - count)
+                    continue
+                self.filter(pk=pk).update(
+                    split_count=models.F('split_count') + count,
+                    first_split_date=models.Case(
+                        models.When(first_split_date__lte=first,
+                                    then=models.F('first_split_date')),
+                        default=models.Value(first), output_field=models.DateField()),
+                    last_split_date=models.Case(
+                        models.When(last_split_date__gte=last,
+                                    then=models.F('last_split_date')),
+                        default=models.Value(last), output_field=models.DateField()))
+            if sign < 0:
+                self.filter(pk__in=stats).update(**self._split_dates())
+
+    def rebuild_split_counters(self, pks=None):
+        """
+        Recomputes the counters from the splits, either for all objects or only for pks.
+        """
+        objects = self if pks is None else self.filter(pk__in=pks)
+        splits = Split.objects.filter(**{self.split_field: models.OuterRef('pk')}).order_by()
+        counts = splits.values(self.split_field).annotate(
+            count=models.Count('id')).values('count')
+        return objects.update(split_count=Coalesce(models.Subquery(counts), 0),
+                              **self._split_dates())
+
+    def _split_dates(self):
+        splits = Split.objects.filter(**{self.split_field: models.OuterRef('pk')})
+        return {
+            'first_split_date': models.Subquery(splits.order_by('date').values('date')[:1]),
+            'last_split_date': models.Subquery(splits.order_by('-date').values('date')[:1]),
+        }
+
+
+class SplitCounterMixin(object):
+    """
+    Keeps save() from writing back split counters that were loaded before splits changed
+    them. Only SplitCounterQuerySet writes the counters of existing objects.
+    """
+    SPLIT_COUNTER_FIELDS = ('split_count', 'first_split_date', 'last_split_date')
+
+    def save(self, force_insert=False, force_update=False, using=None, update_fields=None):
+        if update_fields is None and not force_insert and not self._state.adding:
+            update_fields = [field.name for field in self._meta.concrete_fields
+                             if not field.primary_key and
+                             field.name not in self.SPLIT_COUNTER_FIELDS]
+        super().save(force_insert=force_insert, force_update=force_update, using=using,
+                     update_fields=update_fields)
+
+
+class AccountQuerySet(SplitCounterQuerySet):
+    split_field = 'account'
 
-class AccountQuerySet(models.QuerySet):
     def personal(self):
         return self.filter(account_type=Account.PERSONAL)
 
@@ -24,8 +164,18 @@ class AccountQuerySet(models.QuerySet):
     def shown_on_dashboard(self):
         return self.filter(show_on_dashboard=True)
 
+    def with_balance(self, as_of=None):
+        """
+        Annotates the balance on as_of (default today) so that it is fetched in the same query.
+        """
+        snapshots = BalanceSnapshot.objects.filter(
+            account=models.OuterRef('pk'), date__lte=as_of or date.today()).order_by(
+            '-date').values('balance')[:1]
+        return self.annotate(balance=Coalesce(
+            models.Subquery(snapshots), 0, output_field=AmountField()))
+
 
-class Account(models.Model):
+class Account(SplitCounterMixin, models.Model):
     PERSONAL = 1
     FOREIGN = 2
     SYSTEM = 3
@@ -41,12 +191,18 @@ class Account(models.Model):
     last_modified = models.DateTimeField(auto_now=True)
     show_on_dashboard = models.BooleanField(default=False)
     iban = models.CharField(max_length=34, blank=True, null=True)
+    split_count = models.PositiveIntegerField(default=0, editable=False)
+    first_split_date = models.DateField(null=True, editable=False)
+    last_split_date = models.DateField(null=True, editable=False)
 
     objects = AccountQuerySet.as_manager()
 
     class Meta:
         ordering = ['-active', 'name']
         unique_together = (('name', 'account_type'),)
+        indexes = [
+            models.Index(fields=['account_type', 'active'], name='account_type_active'),
+        ]
 
     def __str__(self):
         return self.name
@@ -64,40 +220,31 @@ class Account(models.Model):
         """
         TODO do we really want the number of splits?
         """
-        return Split.objects.filter(account=self).count()
+        return self.split_count
 
     @property
     def balance(self):
-        return self.balance_on(date.today())
+        try:
+            return self._balance
+        except AttributeError:
+            return self.balance_on(date.today())
+
+    @balance.setter
+    def balance(self, value):
+        # set by AccountQuerySet.with_balance
+        self._balance = value
 
     def balance_on(self, date):
-        return Split.objects.filter(account=self, date__lte=date).aggregate(
-            models.Sum('amount'))['amount__sum'] or 0
+        return BalanceSnapshot.objects.filter(account=self, date__lte=date).values_list(
+            'balance', flat=True).first() or 0
 
     def get_absolute_url(self):
         return reverse('account_view', args=[self.pk])
 
     def get_data_points(self, dstart=date.today() - timedelta(days=365),
                         dend=date.today(), steps=30):
-        step = (dend - dstart) / steps
-        if step < timedelta(days=1):
-            step = timedelta(days=1)
-            steps = int((dend - dstart) / step)
-        data_points = []
-        balance = self.balance_on(dstart - timedelta(days=1))
-        transactions = list(Split.objects.prefetch_related('transaction').filter(
-            account_id=self.pk).date_range(dstart, dend).order_by(
-            '-transaction__date'))
-        for i in range(steps):
-            while len(transactions) > 0 and transactions[-1].transaction.date <= dstart:
-                t = transactions.pop()
-                balance += t.amount
-            data_points.append((dstart, balance))
-            dstart += step
-        for t in transactions:
-            balance += t.amount
-        data_points.append((dend, balance))
-        return data_points
+        dates, series = BalanceSnapshot.objects.series([self.pk], dstart, dend, steps)
+        return list(zip(dates, series[self.pk]))
 
     def set_initial_balance(self, amount):
         system = Account.objects.get(account_type=Account.SYSTEM)
@@ -110,8 +257,54 @@ class Account(models.Model):
 
 
 class TransactionQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Sets the primary keys of the created transactions on SQLite as well, so that
+        splits can be created for them.
+        """
+        connection = connections[self.db]
+        if connection.features.can_return_ids_from_bulk_insert:
+            return super().bulk_create(objs, *args, **kwargs)
+        objs = list(objs)
+        with_pk = [obj for obj in objs if obj.pk is not None]
+        without_pk = [obj for obj in objs if obj.pk is None]
+        # the backend only tells the id of a single inserted row, like save() does,
+        # but unlike save() this sends no signals
+        fields = [field for field in self.model._meta.concrete_fields
+                  if not isinstance(field, models.AutoField)]
+        with db_transaction.atomic(using=self.db):
+            if with_pk:
+                super().bulk_create(with_pk, *args, **kwargs)
+            for obj in without_pk:
+                obj.pk = self._insert([obj], fields=fields, return_id=True, using=self.db)
+                obj._state.adding = False
+                obj._state.db = self.db
+        return objs
+
+    def update(self, **kwargs):
+        kwargs.setdefault('last_modified', timezone.now())
+        return super().update(**kwargs)
+
     def last_10(self):
-        return self.order_by('-date')[:10]
+        return self.with_totals().order_by('-date')[:10]
+
+    def with_totals(self):
+        """
+        Annotates the amount and the number of splits so that Transaction.amount and
+        Transaction.is_split don't need extra queries.
+        """
+        personal = models.Q(splits__account__account_type=Account.PERSONAL)
+        # same as SplitQuerySet.transfers_once
+        transfers_once = personal & (
+            ~models.Q(splits__opposing_account__account_type=Account.PERSONAL) |
+            models.Q(splits__amount__lt=0))
+        return self.annotate(
+            split_count=models.Count('splits'),
+            amount=Coalesce(models.Case(
+                models.When(transaction_type=Transaction.TRANSFER, then=models.Func(
+                    models.Sum('splits__amount', filter=transfers_once), function='ABS')),
+                default=models.Sum('splits__amount', filter=personal),
+                output_field=AmountField()), 0))
 
 
 class Transaction(models.Model):
@@ -128,12 +321,16 @@ class Transaction(models.Model):
 
     class Meta:
         ordering = ['-date', 'title']
+        indexes = [
+            models.Index(fields=['date'], name='transaction_date'),
+            models.Index(fields=['recurrence', 'date'], name='transaction_recurrence_date'),
+        ]
 
     title = models.CharField(max_length=64)
     date = models.DateField(default=date.today)
     notes = models.TextField(blank=True, null=True)
     transaction_type = models.IntegerField(choices=TRANSACTION_TYPES)
-    last_modified = models.DateTimeField(auto_now=True)
+    last_modified = models.DateTimeField(auto_now=True, db_index=True)
     recurrence = models.ForeignKey('RecurringTransaction', models.SET_NULL,
                                    related_name='recurrences', blank=True, null=True)
 
@@ -145,6 +342,13 @@ class Transaction(models.Model):
     def get_absolute_url(self):
         return reverse('transaction_detail', args=[self.pk])
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if not adding:
+            self.splits.exclude(transaction_type=self.transaction_type).update(
+                transaction_type=self.transaction_type)
+
     def get_transaction_type_str(self):
         for i, name in self.TRANSACTION_TYPES:
             if i == self.transaction_type:
@@ -152,14 +356,25 @@ class Transaction(models.Model):
 
     @property
     def amount(self):
+        try:
+            return self._amount
+        except AttributeError:
+            pass
         if self.transaction_type == Transaction.TRANSFER:
             return abs(
                 self.splits.transfers_once().aggregate(models.Sum('amount'))['amount__sum'] or 0)
         else:
             return self.splits.personal().aggregate(models.Sum('amount'))['amount__sum'] or 0
 
+    @amount.setter
+    def amount(self, value):
+        # set by TransactionQuerySet.with_totals
+        self._amount = value
+
     @property
     def is_split(self):
+        if hasattr(self, 'split_count'):
+            return self.split_count > 2
         return len(self.splits.all()) > 2
 
     @property
@@ -212,52 +427,336 @@ class SplitQuerySet(models.QuerySet):
     def recurrence(self, recurrence_id):
         return self.filter(transaction__recurrence_id=recurrence_id)
 
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        Split.set_transaction_types(objs)
+        objs = super().bulk_create(objs, *args, **kwargs)
+        BalanceSnapshot.objects.add_splits(objs)
+        Account.objects.count_splits(objs)
+        Category.objects.count_splits(objs)
+        SearchDocument.objects.index({split.transaction_id for split in objs})
+        bump_ledger_version()
+        return objs
+
+    def update(self, **kwargs):
+        kwargs.setdefault('last_modified', timezone.now())
+        balances = BalanceSnapshot.TRACKED_FIELDS.intersection(kwargs)
+        counters = Split.COUNTED_FIELDS.intersection(kwargs)
+        searched = Split.SEARCHED_FIELDS.intersection(kwargs)
+        if not balances and not counters and not searched:
+            return super().update(**kwargs)
+        with db_transaction.atomic():
+            affected = list(self.values_list('account_id', 'category_id', 'transaction_id'))
+            accounts = {account for account, category, t in affected}
+            categories = {category for account, category, t in affected if category}
+            transactions = {t for account, category, t in affected}
+            rows = super().update(**kwargs)
+            account = kwargs.get('account_id', kwargs.get('account'))
+            if account is not None:
+                accounts.add(getattr(account, 'pk', account))
+            category = kwargs.get('category_id', kwargs.get('category'))
+            if category is not None:
+                categories.add(getattr(category, 'pk', category))
+            transaction = kwargs.get('transaction_id', kwargs.get('transaction'))
+            if transaction is not None:
+                transactions.add(getattr(transaction, 'pk', transaction))
+            if balances:
+                BalanceSnapshot.objects.rebuild(accounts)
+            if counters:
+                Account.objects.rebuild_split_counters(accounts)
+                Category.objects.rebuild_split_counters(categories)
+            if searched:
+                SearchDocument.objects.index(transactions)
+            bump_ledger_version()
+        return rows
+
 
 class Split(models.Model):
     account = models.ForeignKey(Account, models.CASCADE, related_name='incoming_transactions')
     opposing_account = models.ForeignKey(Account, models.CASCADE,
                                          related_name='outgoing_transactions')
     title = models.CharField(max_length=64)
-    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    amount = AmountField()
     date = models.DateField(default=date.today)
     category = models.ForeignKey('Category', models.SET_NULL, blank=True, null=True,
                                  related_name='splits')
     transaction = models.ForeignKey(Transaction, models.CASCADE, related_name='splits',
                                     blank=True, null=True)
-    last_modified = models.DateTimeField(auto_now=True)
+    # copy of transaction.transaction_type, kept in sync by save and Transaction.save
+    transaction_type = models.IntegerField(choices=Transaction.TRANSACTION_TYPES, null=True,
+                                           blank=True, editable=False, db_index=True)
+    last_modified = models.DateTimeField(auto_now=True, db_index=True)
+    # set on imported splits to recognize lines that are imported again
+    import_fingerprint = models.CharField(max_length=40, blank=True, null=True,
+                                          editable=False, db_index=True)
 
     objects = SplitQuerySet.as_manager()
 
+    # fields that the split counters of Account and Category depend on
+    COUNTED_FIELDS = {'account', 'account_id', 'category', 'category_id', 'date'}
+    # fields that the search documents of transactions depend on
+    SEARCHED_FIELDS = {'title', 'transaction', 'transaction_id'}
+
     class Meta:
         ordering = ['-date', 'title']
+        # amount is included so that sums over an account or a date range are
+        # answered from the index alone
+        indexes = [
+            models.Index(fields=['account', 'date', 'amount'], name='split_account_date'),
+            models.Index(fields=['date', 'account', 'amount'], name='split_date_account'),
+            models.Index(fields=['opposing_account', 'date'], name='split_opposing_date'),
+            models.Index(fields=['category', 'date', 'amount'], name='split_category_date'),
+            models.Index(fields=['transaction_type', 'date'], name='split_type_date'),
+            # keyset pagination
+            models.Index(fields=['date', 'id'], name='split_date_id'),
+            models.Index(fields=['account', 'date', 'id'], name='split_account_date_id'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        Split.set_transaction_types([self])
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def set_transaction_types(splits):
+        """
+        Copies the type of their transaction to the given splits with a single query at most.
+        """
+        missing = []
+        for split in splits:
+            if not split.transaction_id:
+                split.transaction_type = None
+            elif Split.transaction.is_cached(split):
+                split.transaction_type = split.transaction.transaction_type
+            else:
+                missing.append(split)
+        if missing:
+            types = dict(Transaction.objects.filter(
+                pk__in={split.transaction_id for split in missing}).values_list(
+                'id', 'transaction_type'))
+            for split in missing:
+                split.transaction_type = types.get(split.transaction_id)
+
     @property
     def is_transfer(self):
-        return self.transaction.transaction_type == Transaction.TRANSFER
+        return self.transaction_type == Transaction.TRANSFER
 
     @property
     def is_withdraw(self):
-        return self.transaction.transaction_type == Transaction.WITHDRAW
+        return self.transaction_type == Transaction.WITHDRAW
 
     @property
     def is_deposit(self):
-        return self.transaction.transaction_type == Transaction.DEPOSIT
+        return self.transaction_type == Transaction.DEPOSIT
 
     @property
     def is_system(self):
-        return self.transaction.transaction_type == Transaction.SYSTEM
+        return self.transaction_type == Transaction.SYSTEM
 
     def get_absolute_url(self):
-        return self.transaction.get_absolute_url()
+        return reverse('transaction_detail', args=[self.transaction_id])
+
+
+class BalanceSnapshotManager(models.Manager):
+    # above this many touched (account, day) pairs, rebuilding is cheaper than shifting
+    REBUILD_THRESHOLD = 50
+    # accounts, bucket ends and dates bound per query, well below the 999 variables
+    # SQLite allows
+    CHUNK_SIZE = 200
+
+    def shift(self, account_id, day, amount, create=True):
+        """
+        Adds amount to the balance of the account on day and every day after it.
+        If create is set, a snapshot for day is inserted if the account has none yet.
+        """
+        amount = Amount(amount)
+        if not amount:
+            return
+        day = Split._meta.get_field('date').to_python(day)
+        with db_transaction.atomic():
+            snapshots = self.filter(account_id=account_id)
+            if create and not snapshots.filter(date=day).exists():
+                previous = snapshots.filter(date__lt=day).values_list(
+                    'balance', flat=True).first()
+                self.create(account_id=account_id, date=day, balance=previous or 0)
+            snapshots.filter(date__gte=day).update(balance=models.F('balance') + amount.cents)
+
+    def add_splits(self, splits):
+        deltas = {}
+        to_date = Split._meta.get_field('date').to_python
+        for split in splits:
+            key = (split.account_id, to_date(split.date))
+            deltas[key] = deltas.get(key, 0) + Amount(split.amount)
+        if len(deltas) > self.REBUILD_THRESHOLD:
+            self.rebuild({account_id for account_id, day in deltas})
+            return
+        for (account_id, day), amount in deltas.items():
+            self.shift(account_id, day, amount)
+
+    def series(self, accounts, dstart, dend, steps=30):
+        """
+        Samples the balances of the given account ids at steps points between dstart and dend.
+        Returns the sample dates and a dict mapping each account id to its list of balances.
+        """
+        return self.series_for_ranges(accounts, [(dstart, dend)], steps)[0]
+
+    def series_for_ranges(self, accounts, ranges, steps=30):
+        """
+        Like series, for several (dstart, dend) ranges at once. The snapshots of the widest
+        range are read once and shared by all ranges.
+        Returns a list with the sample dates and balances of each range.
+        """
+        from .lib import sample_dates
+        accounts = list(accounts)
+        ranges = [sample_dates(dstart, dend, steps) for dstart, dend in ranges]
+        first = min(dates[0] for dates in ranges)
+        last = max(dates[-1] for dates in ranges)
+        balances = dict(Account.objects.filter(pk__in=accounts).with_balance(
+            first - timedelta(days=1)).values_list('id', 'balance'))
+        snapshots = list(self.filter(
+            account_id__in=accounts, date__gte=first, date__lte=last).order_by(
+            'date').values_list('account_id', 'date', 'balance'))
+        samples = {}
+        index = 0
+        for day in sorted(set(day for dates in ranges for day in dates)):
+            while index < len(snapshots) and snapshots[index][1] <= day:
+                account_id = snapshots[index][0]
+                balances[account_id] = snapshots[index][2]
+                index += 1
+            samples[day] = [balances.get(account_id, 0) for account_id in accounts]
+        result = []
+        for dates in ranges:
+            series = {account_id: [samples[day][i] for day in dates]
+                      for i, account_id in enumerate(accounts)}
+            result.append((dates, series))
+        return result
+
+    def buckets(self, accounts, dstart, dend, buckets):
+        """
+        Splits the range from dstart to dend into buckets and returns the last day of each
+        bucket and a dict mapping each account id to a dict with the lowest, highest and
+        closing balance in each bucket. Lowest and highest balances are computed by the
+        database.
+        """
+        from .lib import bucket_ends
+        ends = bucket_ends(dstart, dend, buckets)
+        accounts = list(accounts)
+        rows = {}
+        closes = {}
+        balances = {}
+        for start in range(0, len(accounts), self.CHUNK_SIZE):
+            chunk = accounts[start:start + self.CHUNK_SIZE]
+            chunk_rows = self._bucket_rows(chunk, dstart, ends)
+            rows.update(((row['account_id'], row['bucket']), row) for row in chunk_rows)
+            days = sorted({row['last'] for row in chunk_rows})
+            for day_start in range(0, len(days), self.CHUNK_SIZE):
+                snapshots = self.filter(
+                    account_id__in=chunk, date__in=days[day_start:day_start + self.CHUNK_SIZE])
+                closes.update(((account_id, day), balance) for account_id, day, balance in
+                              snapshots.values_list('account_id', 'date', 'balance'))
+            balances.update(Account.objects.filter(pk__in=chunk).with_balance(
+                dstart - timedelta(days=1)).values_list('id', 'balance'))
+
+        series = {}
+        for account_id in accounts:
+            close = balances.get(account_id, 0)
+            series[account_id] = {'low': [], 'high': [], 'close': []}
+            for i in range(len(ends)):
+                # the balance of the previous bucket lasts until the first change
+                low = high = close
+                row = rows.get((account_id, i))
+                if row:
+                    low = min(low, row['low'])
+                    high = max(high, row['high'])
+                    close = closes[(account_id, row['last'])]
+                series[account_id]['low'].append(low)
+                series[account_id]['high'].append(high)
+                series[account_id]['close'].append(close)
+        return ends, series
+
+    def _bucket_rows(self, accounts, dstart, ends):
+        """
+        Returns the lowest and highest balance and the last date of each account in each
+        bucket, a range of ends, CHUNK_SIZE buckets per query.
+        """
+        rows = []
+        for start in range(0, len(ends), self.CHUNK_SIZE):
+            chunk = ends[start:start + self.CHUNK_SIZE]
+            first = ends[start - 1] + timedelta(days=1) if start else dstart
+            bucket = models.Case(
+                *[models.When(date__lte=end, then=models.Value(start + i))
+                  for i, end in enumerate(chunk)],
+                output_field=models.IntegerField())
+            rows.extend(self.filter(
+                account_id__in=accounts, date__gte=first, date__lte=chunk[-1]).annotate(
+                bucket=bucket).order_by().values('account_id', 'bucket').annotate(
+                low=models.Min('balance'), high=models.Max('balance'),
+                last=models.Max('date')))
+        return rows
+
+    def rebuild(self, accounts=None):
+        """
+        Recreates the snapshots of the given account ids (or of all accounts) from their splits.
+        Returns the number of snapshots written.
+        """
+        snapshots = self.all()
+        splits = Split.objects.order_by('account_id', 'date')
+        if accounts is not None:
+            snapshots = snapshots.filter(account_id__in=accounts)
+            splits = splits.filter(account_id__in=accounts)
+        with db_transaction.atomic():
+            snapshots.delete()
+            objs = []
+            account_id = None
+            for row in splits.values('account_id', 'date').annotate(
+                    total=models.Sum('amount')).iterator():
+                if row['account_id'] != account_id:
+                    account_id = row['account_id']
+                    balance = 0
+                balance += row['total']
+                objs.append(BalanceSnapshot(account_id=account_id, date=row['date'],
+                                            balance=balance))
+            self.bulk_create(objs, batch_size=500)
+        return len(objs)
+
+
+class BalanceSnapshot(models.Model):
+    """
+    Balance of an account at the end of a day on which it had splits.
+    The balance on any other day is the one of the latest snapshot before it.
+    """
+    # Split fields that affect snapshots
+    TRACKED_FIELDS = {'account', 'account_id', 'amount', 'date'}
+
+    account = models.ForeignKey(Account, models.CASCADE, related_name='balance_snapshots')
+    date = models.DateField()
+    balance = AmountField(default=0)
 
+    objects = BalanceSnapshotManager()
 
-class Category(models.Model):
+    class Meta:
+        ordering = ['-date']
+        unique_together = (('account', 'date'),)
+
+    def __str__(self):
+        return '{} {}'.format(self.account_id, self.date)
+
+
+class CategoryQuerySet(SplitCounterQuerySet):
+    split_field = 'category'
+
+
+class Category(SplitCounterMixin, models.Model):
     name = models.CharField(max_length=64)
     active = models.BooleanField(default=True)
     last_modified = models.DateTimeField(auto_now=True)
+    split_count = models.PositiveIntegerField(default=0, editable=False)
+    first_split_date = models.DateField(null=True, editable=False)
+    last_split_date = models.DateField(null=True, editable=False)
+
+    objects = CategoryQuerySet.as_manager()
 
     class Meta:
         verbose_name_plural = 'categories'
@@ -270,7 +769,7 @@ class Category(models.Model):
     def money_spent(self):
         return abs(Split.objects.filter(
                 category=self, account__account_type=Account.PERSONAL,
-                transaction__transaction_type=Transaction.WITHDRAW).aggregate(
+                transaction_type=Transaction.WITHDRAW).aggregate(
             models.Sum('amount'))['amount__sum'] or 0)
 
     def get_absolute_url(self):
@@ -285,7 +784,7 @@ class BudgetQuerySet(models.QuerySet):
 class Budget(models.Model):
     category = models.ForeignKey(Category, models.CASCADE)
     month = models.DateField()
-    amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    amount = AmountField(default=0)
     last_modified = models.DateTimeField(auto_now=True)
 
     objects = BudgetQuerySet.as_manager()
@@ -295,6 +794,80 @@ class ImportFile(models.Model):
     uuid = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     file = models.FileField(upload_to='imports')
 
+    def get_content_hash(self):
+        sha = hashlib.sha256()
+        with self.file.open('rb') as f:
+            for chunk in f.chunks():
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    def get_statements(self, importer):
+        """
+        Returns the ParsedStatements of the lines importer reads from the file.
+
+        The file is only parsed the first time, the statements are stored with it and
+        loaded from there until the content of the file changes.
+        """
+        from .importers import IMPORTERS
+        content_hash = self.get_content_hash()
+        parsed = self.parsed_statements.defer('statements').filter(
+            importer=importer, content_hash=content_hash).first()
+        if parsed is not None:
+            return parsed
+        compressor = zlib.compressobj()
+        blocks = []
+        count = 0
+        for statement in IMPORTERS[importer].iter_transactions(self.file.path):
+            blocks.append(compressor.compress(
+                (json.dumps(statement.to_row()) + '\n').encode('utf-8')))
+            count += 1
+        blocks.append(compressor.flush())
+        parsed, created = ParsedStatements.objects.update_or_create(
+            import_file=self, importer=importer, defaults={
+                'content_hash': content_hash,
+                'statements': b''.join(blocks),
+                'count': count})
+        return parsed
+
+
+class ParsedStatements(models.Model):
+    """
+    The compressed statements parsed from an ImportFile by one of the importers,
+    one JSON list per line.
+
+    Iterating decompresses the statements a block at a time, so only the compressed
+    ones are held in memory. The length is stored, it does not need to decompress them.
+    """
+    # compressed bytes decompressed at a time
+    BLOCK_SIZE = 64 * 1024
+
+    import_file = models.ForeignKey(ImportFile, models.CASCADE, related_name='parsed_statements')
+    importer = models.PositiveSmallIntegerField()
+    content_hash = models.CharField(max_length=64)
+    statements = models.BinaryField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = (('import_file', 'importer'),)
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        from .importers.import_statement import ImportStatement
+        statements = self.statements
+        decompressor = zlib.decompressobj()
+        rest = b''
+        for start in range(0, len(statements), self.BLOCK_SIZE):
+            lines = (rest + decompressor.decompress(
+                statements[start:start + self.BLOCK_SIZE])).split(b'\n')
+            rest = lines.pop()
+            for line in lines:
+                yield ImportStatement.from_row(json.loads(line.decode('utf-8')))
+        rest += decompressor.flush()
+        if rest:
+            yield ImportStatement.from_row(json.loads(rest.decode('utf-8')))
+
 
 class RecurringTransactionManager(models.Manager):
     def due_in_month(self, month=None):
@@ -343,7 +916,7 @@ class RecurringTransaction(models.Model):
     objects = RecurringTransactionManager()
 
     title = models.CharField(max_length=64)
-    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    amount = AmountField()
     usual_month_day = models.PositiveIntegerField(default=0)
     date = models.DateField()
     src = models.ForeignKey(Account, models.CASCADE)
@@ -441,7 +1014,7 @@ class RecurringTransaction(models.Model):
     @property
     def average_amount(self):
         return Split.objects.personal().recurrence(self.id).aggregate(
-            models.Avg('amount'))['amount__avg']
+            models.Avg('amount', output_field=AmountField()))['amount__avg']
 
     @classmethod
     def outstanding_transaction_sum(cls):
@@ -458,3 +1031,215 @@ class RecurringTransaction(models.Model):
                     outstanding += t.amount
                 t.update_date()
         return outstanding
+
+
+class TombstoneManager(models.Manager):
+    def prune(self):
+        """
+        Deletes the tombstones older than Tombstone.RETENTION and returns their number.
+        """
+        deleted, rows = self.filter(
+            last_modified__lt=timezone.now() - Tombstone.RETENTION).delete()
+        return deleted
+
+
+class Tombstone(models.Model):
+    """
+    Records deleted objects so that readers that only look at last_modified notice deletes.
+    """
+    # how long tombstones are kept, readers that look less often miss deletes
+    RETENTION = timedelta(days=90)
+
+    objects = TombstoneManager()
+
+    model = models.CharField(max_length=64)
+    object_id = models.PositiveIntegerField()
+    last_modified = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['model', 'last_modified'], name='tombstone_model_modified'),
+        ]
+
+    def __str__(self):
+        return '{} {}'.format(self.model, self.object_id)
+
+
+class JobManager(models.Manager):
+    def enqueue(self, kind, **arguments):
+        return self.create(kind=kind, arguments=json.dumps(arguments))
+
+    def claim(self):
+        """
+        Marks the oldest queued job as running and returns it, or None if no job is queued.
+        Several workers may claim at the same time, each job is claimed by only one.
+        """
+        queued = self.filter(state=Job.QUEUED).order_by('created', 'pk')
+        for pk in queued.values_list('pk', flat=True)[:10]:
+            now = timezone.now()
+            if self.filter(pk=pk, state=Job.QUEUED).update(
+                    state=Job.RUNNING, started=now, heartbeat=now,
+                    attempts=models.F('attempts') + 1):
+                return self.get(pk=pk)
+        return None
+
+    def stale(self):
+        """
+        Running jobs whose worker stopped, told by them not reporting progress for
+        Job.STALE_AFTER.
+        """
+        return self.filter(state=Job.RUNNING, heartbeat__lt=timezone.now() - Job.STALE_AFTER)
+
+    def recover(self):
+        """
+        Queues the stale jobs again, or fails them if they were started MAX_ATTEMPTS times
+        already. Returns the number of queued and of failed jobs.
+        """
+        stale = self.stale()
+        failed = stale.filter(attempts__gte=Job.MAX_ATTEMPTS).update(
+            state=Job.FAILED, error=_('The worker running this job stopped.'),
+            finished=timezone.now())
+        queued = stale.update(state=Job.QUEUED, started=None, heartbeat=None)
+        return queued, failed
+
+
+class Job(models.Model):
+    """
+    Work that is done by the runworker command instead of during a request.
+    """
+    QUEUED = 1
+    RUNNING = 2
+    DONE = 3
+    FAILED = 4
+    STATES = (
+        (QUEUED, _('Queued')),
+        (RUNNING, _('Running')),
+        (DONE, _('Done')),
+        (FAILED, _('Failed')),
+    )
+
+    kind = models.CharField(max_length=32)
+    # JSON encoded keyword arguments of the job's handler
+    arguments = models.TextField()
+    state = models.IntegerField(choices=STATES, default=QUEUED)
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True)
+    error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(null=True)
+    finished = models.DateTimeField(null=True)
+    # last time the running job reported progress
+    heartbeat = models.DateTimeField(null=True)
+    attempts = models.PositiveIntegerField(default=0)
+
+    objects = JobManager()
+
+    # running jobs that report no progress for this long are taken to have stopped
+    STALE_AFTER = timedelta(minutes=10)
+    # jobs whose worker stopped are started again until they were started this often
+    MAX_ATTEMPTS = 3
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['state', 'created'], name='job_state_created'),
+        ]
+
+    def __str__(self):
+        return '{} {}'.format(self.kind, self.pk)
+
+    def get_absolute_url(self):
+        return reverse('job_detail', args=[self.pk])
+
+    def set_progress(self, progress, total=None):
+        """
+        Stores the progress right away so that it can be polled while the job runs.
+        """
+        self.progress = progress
+        if total is not None:
+            self.total = total
+        self.heartbeat = timezone.now()
+        Job.objects.filter(pk=self.pk).update(
+            progress=self.progress, total=self.total, heartbeat=self.heartbeat)
+
+    @property
+    def is_stale(self):
+        return (self.state == Job.RUNNING and self.heartbeat is not None and
+                self.heartbeat < timezone.now() - Job.STALE_AFTER)
+
+    def finish(self, error=''):
+        self.state = Job.FAILED if error else Job.DONE
+        self.error = error
+        self.finished = timezone.now()
+        Job.objects.filter(pk=self.pk).update(
+            state=self.state, error=self.error, finished=self.finished)
+
+    def as_dict(self):
+        return {
+            'id': self.pk,
+            'kind': self.kind,
+            'state': self.get_state_display(),
+            'done': self.state in (Job.DONE, Job.FAILED),
+            'stale': self.is_stale,
+            'progress': self.progress,
+            'total': self.total,
+            'error': self.error,
+        }
+
+
+class SearchDocumentManager(models.Manager):
+    # stay below the SQLite limit of query parameters
+    CHUNK_SIZE = 500
+
+    def index(self, transaction_ids, create=True):
+        """
+        Rebuilds the search documents of the given transactions.
+        If create is not set, only documents that already exist are updated.
+        """
+        transaction_ids = list(set(transaction_ids))
+        for i in range(0, len(transaction_ids), self.CHUNK_SIZE):
+            self._index(transaction_ids[i:i + self.CHUNK_SIZE], create)
+
+    def _index(self, transaction_ids, create):
+        split_titles = {}
+        splits = Split.objects.filter(transaction_id__in=transaction_ids).order_by('pk')
+        for transaction_id, title in splits.values_list('transaction_id', 'title'):
+            titles = split_titles.setdefault(transaction_id, [])
+            if title not in titles:
+                titles.append(title)
+        documents = []
+        for t in Transaction.objects.filter(pk__in=transaction_ids).values(
+                'id', 'title', 'notes', 'date'):
+            parts = [t['title'], t['notes'], t['date'].isoformat()]
+            parts += [title for title in split_titles.get(t['id'], []) if title != t['title']]
+            documents.append(SearchDocument(transaction_id=t['id'],
+                                            text='\n'.join(p for p in parts if p)))
+        with db_transaction.atomic():
+            if create:
+                self.filter(pk__in=transaction_ids).delete()
+                self.bulk_create(documents)
+            else:
+                for document in documents:
+                    self.filter(pk=document.pk).update(text=document.text)
+
+    def rebuild(self):
+        with db_transaction.atomic():
+            self.all().delete()
+            self.index(Transaction.objects.values_list('pk', flat=True))
+        return self.count()
+
+
+class SearchDocument(models.Model):
+    """
+    The searchable text of a transaction: its title, notes, date and split titles.
+
+    The full-text index over it (FTS5 on SQLite, a tsvector index on PostgreSQL)
+    is maintained by the database, see silverstrike.search.
+    """
+    transaction = models.OneToOneField(Transaction, models.CASCADE, primary_key=True,
+                                       related_name='search_document')
+    text = models.TextField()
+
+    objects = SearchDocumentManager()
+
+    def __str__(self):
+        return str(self.transaction_id)
@@ -0,0 +1,103 @@
+"""
+Keyset pagination on (date, id).
+
+Pages are addressed by the date and id of the row they follow (after) or precede (before)
+instead of by a page number. The database seeks to the page with an index instead of
+counting and skipping all rows in front of it, so deep pages are as fast as the first one.
+"""
+from datetime import datetime
+
+from django.db.models import Q
+from django.http import Http404
+from django.utils.translation import ugettext as _
+
+
+def encode_cursor(obj):
+    return '{}_{}'.format(obj.date.isoformat(), obj.pk)
+
+
+def decode_cursor(cursor):
+    """
+    Returns the date and id encoded in cursor. Raises ValueError if it is invalid.
+    """
+    day, pk = cursor.split('_')
+    return datetime.strptime(day, '%Y-%m-%d').date(), int(pk)
+
+
+class KeysetPage(object):
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def next_cursor(self):
+        if self.has_next and self.object_list:
+            return encode_cursor(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous and self.object_list:
+            return encode_cursor(self.object_list[0])
+
+
+def paginate(queryset, per_page, after=None, before=None):
+    """
+    Returns the page of queryset, newest first, that follows the cursor after or precedes
+    the cursor before. Raises ValueError for invalid cursors.
+    """
+    if before:
+        day, pk = decode_cursor(before)
+        rows = list(queryset.filter(Q(date__gt=day) | Q(date=day, pk__gt=pk)).order_by(
+            'date', 'pk')[:per_page + 1])
+        return KeysetPage(rows[:per_page][::-1], True, len(rows) > per_page)
+    if after:
+        day, pk = decode_cursor(after)
+        queryset = queryset.filter(Q(date__lt=day) | Q(date=day, pk__lt=pk))
+    rows = list(queryset.order_by('-date', '-pk')[:per_page + 1])
+    return KeysetPage(rows[:per_page], len(rows) > per_page, bool(after))
+
+
+class KeysetPaginationMixin(object):
+    """
+    Replaces the page number pagination of ListView with keyset pagination.
+
+    The context gets next_url and previous_url, and the exact number of rows as total
+    unless the request opts out with ?count=0.
+    """
+
+    def paginate_queryset(self, queryset, page_size):
+        try:
+            page = paginate(queryset, page_size, self.request.GET.get('after'),
+                            self.request.GET.get('before'))
+        except ValueError:
+            raise Http404(_('Invalid page'))
+        return None, page, page.object_list, page.has_next or page.has_previous
+
+    def get_total_count(self, queryset):
+        return queryset.count()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page = context['page_obj']
+        if page is not None:
+            context['next_url'] = self._page_url('after', page.next_cursor)
+            context['previous_url'] = self._page_url('before', page.previous_cursor)
+        if self.request.GET.get('count') != '0':
+            context['total'] = self.get_total_count(self.object_list)
+        return context
+
+    def _page_url(self, key, cursor):
+        if not cursor:
+            return None
+        query = self.request.GET.copy()
+        query.pop('after', None)
+        query.pop('before', None)
+        query[key] = cursor
+        return '{}?{}'.format(self.request.path, query.urlencode())
@@ -0,0 +1,49 @@
+from collections import OrderedDict
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from silverstrike.pagination import paginate
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination on (date, id) with the after and before cursors of
+    silverstrike.pagination. The exact count is omitted with ?count=0.
+    Pages have PAGE_SIZE rows, or default_page_size if the setting is not set.
+    """
+    default_page_size = 10
+
+    def get_page_size(self):
+        return api_settings.PAGE_SIZE or self.default_page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size()
+        self.count = None
+        if request.query_params.get('count') != '0':
+            self.count = queryset.count()
+        try:
+            self.page = paginate(queryset, self.page_size, request.query_params.get('after'),
+                                 request.query_params.get('before'))
+        except ValueError:
+            raise NotFound('Invalid cursor')
+        return self.page.object_list
+
+    def get_link(self, key, cursor):
+        if not cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(remove_query_param(url, 'after'), 'before')
+        return replace_query_param(url, key, cursor)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_link('after', self.page.next_cursor)),
+            ('previous', self.get_link('before', self.page.previous_cursor)),
+            ('results', data),
+        ]))
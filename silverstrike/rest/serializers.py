@@ -6,9 +6,12 @@ from silverstrike.models import Account, Category, RecurringTransaction, Split,
 class AccountSerializer(serializers.ModelSerializer):
     class Meta:
         model = Account
-        fields = ('id', 'name', 'account_type', 'active', 'show_on_dashboard', 'last_modified')
+        fields = ('id', 'name', 'account_type', 'active', 'show_on_dashboard', 'balance',
+                  'last_modified')
         read_only_fields = ('last_modified',)
 
+    balance = serializers.DecimalField(max_digits=15, decimal_places=2, read_only=True)
+
     def validate_account_type(self, value):
         if value == Account.SYSTEM:
             raise serializers.ValidationError("You can't create system accounts")
@@ -36,14 +39,16 @@ class SplitSerializer(serializers.ModelSerializer):
 
     # needed so that the id is transfered for update actions
     id = serializers.IntegerField(required=False)
+    amount = serializers.DecimalField(max_digits=15, decimal_places=2)
 
 
 class TransactionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Transaction
-        fields = ('id', 'title', 'date', 'transaction_type', 'splits', 'last_modified')
+        fields = ('id', 'title', 'date', 'transaction_type', 'amount', 'splits', 'last_modified')
         read_only_fields = ('last_modified',)
 
+    amount = serializers.DecimalField(max_digits=15, decimal_places=2, read_only=True)
     splits = SplitSerializer(many=True)
 
     def validate(self, data):
@@ -79,6 +84,9 @@ class TransactionSerializer(serializers.ModelSerializer):
             split_object.amount = split.get('amount', split_object.amount)
             split_object.category = split.get('category', split_object.category)
             split_object.save()
+        # the totals annotated by with_totals are stale now
+        for attribute in ('_amount', 'split_count'):
+            instance.__dict__.pop(attribute, None)
         return instance
 
 
@@ -95,3 +103,14 @@ class RecurringTransactionSerializer(serializers.ModelSerializer):
         fields = ('id', 'title', 'src', 'dst', 'amount', 'date',
                   'recurrence', 'category', 'transaction_type', 'last_modified')
         read_only_fields = ('last_modified',)
+
+    amount = serializers.DecimalField(max_digits=15, decimal_places=2)
+
+
+class SearchResultSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Transaction
+        fields = ('id', 'title', 'date', 'transaction_type', 'amount', 'notes', 'rank')
+
+    amount = serializers.DecimalField(max_digits=15, decimal_places=2, read_only=True)
+    rank = serializers.FloatField(read_only=True)
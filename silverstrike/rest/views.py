@@ -1,54 +1,92 @@
+from collections import OrderedDict
+
+from django.utils.decorators import method_decorator
+
 from rest_framework import views, viewsets
 from rest_framework.decorators import detail_route
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
+from silverstrike.changes import get_changes, parse_since
+from silverstrike.conditional import conditional
 from silverstrike.models import Account, Category, RecurringTransaction, Split, Transaction
 from silverstrike.rest import serializers
+from silverstrike.rest.pagination import KeysetPagination
 from silverstrike.rest.permissions import ProtectSystemAccount
 from silverstrike.rest.serializers import (AccountSerializer, CategorySerializer,
                                            RecurringTransactionSerializer,
-                                           SplitSerializer, TransactionSerializer)
+                                           SearchResultSerializer, SplitSerializer,
+                                           TransactionSerializer)
+from silverstrike.search import search
+
+
+class ConditionalViewSetMixin(object):
+    """
+    Answers conditional list and retrieve requests with 304 Not Modified if none of the
+    conditional_models changed.
+    """
+    conditional_models = ()
 
+    def list(self, request, *args, **kwargs):
+        return conditional(*self.conditional_models)(super().list)(request, *args, **kwargs)
 
-class AccountViewSet(viewsets.ModelViewSet):
+    def retrieve(self, request, *args, **kwargs):
+        return conditional(*self.conditional_models)(super().retrieve)(
+            request, *args, **kwargs)
+
+
+class AccountViewSet(ConditionalViewSetMixin, viewsets.ModelViewSet):
     queryset = Account.objects.all()
     serializer_class = AccountSerializer
     permission_classes = (ProtectSystemAccount,)
+    conditional_models = (Account, Split)
+
+    def get_queryset(self):
+        return super().get_queryset().with_balance()
 
     @detail_route()
+    @method_decorator(conditional(Account, Split))
     def transactions(self, request, pk=None):
         account = self.get_object()
         transactions = Split.objects.filter(account=account)
-        page = self.paginate_queryset(transactions)
-        if page is not None:
-            serializer = SplitSerializer(page, many=True, context={'request': request})
-            return Response(serializer.data)
-        serializer = SplitSerializer(transactions, many=True, context={'request': request})
-        return Response(serializer.data)
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(transactions, request, view=self)
+        serializer = SplitSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
 
 
-class TransactionViewSet(viewsets.ModelViewSet):
+class TransactionViewSet(ConditionalViewSetMixin, viewsets.ModelViewSet):
     queryset = Transaction.objects.all()
     serializer_class = TransactionSerializer
+    conditional_models = (Transaction, Split)
+
+    def get_queryset(self):
+        return super().get_queryset().with_totals().prefetch_related('splits')
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(ConditionalViewSetMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     pagination_class = None
+    conditional_models = (Category,)
 
 
-class RecurringTransactionsViewset(viewsets.ModelViewSet):
+class RecurringTransactionsViewset(ConditionalViewSetMixin, viewsets.ModelViewSet):
     queryset = RecurringTransaction.objects.all()
     serializer_class = RecurringTransactionSerializer
+    conditional_models = (RecurringTransaction,)
 
 
+@method_decorator(conditional(Account), name='get')
 class AccountNameView(views.APIView):
     def get(self, request, format=None):
         serializer = serializers.AccountNameSerializer(Account.objects.all(), many=True)
         return Response(serializer.data)
 
 
+@method_decorator(conditional(RecurringTransaction), name='get')
 class RecurrenceNameView(views.APIView):
     def get(self, request, format=None):
         serializer = serializers.RecurrenceNameSerializer(
@@ -56,15 +94,58 @@ class RecurrenceNameView(views.APIView):
         return Response(serializer.data)
 
 
+@method_decorator(conditional(Account, Split), name='get')
 class PersonalAccountsView(views.APIView):
     def get(self, request, format=None):
         serializer = serializers.AccountSerializer(
-            Account.objects.filter(account_type=Account.PERSONAL), many=True)
+            Account.objects.personal().with_balance(), many=True)
         return Response(serializer.data)
 
 
+@method_decorator(conditional(Account, Split), name='get')
 class ForeignAccountsView(views.APIView):
     def get(self, request, format=None):
         serializer = serializers.AccountSerializer(
-            Account.objects.filter(account_type=Account.FOREIGN), many=True)
+            Account.objects.foreign().with_balance(), many=True)
         return Response(serializer.data)
+
+
+@method_decorator(conditional(Transaction, Split), name='get')
+class TransactionSearchView(views.APIView):
+    """
+    Transactions matching ?q=, best match first, paged with ?page=.
+    """
+    def get(self, request, format=None):
+        paginator = PageNumberPagination()
+        page = paginator.paginate_queryset(search(request.GET.get('q', '')), request, view=self)
+        serializer = SearchResultSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
+
+
+class ChangesView(views.APIView):
+    """
+    Changes of transactions and splits, oldest first, after the cursor ?after= or since
+    the ISO 8601 date or time ?since=. cursor continues after the last change and is
+    returned even if there are no more changes, so consumers can poll with it later.
+    Changes show up once they are older than changes.SETTLE_TIME. Whether they have
+    settled does not show in the last change of the models, so the feed is not
+    conditional.
+    """
+    def get(self, request, format=None):
+        after = request.query_params.get('after')
+        since = request.query_params.get('since')
+        try:
+            if since and not after:
+                after = parse_since(since)
+            page = get_changes(after)
+        except ValueError:
+            raise ParseError('Invalid cursor or date')
+        url = None
+        if page.has_next:
+            url = remove_query_param(request.build_absolute_uri(), 'since')
+            url = replace_query_param(url, 'after', page.cursor)
+        return Response(OrderedDict([
+            ('cursor', page.cursor),
+            ('next', url),
+            ('results', page.changes),
+        ]))
@@ -0,0 +1,114 @@
+"""
+Full-text search over transactions.
+
+Every transaction has a SearchDocument with its title, notes, date and split titles.
+On SQLite the documents are indexed by an FTS5 table that triggers keep in sync, on
+PostgreSQL by a GIN index over their tsvector. Other databases, and SQLite builds
+without FTS5, fall back to scanning the documents.
+
+Every word of a query has to match the start of a word of the document, so
+"plumb 2019" finds the payment to the plumber on 2019-05-14.
+"""
+import re
+
+from django.db import connection
+
+from silverstrike.models import SearchDocument, Transaction
+
+FTS_TABLE = 'silverstrike_search'
+
+SQLITE_COUNT = 'SELECT COUNT(*) FROM silverstrike_search WHERE silverstrike_search MATCH %s'
+SQLITE_SEARCH = """
+    SELECT rowid, -rank FROM silverstrike_search
+    WHERE silverstrike_search MATCH %s
+    ORDER BY rank, rowid DESC LIMIT %s OFFSET %s"""
+
+POSTGRESQL_COUNT = """
+    SELECT COUNT(*) FROM silverstrike_searchdocument
+    WHERE to_tsvector('simple', text) @@ to_tsquery('simple', %s)"""
+POSTGRESQL_SEARCH = """
+    SELECT transaction_id, ts_rank(to_tsvector('simple', text), query) AS rank
+    FROM silverstrike_searchdocument, to_tsquery('simple', %s) query
+    WHERE to_tsvector('simple', text) @@ query
+    ORDER BY rank DESC, transaction_id DESC LIMIT %s OFFSET %s"""
+
+
+def get_terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def _backend():
+    if connection.vendor == 'postgresql':
+        return 'postgresql'
+    if connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names():
+        return 'sqlite'
+    return None
+
+
+class SearchResults(object):
+    """
+    The transactions matching query, best match first.
+
+    Supports count() and slicing so it can be passed to the paginators of Django
+    and the REST framework. Sliced transactions are annotated with their totals and
+    get a rank attribute, which is None if there is no full-text index.
+    """
+
+    def __init__(self, query):
+        self.terms = get_terms(query)
+        self.backend = _backend()
+
+    def _match(self):
+        if self.backend == 'sqlite':
+            # quoted so that words like AND or NEAR are not taken as operators
+            return ' '.join('"{}"*'.format(term) for term in self.terms)
+        return ' & '.join('{}:*'.format(term) for term in self.terms)
+
+    def _documents(self):
+        documents = SearchDocument.objects.all()
+        for term in self.terms:
+            documents = documents.filter(text__icontains=term)
+        return documents.order_by('-pk')
+
+    def count(self):
+        if not self.terms:
+            return 0
+        if self.backend is None:
+            return self._documents().count()
+        with connection.cursor() as cursor:
+            cursor.execute(SQLITE_COUNT if self.backend == 'sqlite' else POSTGRESQL_COUNT,
+                           [self._match()])
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.step:
+            raise TypeError('SearchResults only support slicing')
+        start = key.start or 0
+        if not self.terms or (key.stop is not None and key.stop <= start):
+            return []
+        if self.backend is None:
+            documents = self._documents()[start:key.stop]
+            ranks = [(pk, None) for pk in documents.values_list('pk', flat=True)]
+        else:
+            # -1 means no limit for SQLite, NULL for PostgreSQL
+            limit = key.stop - start if key.stop is not None else (
+                -1 if self.backend == 'sqlite' else None)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    SQLITE_SEARCH if self.backend == 'sqlite' else POSTGRESQL_SEARCH,
+                    [self._match(), limit, start])
+                ranks = cursor.fetchall()
+        transactions = Transaction.objects.with_totals().in_bulk([pk for pk, rank in ranks])
+        results = []
+        for pk, rank in ranks:
+            if pk in transactions:
+                transactions[pk].rank = rank
+                results.append(transactions[pk])
+        return results
+
+
+def search(query):
+    return SearchResults(query)
@@ -0,0 +1,93 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from silverstrike.caching import bump_ledger_version
+from silverstrike.models import (Account, Amount, BalanceSnapshot, Budget, Category,
+                                 RecurringTransaction, SearchDocument, Split, Tombstone,
+                                 Transaction)
+
+
+@receiver(pre_save, sender=Split)
+def remember_previous_split(sender, instance, raw, **kwargs):
+    instance._previous = None
+    if instance.pk and not raw:
+        previous = Split.objects.filter(pk=instance.pk).values(
+            'account_id', 'category_id', 'transaction_id', 'date', 'amount').first()
+        if previous:
+            instance._previous = Split(**previous)
+
+
+@receiver(post_save, sender=Split)
+def update_balance_snapshots(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous', None)
+    if previous:
+        if (previous.account_id == instance.account_id and
+                previous.amount == Amount(instance.amount) and
+                previous.date == sender._meta.get_field('date').to_python(instance.date)):
+            return
+        BalanceSnapshot.objects.shift(previous.account_id, previous.date, -previous.amount,
+                                      create=False)
+    BalanceSnapshot.objects.shift(instance.account_id, instance.date, instance.amount)
+
+
+@receiver(post_save, sender=Split)
+def update_split_counters(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous', None)
+    if previous:
+        if (previous.account_id == instance.account_id and
+                previous.category_id == instance.category_id and
+                previous.date == sender._meta.get_field('date').to_python(instance.date)):
+            return
+        Account.objects.count_splits([previous], sign=-1)
+        Category.objects.count_splits([previous], sign=-1)
+    Account.objects.count_splits([instance])
+    Category.objects.count_splits([instance])
+
+
+@receiver(post_delete, sender=Split)
+def remove_from_balance_snapshots(sender, instance, **kwargs):
+    BalanceSnapshot.objects.shift(instance.account_id, instance.date, -instance.amount,
+                                  create=False)
+
+
+@receiver(post_delete, sender=Split)
+def remove_from_split_counters(sender, instance, **kwargs):
+    Account.objects.count_splits([instance], sign=-1)
+    Category.objects.count_splits([instance], sign=-1)
+
+
+def add_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(model=sender._meta.label_lower, object_id=instance.pk)
+
+
+for model in (Account, Budget, Category, RecurringTransaction, Split, Transaction):
+    post_save.connect(bump_ledger_version, sender=model)
+    post_delete.connect(bump_ledger_version, sender=model)
+    post_delete.connect(add_tombstone, sender=model)
+
+
+@receiver(post_save, sender=Transaction)
+def index_transaction(sender, instance, raw, **kwargs):
+    if not raw:
+        SearchDocument.objects.index([instance.pk])
+
+
+@receiver(post_save, sender=Split)
+def index_split(sender, instance, raw, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous', None)
+    transactions = {instance.transaction_id}
+    if previous:
+        transactions.add(previous.transaction_id)
+    SearchDocument.objects.index(transactions)
+
+
+@receiver(post_delete, sender=Split)
+def remove_from_search(sender, instance, **kwargs):
+    # the transaction may be deleted along with the split, don't bring its document back
+    SearchDocument.objects.index([instance.transaction_id], create=False)
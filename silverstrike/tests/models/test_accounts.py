@@ -1,3 +1,5 @@
+from datetime import date, timedelta
+
 from django.contrib.auth.models import User
 from django.test import TestCase
 
@@ -29,6 +31,20 @@ class AccountQuerysetTests(TestCase):
         queryset = Account.objects.active()
         self.assertEquals(queryset.count(), 2)
 
+    def test_with_balance_queryset(self):
+        self.personal.set_initial_balance(50)
+        with self.assertNumQueries(1):
+            accounts = {a.name: a.balance for a in Account.objects.with_balance()}
+        self.assertEqual(accounts['Personal'], 50)
+        self.assertEqual(accounts['foreign'], 0)
+        self.assertEqual(accounts['System Account'], -50)
+
+    def test_with_balance_as_of(self):
+        self.personal.set_initial_balance(50)
+        yesterday = date.today() - timedelta(days=1)
+        account = Account.objects.with_balance(as_of=yesterday).get(pk=self.personal.pk)
+        self.assertEqual(account.balance, 0)
+
     def test_inactive_queryset(self):
         queryset = Account.objects.inactive()
         self.assertEquals(queryset.count(), 0)
@@ -61,6 +77,7 @@ class AccountModelTests(TestCase):
         account = Account.objects.create(name='foo')
         self.assertEqual(account.transaction_num, 0)
         account.set_initial_balance(50)
+        account.refresh_from_db()
         self.assertEqual(account.transaction_num, 1)
 
     def test_set_initial_balance(self):
@@ -0,0 +1,106 @@
+from datetime import date, timedelta
+
+from django.test import TestCase
+
+from silverstrike.models import Account, BalanceSnapshot, Split, Transaction
+from silverstrike.tests import create_transaction
+
+
+class BalanceSnapshotTests(TestCase):
+    def setUp(self):
+        self.personal = Account.objects.create(name='personal')
+        self.savings = Account.objects.create(name='savings')
+        self.foreign = Account.objects.create(name='foreign', account_type=Account.FOREIGN)
+        create_transaction('deposit', self.foreign, self.personal, 100,
+                           Transaction.DEPOSIT, date(2017, 1, 1))
+        create_transaction('withdraw', self.personal, self.foreign, 30,
+                           Transaction.WITHDRAW, date(2017, 3, 1))
+
+    def assertSnapshotsMatchRebuild(self):
+        dates = set(BalanceSnapshot.objects.values_list('date', flat=True))
+        accounts = Account.objects.all()
+        current = [a.balance_on(d) for a in accounts for d in dates]
+        BalanceSnapshot.objects.rebuild()
+        self.assertEqual(current, [a.balance_on(d) for a in accounts for d in dates])
+
+    def test_balance_on(self):
+        self.assertEqual(self.personal.balance_on(date(2016, 12, 31)), 0)
+        self.assertEqual(self.personal.balance_on(date(2017, 1, 1)), 100)
+        self.assertEqual(self.personal.balance_on(date(2017, 2, 1)), 100)
+        self.assertEqual(self.personal.balance_on(date(2017, 3, 1)), 70)
+        self.assertEqual(self.foreign.balance_on(date(2017, 3, 1)), -70)
+
+    def test_backdated_split(self):
+        create_transaction('backdated', self.personal, self.foreign, 10,
+                           Transaction.WITHDRAW, date(2016, 6, 1))
+        self.assertEqual(self.personal.balance_on(date(2016, 6, 1)), -10)
+        self.assertEqual(self.personal.balance_on(date(2017, 1, 1)), 90)
+        self.assertEqual(self.personal.balance_on(date(2017, 3, 1)), 60)
+        self.assertSnapshotsMatchRebuild()
+
+    def test_update_split(self):
+        split = Split.objects.get(account=self.personal, amount=-30)
+        split.amount = -50
+        split.date = date(2016, 12, 1)
+        split.save()
+        self.assertEqual(self.personal.balance_on(date(2016, 12, 1)), -50)
+        self.assertEqual(self.personal.balance_on(date(2017, 3, 1)), 50)
+        split.account = self.savings
+        split.save()
+        self.assertEqual(self.personal.balance_on(date(2017, 3, 1)), 100)
+        self.assertEqual(self.savings.balance_on(date(2017, 3, 1)), -50)
+        self.assertSnapshotsMatchRebuild()
+
+    def test_delete_transaction(self):
+        Transaction.objects.get(title='deposit').delete()
+        self.assertEqual(self.personal.balance_on(date(2017, 3, 1)), -30)
+        self.assertEqual(self.foreign.balance_on(date(2017, 3, 1)), 30)
+        self.assertSnapshotsMatchRebuild()
+
+    def test_queryset_update(self):
+        Split.objects.filter(account=self.foreign).update(account=self.savings)
+        self.assertEqual(self.foreign.balance_on(date(2017, 3, 1)), 0)
+        self.assertEqual(self.savings.balance_on(date(2017, 3, 1)), -70)
+
+    def test_delete_account(self):
+        self.foreign.delete()
+        self.assertEqual(self.personal.balance_on(date(2017, 3, 1)), 0)
+        self.assertFalse(BalanceSnapshot.objects.filter(account_id=self.foreign.id).exists())
+
+    def test_get_data_points(self):
+        points = self.personal.get_data_points(date(2016, 12, 1), date(2017, 3, 31), steps=4)
+        self.assertEqual(points[0], (date(2016, 12, 1), 0))
+        self.assertEqual(points[-1], (date(2017, 3, 31), 70))
+        self.assertEqual([b for d, b in points], [0, 0, 100, 70, 70])
+
+    def test_buckets(self):
+        ends, series = BalanceSnapshot.objects.buckets(
+            [self.personal.pk, self.savings.pk], date(2016, 12, 1), date(2017, 3, 31), 4)
+        self.assertEqual(ends, [date(2016, 12, 30), date(2017, 1, 29),
+                                date(2017, 2, 28), date(2017, 3, 31)])
+        self.assertEqual(series[self.personal.pk], {
+            'low': [0, 0, 100, 70], 'high': [0, 100, 100, 100], 'close': [0, 100, 100, 70]})
+        self.assertEqual(series[self.savings.pk]['close'], [0, 0, 0, 0])
+
+    def test_many_buckets_and_accounts(self):
+        accounts = [Account(name='account {}'.format(i)) for i in range(400)]
+        Account.objects.bulk_create(accounts)
+        accounts = list(Account.objects.filter(
+            name__startswith='account ').values_list('pk', flat=True))
+        day = date(2017, 1, 1)
+        for i in range(50):
+            create_transaction('deposit', self.foreign, self.savings, 1,
+                               Transaction.DEPOSIT, day + timedelta(days=i * 5))
+        # three chunks of accounts with three chunks of buckets and the opening balances
+        # each, and the closing balances of the chunk with splits
+        with self.assertNumQueries(13):
+            ends, series = BalanceSnapshot.objects.buckets(
+                accounts + [self.savings.pk], date(2016, 12, 1), date(2018, 12, 31), 500)
+        self.assertEqual(len(ends), 500)
+        self.assertEqual(len(series), 401)
+        savings = series[self.savings.pk]
+        self.assertEqual(savings['close'][0], 0)
+        self.assertEqual(savings['close'][-1], 50)
+        self.assertEqual(savings['close'], sorted(savings['close']))
+        self.assertEqual(savings['high'], savings['close'])
+        self.assertEqual(series[accounts[-1]]['close'], [0] * 500)
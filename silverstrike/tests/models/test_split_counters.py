@@ -0,0 +1,78 @@
+from datetime import date
+
+from django.test import TestCase
+
+from silverstrike.models import Account, Category, Split, Transaction
+from silverstrike.tests import create_transaction
+
+
+class SplitCounterTests(TestCase):
+    def setUp(self):
+        self.personal = Account.objects.create(name='personal')
+        self.savings = Account.objects.create(name='savings')
+        self.foreign = Account.objects.create(name='foreign', account_type=Account.FOREIGN)
+        self.category = Category.objects.create(name='groceries')
+        create_transaction('deposit', self.foreign, self.personal, 100,
+                           Transaction.DEPOSIT, date(2017, 1, 1))
+        create_transaction('withdraw', self.personal, self.foreign, 30,
+                           Transaction.WITHDRAW, date(2017, 3, 1), category=self.category)
+
+    def assertCounters(self, obj, count, first, last):
+        obj.refresh_from_db()
+        self.assertEqual((obj.split_count, obj.first_split_date, obj.last_split_date),
+                         (count, first, last))
+
+    def assertCountersMatchRebuild(self):
+        for model in (Account, Category):
+            current = list(model.objects.values_list(
+                'id', 'split_count', 'first_split_date', 'last_split_date'))
+            model.objects.rebuild_split_counters()
+            self.assertEqual(current, list(model.objects.values_list(
+                'id', 'split_count', 'first_split_date', 'last_split_date')))
+
+    def test_bulk_create(self):
+        self.assertCounters(self.personal, 2, date(2017, 1, 1), date(2017, 3, 1))
+        self.assertCounters(self.foreign, 2, date(2017, 1, 1), date(2017, 3, 1))
+        self.assertCounters(self.category, 2, date(2017, 3, 1), date(2017, 3, 1))
+        self.assertCounters(self.savings, 0, None, None)
+
+    def test_saving_stale_objects_keeps_counters(self):
+        account = Account.objects.get(pk=self.personal.pk)
+        category = Category.objects.get(pk=self.category.pk)
+        create_transaction('withdraw', self.personal, self.foreign, 10,
+                           Transaction.WITHDRAW, date(2017, 4, 1), category=self.category)
+        account.name = 'checking'
+        account.save()
+        category.name = 'food'
+        category.save()
+        self.assertCounters(account, 3, date(2017, 1, 1), date(2017, 4, 1))
+        self.assertEqual(account.name, 'checking')
+        self.assertCounters(category, 4, date(2017, 3, 1), date(2017, 4, 1))
+        self.assertEqual(category.name, 'food')
+
+    def test_save(self):
+        split = Split.objects.get(account=self.personal, amount=-30)
+        split.date = date(2016, 12, 1)
+        split.category = None
+        split.save()
+        self.assertCounters(self.personal, 2, date(2016, 12, 1), date(2017, 1, 1))
+        self.assertCounters(self.category, 1, date(2017, 3, 1), date(2017, 3, 1))
+        split.account = self.savings
+        split.save()
+        self.assertCounters(self.personal, 1, date(2017, 1, 1), date(2017, 1, 1))
+        self.assertCounters(self.savings, 1, date(2016, 12, 1), date(2016, 12, 1))
+        self.assertCountersMatchRebuild()
+
+    def test_delete_transaction(self):
+        Transaction.objects.get(title='withdraw').delete()
+        self.assertCounters(self.personal, 1, date(2017, 1, 1), date(2017, 1, 1))
+        self.assertCounters(self.category, 0, None, None)
+        self.assertCountersMatchRebuild()
+
+    def test_queryset_update(self):
+        Split.objects.filter(account=self.foreign).update(account=self.savings)
+        self.assertCounters(self.foreign, 0, None, None)
+        self.assertCounters(self.savings, 2, date(2017, 1, 1), date(2017, 3, 1))
+        Split.objects.filter(account=self.personal).update(category=self.category)
+        self.assertCounters(self.category, 3, date(2017, 1, 1), date(2017, 3, 1))
+        self.assertCountersMatchRebuild()
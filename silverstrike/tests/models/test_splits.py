@@ -1,9 +1,11 @@
 from datetime import date
 
+from django.db import connection, models
 from django.test import TestCase
 from django.urls import reverse
 
-from silverstrike.models import Account, Category, RecurringTransaction, Split, Transaction
+from silverstrike.models import (Account, Amount, Category, RecurringTransaction, Split,
+                                 Transaction)
 from silverstrike.tests import create_transaction
 
 
@@ -111,3 +113,55 @@ class SplitModelTests(TestCase):
         split = Split.objects.first()
         self.assertEqual(split.get_absolute_url(), reverse('transaction_detail',
                                                            args=[split.transaction.id]))
+
+    def test_amount_is_stored_in_cents(self):
+        transaction = create_transaction('meh', self.foreign, self.personal,
+                                         12.34, Transaction.DEPOSIT)
+        split = transaction.splits.get(account=self.personal)
+        self.assertIsInstance(split.amount, Amount)
+        self.assertEqual(split.amount, Amount('12.34'))
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT amount FROM silverstrike_split WHERE id = %s', [split.id])
+            self.assertEqual(cursor.fetchone()[0], 1234)
+
+    def test_amount_sum_is_exact(self):
+        for i in range(10):
+            create_transaction('meh', self.foreign, self.personal, 0.1, Transaction.DEPOSIT)
+        total = Split.objects.filter(account=self.personal).aggregate(
+            models.Sum('amount'))['amount__sum']
+        self.assertIsInstance(total, Amount)
+        self.assertEqual(str(total), '1.00')
+
+    def test_transaction_type_is_copied(self):
+        transaction = create_transaction('meh', self.foreign, self.personal,
+                                         100, Transaction.DEPOSIT)
+        self.assertEqual(
+            set(Split.objects.values_list('transaction_type', flat=True)), {Transaction.DEPOSIT})
+        split = Split.objects.create(title='meh', account=self.personal, amount=1,
+                                     opposing_account=self.foreign,
+                                     transaction_id=transaction.id)
+        self.assertEqual(split.transaction_type, Transaction.DEPOSIT)
+        self.assertTrue(split.is_deposit)
+
+    def test_transaction_type_follows_transaction(self):
+        transaction = create_transaction('meh', self.personal, self.foreign,
+                                         100, Transaction.WITHDRAW)
+        transaction.transaction_type = Transaction.TRANSFER
+        transaction.save()
+        self.assertEqual(Split.objects.filter(transaction_type=Transaction.TRANSFER).count(), 2)
+        split = Split.objects.first()
+        with self.assertNumQueries(0):
+            self.assertTrue(split.is_transfer)
+            self.assertFalse(split.is_withdraw)
+
+
+class AmountTests(TestCase):
+    def test_rounds_to_cents(self):
+        self.assertEqual(str(Amount('1.005')), '1.00')
+        self.assertEqual(str(Amount(0.1)), '0.10')
+        self.assertEqual(str(Amount(3)), '3.00')
+
+    def test_cents(self):
+        self.assertEqual(Amount('-12.34').cents, -1234)
+        self.assertEqual(Amount.from_cents(-1234), Amount('-12.34'))
+        self.assertEqual(Amount.from_cents(1234.5), Amount('12.34'))
@@ -1,9 +1,12 @@
+import json
 from datetime import date
+from decimal import Decimal
 
+from django.contrib.auth.models import User
 from django.test import TestCase
 from django.urls import reverse
 
-from silverstrike.models import Account, Transaction
+from silverstrike.models import Account, Split, Transaction
 from silverstrike.tests import create_transaction
 
 
@@ -12,6 +15,22 @@ class TransactionQuerySetTests(TestCase):
         self.personal = Account.objects.create(name='personal')
         self.foreign = Account.objects.create(name='foreign', account_type=Account.FOREIGN)
 
+    def test_bulk_create_sets_primary_keys(self):
+        create_transaction('meh', self.foreign, self.personal, 50, Transaction.DEPOSIT)
+        transactions = Transaction.objects.bulk_create([
+            Transaction(title=str(i), transaction_type=Transaction.DEPOSIT) for i in range(5)])
+        for t in transactions:
+            self.assertEqual(Transaction.objects.get(pk=t.pk).title, t.title)
+
+    def test_bulk_create_with_some_primary_keys(self):
+        transactions = Transaction.objects.bulk_create([
+            Transaction(title='new', transaction_type=Transaction.DEPOSIT),
+            Transaction(pk=5000, title='explicit', transaction_type=Transaction.DEPOSIT)])
+        self.assertEqual(transactions[1].pk, 5000)
+        self.assertNotEqual(transactions[0].pk, 5000)
+        for t in transactions:
+            self.assertEqual(Transaction.objects.get(pk=t.pk).title, t.title)
+
     def test_last_10_returns_at_most_10(self):
         for i in range(1, 32):
             create_transaction('meh', self.foreign, self.personal, 50, Transaction.DEPOSIT,
@@ -27,6 +46,48 @@ class TransactionQuerySetTests(TestCase):
                            date=date(2018, 1, 1))
         self.assertEqual(Transaction.objects.last_10().count(), 1)
 
+    def test_with_totals(self):
+        savings = Account.objects.create(name='savings')
+        create_transaction('withdraw', self.personal, self.foreign, 30, Transaction.WITHDRAW)
+        create_transaction('deposit', self.foreign, self.personal, 50, Transaction.DEPOSIT)
+        create_transaction('transfer', self.personal, savings, 20, Transaction.TRANSFER)
+        self.personal.set_initial_balance(10)
+        with self.assertNumQueries(1):
+            transactions = list(Transaction.objects.with_totals())
+            totals = {t.title: (t.amount, t.is_split) for t in transactions}
+        self.assertEqual(totals['withdraw'], (-30, False))
+        self.assertEqual(totals['deposit'], (50, False))
+        self.assertEqual(totals['transfer'], (20, False))
+        self.assertEqual(totals['Initial Balance'], (10, False))
+        for t in transactions:
+            self.assertEqual(t.amount, Transaction.objects.get(pk=t.pk).amount)
+
+    def test_with_totals_split_count(self):
+        transaction = create_transaction('meh', self.foreign, self.personal, 50,
+                                         Transaction.DEPOSIT)
+        Split.objects.create(transaction=transaction, account=self.personal,
+                             opposing_account=self.foreign, amount=10, title='meh')
+        Split.objects.create(transaction=transaction, account=self.foreign,
+                             opposing_account=self.personal, amount=-10, title='meh')
+        transaction = Transaction.objects.with_totals().get(pk=transaction.pk)
+        self.assertEqual(transaction.split_count, 4)
+        self.assertTrue(transaction.is_split)
+        self.assertEqual(transaction.amount, 60)
+
+    def test_rest_update_returns_new_amount(self):
+        User.objects.create_superuser(username='admin', email='email@example.com', password='pass')
+        self.client.login(username='admin', password='pass')
+        transaction = create_transaction('meh', self.foreign, self.personal, 50,
+                                         Transaction.DEPOSIT)
+        url = '/rest/transactions/{}/'.format(transaction.pk)
+        data = json.loads(self.client.get(url).content.decode('utf-8'))
+        for split in data['splits']:
+            split['amount'] = '-70.00' if Decimal(split['amount']) < 0 else '70.00'
+        response = self.client.put(url, json.dumps(data), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Decimal(json.loads(response.content.decode('utf-8'))['amount']), 70)
+        self.assertEqual(Transaction.objects.get(pk=transaction.pk).amount, 70)
+
 
 class TransactionModelTests(TestCase):
     def setUp(self):
@@ -0,0 +1,82 @@
+import json
+from datetime import date
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from silverstrike import analytics
+from silverstrike.models import Account, BalanceSnapshot, Transaction
+from silverstrike.tests import create_transaction
+
+
+@skipUnless(analytics.numpy, 'numpy is not installed')
+class AnalyticsTests(TestCase):
+    def setUp(self):
+        User.objects.create_superuser(username='admin', email='email@example.com', password='pass')
+        self.client.login(username='admin', password='pass')
+        self.personal = Account.objects.create(name='personal')
+        self.savings = Account.objects.create(name='savings')
+        self.foreign = Account.objects.create(name='foreign', account_type=Account.FOREIGN)
+        create_transaction('old', self.foreign, self.personal, 10, Transaction.DEPOSIT,
+                           date(2016, 5, 1))
+        for month in range(1, 13):
+            create_transaction('deposit', self.foreign, self.personal, 1000.5,
+                               Transaction.DEPOSIT, date(2017, month, 1))
+            create_transaction('withdraw', self.personal, self.foreign, 333.33,
+                               Transaction.WITHDRAW, date(2017, month, 15))
+            create_transaction('transfer', self.personal, self.savings, 100,
+                               Transaction.TRANSFER, date(2017, month, 20))
+
+    def get(self, name, *args, **params):
+        response = self.client.get(reverse(name, args=args), params)
+        return json.loads(response.content.decode('utf-8'), parse_float=Decimal,
+                          object_hook=self._parse_amounts)
+
+    def _parse_amounts(self, obj):
+        if 'data' in obj:
+            obj['data'] = [Decimal(x) for x in obj['data']]
+        return obj
+
+    def assertSameAsFallback(self, name, *args, **params):
+        result = self.get(name, *args, **params)
+        with mock.patch('silverstrike.analytics.numpy', None):
+            self.assertEqual(result, self.get(name, *args, **params))
+
+    def test_balances(self):
+        self.assertSameAsFallback('api_balance', '2017-01-01', '2017-12-31')
+        self.assertSameAsFallback('api_balance', '2017-03-01', '2017-03-31')
+        self.assertSameAsFallback('api_balance', '2018-01-01', '2018-02-01')
+
+    def test_accounts_balance(self):
+        self.assertSameAsFallback('api_accounts_balance', '2017-01-01', '2017-12-31')
+        self.assertSameAsFallback('api_accounts_balance', '2017-02-10', '2017-02-20')
+
+    def test_account_balance(self):
+        self.assertSameAsFallback('api_account_balance', self.savings.id,
+                                  '2017-01-01', '2017-12-31')
+
+    def test_chart_data(self):
+        ranges = '2017-01-01:2017-12-31,2017-03-01:2017-03-31,2018-01-01:2018-02-01'
+        from_splits = mock.Mock(wraps=analytics.LedgerColumns.from_splits)
+        from_snapshots = mock.Mock(wraps=analytics.LedgerColumns.from_snapshots)
+        with mock.patch.object(analytics.LedgerColumns, 'from_splits', from_splits), \
+                mock.patch.object(analytics.LedgerColumns, 'from_snapshots', from_snapshots):
+            self.get('api_charts', ranges=ranges)
+        self.assertEqual(from_splits.call_count, 1)
+        self.assertEqual(from_snapshots.call_count, 1)
+        self.assertSameAsFallback('api_charts', ranges=ranges)
+
+    def test_running_total(self):
+        columns = analytics.LedgerColumns.from_splits(self.personal.incoming_transactions.all())
+        dates = [date(2016, 1, 1), date(2017, 1, 1), date(2017, 1, 15)]
+        self.assertEqual(columns.running_total(dates, 5),
+                         [5, Decimal('1015.5'), Decimal('682.17')])
+
+    def test_balance_series(self):
+        accounts = [self.personal.id, self.savings.id]
+        self.assertEqual(
+            analytics.balance_series(accounts, date(2017, 1, 1), date(2017, 6, 30)),
+            BalanceSnapshot.objects.series(accounts, date(2017, 1, 1), date(2017, 6, 30)))
@@ -1,10 +1,12 @@
 import json
+from datetime import date
 
 from django.contrib.auth.models import User
 from django.test import TestCase
 from django.urls import reverse
 
-from silverstrike.models import Account
+from silverstrike.models import Account, Category, Transaction
+from silverstrike.tests import create_transaction
 
 
 class ApiTests(TestCase):
@@ -22,3 +24,126 @@ class ApiTests(TestCase):
             queryset = Account.objects.filter(account_type=t[0])
             queryset = queryset.exclude(account_type=Account.SYSTEM)
             self.assertEqual(data, list(queryset.values_list('name', flat=True)))
+
+    def test_get_accounts_balance(self):
+        personal = Account.objects.get(account_type=Account.PERSONAL)
+        foreign = Account.objects.get(account_type=Account.FOREIGN)
+        savings = Account.objects.create(name='savings')
+        create_transaction('deposit', foreign, personal, 100, Transaction.DEPOSIT,
+                           date(2017, 1, 10))
+        create_transaction('transfer', personal, savings, 40, Transaction.TRANSFER,
+                           date(2017, 1, 20))
+        with self.assertNumQueries(8):
+            response = self.client.get(
+                reverse('api_accounts_balance', args=['2017-01-01', '2017-01-31']))
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(len(data['labels']), 31)
+        self.assertEqual(data['labels'][0], '01 Jan 2017')
+        dataset = {d['name']: d['data'] for d in data['dataset']}
+        self.assertEqual(float(dataset[personal.name][8]), 0)
+        self.assertEqual(float(dataset[personal.name][9]), 100)
+        self.assertEqual(float(dataset[personal.name][-1]), 60)
+        self.assertEqual(float(dataset['savings'][-1]), 40)
+
+    def test_downsampled_account_balance(self):
+        personal = Account.objects.get(account_type=Account.PERSONAL)
+        foreign = Account.objects.get(account_type=Account.FOREIGN)
+        create_transaction('deposit', foreign, personal, 100, Transaction.DEPOSIT,
+                           date(2017, 1, 10))
+        create_transaction('withdraw', personal, foreign, 80, Transaction.WITHDRAW,
+                           date(2017, 1, 11))
+        create_transaction('deposit', foreign, personal, 50, Transaction.DEPOSIT,
+                           date(2017, 1, 25))
+        response = self.client.get(
+            reverse('api_account_balance', args=[personal.pk, '2017-01-01', '2017-01-31']),
+            {'points': 3})
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data['labels'], ['2017-01-10', '2017-01-20', '2017-01-31'])
+        self.assertEqual([float(x) for x in data['low']], [0, 20, 20])
+        self.assertEqual([float(x) for x in data['high']], [100, 100, 70])
+        self.assertEqual([float(x) for x in data['data']], [100, 20, 70])
+
+    def test_downsampled_accounts_balance(self):
+        personal = Account.objects.get(account_type=Account.PERSONAL)
+        foreign = Account.objects.get(account_type=Account.FOREIGN)
+        create_transaction('deposit', foreign, personal, 100, Transaction.DEPOSIT,
+                           date(2017, 1, 10))
+        response = self.client.get(
+            reverse('api_accounts_balance', args=['2017-01-01', '2017-12-31']),
+            {'points': 12})
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(len(data['labels']), 12)
+        self.assertEqual([float(x) for x in data['dataset'][0]['data'][:2]], [100, 100])
+
+    def test_downsampled_balances(self):
+        personal = Account.objects.get(account_type=Account.PERSONAL)
+        foreign = Account.objects.get(account_type=Account.FOREIGN)
+        for day in range(1, 29):
+            create_transaction('deposit', foreign, personal, day, Transaction.DEPOSIT,
+                               date(2017, 2, day))
+        create_transaction('withdraw', personal, foreign, 400, Transaction.WITHDRAW,
+                           date(2017, 2, 15))
+        url = reverse('api_balance', args=['2017-01-01', '2017-03-31'])
+        data = json.loads(self.client.get(url, {'points': 10}).content.decode('utf-8'))
+        self.assertEqual(len(data['data']), 10)
+        self.assertEqual(data['labels'][0], '2017-01-01')
+        self.assertEqual(data['labels'][-1], '2017-03-31')
+        self.assertEqual(float(data['data'][-1]), 6)
+        self.assertIn('2017-02-15', data['labels'])
+
+    def test_fewer_than_three_points(self):
+        personal = Account.objects.get(account_type=Account.PERSONAL)
+        foreign = Account.objects.get(account_type=Account.FOREIGN)
+        for day in range(1, 29):
+            create_transaction('deposit', foreign, personal, day, Transaction.DEPOSIT,
+                               date(2017, 2, day))
+        url = reverse('api_balance', args=['2017-01-01', '2017-03-31'])
+        data = json.loads(self.client.get(url, {'points': 2}).content.decode('utf-8'))
+        self.assertEqual(data['labels'], ['2017-01-01', '2017-03-31'])
+        data = json.loads(self.client.get(url, {'points': 1}).content.decode('utf-8'))
+        self.assertEqual(data['labels'], ['2017-03-31'])
+        self.assertEqual(float(data['data'][0]), 406)
+
+    def test_invalid_points(self):
+        response = self.client.get(
+            reverse('api_balance', args=['2017-01-01', '2017-03-31']), {'points': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_chart_data_matches_single_endpoints(self):
+        personal = Account.objects.get(account_type=Account.PERSONAL)
+        foreign = Account.objects.get(account_type=Account.FOREIGN)
+        savings = Account.objects.create(name='savings')
+        category = Category.objects.create(name='food')
+        create_transaction('deposit', foreign, personal, 1000, Transaction.DEPOSIT,
+                           date(2016, 12, 1))
+        for month in range(1, 13):
+            create_transaction('food', personal, foreign, 10 * month, Transaction.WITHDRAW,
+                               date(2017, month, 5), category)
+            create_transaction('other', personal, foreign, 5, Transaction.WITHDRAW,
+                               date(2017, month, 20))
+        create_transaction('transfer', personal, savings, 40, Transaction.TRANSFER,
+                           date(2017, 3, 1))
+        ranges = [('2017-01-01', '2017-01-31'), ('2017-02-15', '2017-05-15'),
+                  ('2017-01-01', '2017-12-31')]
+        response = self.client.get(reverse('api_charts'), {
+            'ranges': ','.join('{}:{}'.format(*r) for r in ranges)})
+        data = json.loads(response.content.decode('utf-8'))['ranges']
+        self.assertEqual(len(data), 3)
+        for r, result in zip(ranges, data):
+            for name, url in (('accounts_balance', 'api_accounts_balance'),
+                              ('balance', 'api_balance'),
+                              ('category_spending', 'category_spending')):
+                expected = json.loads(self.client.get(reverse(url, args=r)).content.decode(
+                    'utf-8'))
+                self.assertEqual(result[name], expected)
+
+    def test_chart_data_series(self):
+        response = self.client.get(reverse('api_charts'), {
+            'ranges': '2017-01-01:2017-01-31', 'series': 'balance'})
+        data = json.loads(response.content.decode('utf-8'))['ranges'][0]
+        self.assertEqual(set(data), {'dstart', 'dend', 'balance'})
+        response = self.client.get(reverse('api_charts'), {'ranges': '2017-01-01'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('api_charts'), {
+            'ranges': '2017-01-01:2017-01-31', 'series': 'foo'})
+        self.assertEqual(response.status_code, 400)
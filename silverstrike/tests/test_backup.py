@@ -0,0 +1,92 @@
+import gzip
+import os
+import shutil
+import tempfile
+from datetime import date
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from silverstrike.backup import MODELS, restore_snapshot, write_snapshot
+from silverstrike.models import (Account, BalanceSnapshot, Budget, Category,
+                                 RecurringTransaction, Split, Transaction)
+from silverstrike.search import search
+from silverstrike.tests import create_transaction
+
+
+class BackupTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'ledger.jsonl.gz')
+        self.personal = Account.objects.create(name='personal')
+        self.foreign = Account.objects.create(name='foreign', account_type=Account.FOREIGN)
+        self.category = Category.objects.create(name='Home')
+        self.recurrence = RecurringTransaction.objects.create(
+            title='Rent', amount=500, date=date(2019, 6, 1), src=self.personal,
+            dst=self.foreign, interval=RecurringTransaction.MONTHLY,
+            transaction_type=Transaction.WITHDRAW, category=self.category)
+        Budget.objects.create(category=self.category, month=date(2019, 5, 1), amount=150.5)
+        self.plumber = create_transaction('Plumber', self.personal, self.foreign, 120.25,
+                                          Transaction.WITHDRAW, date(2019, 5, 14),
+                                          self.category)
+        rent = create_transaction('Rent', self.personal, self.foreign, 500,
+                                  Transaction.WITHDRAW, date(2019, 5, 1))
+        rent.recurrence = self.recurrence
+        rent.save()
+        create_transaction('Groceries', self.personal, self.foreign, 30,
+                           Transaction.WITHDRAW, date(2019, 5, 15)).delete()
+
+    def dump(self):
+        return [list(model.objects.order_by('pk').values()) for model in MODELS]
+
+    def test_restore(self):
+        before = self.dump()
+        rows = write_snapshot(self.path)
+        self.assertEqual(rows, sum(len(table) for table in before))
+
+        Transaction.objects.filter(pk=self.plumber.pk).delete()
+        create_transaction('Heating', self.personal, self.foreign, 80,
+                           Transaction.WITHDRAW, date(2019, 6, 1))
+        Category.objects.create(name='Car')
+        self.assertNotEqual(self.dump(), before)
+
+        self.assertEqual(restore_snapshot(self.path), rows)
+        self.assertEqual(self.dump(), before)
+        self.assertEqual(Split.objects.get(transaction=self.plumber, amount__lt=0).amount,
+                         -120.25)
+        self.assertEqual(list(search('plumber')[:]), [self.plumber])
+        self.assertEqual(self.personal.balance_on(date(2019, 6, 1)), -620.25)
+
+        # new rows continue after the restored ones
+        transaction = create_transaction('Heating', self.personal, self.foreign, 80,
+                                         Transaction.WITHDRAW, date(2019, 6, 1))
+        self.assertGreater(transaction.pk, self.plumber.pk)
+        self.assertEqual(BalanceSnapshot.objects.get(
+            account=self.personal, date=date(2019, 6, 1)).balance, -700.25)
+
+    def test_restore_invalid_file(self):
+        with gzip.open(self.path, 'wt') as snapshot:
+            snapshot.write('{"format": "other"}\n')
+        with self.assertRaises(ValueError):
+            restore_snapshot(self.path)
+        with open(self.path, 'w') as snapshot:
+            snapshot.write('account;opposing_account\n')
+        with self.assertRaises(CommandError):
+            call_command('restore', self.path)
+        # nothing was deleted
+        self.assertEqual(Transaction.objects.count(), 2)
+
+    @mock.patch('builtins.print')
+    def test_commands(self, mock_print):
+        call_command('snapshot', self.path)
+        rows = sum(len(table) for table in self.dump())
+        mock_print.assert_called_with('Wrote {} rows to {}'.format(rows, self.path))
+        Transaction.objects.all().delete()
+        call_command('restore', self.path)
+        mock_print.assert_called_with('Restored {} rows from {}'.format(rows, self.path))
+        self.assertEqual(Transaction.objects.count(), 2)
+        with self.assertRaises(CommandError):
+            call_command('restore', self.path + '.missing')
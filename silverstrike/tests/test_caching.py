@@ -0,0 +1,107 @@
+import json
+import shutil
+import tempfile
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from silverstrike import caching
+from silverstrike.models import Account, Category, Split, Transaction
+from silverstrike.tests import create_transaction
+
+
+class CachingTests(TransactionTestCase):
+    # the version is bumped when transactions commit, which TestCase never does
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': directory,
+        }})
+        settings.enable()
+        self.addCleanup(settings.disable)
+        cache.clear()
+        User.objects.create_superuser(username='admin', email='email@example.com', password='pass')
+        self.client.login(username='admin', password='pass')
+        self.personal = Account.objects.create(name='personal', show_on_dashboard=True)
+        self.foreign = Account.objects.create(name='foreign', account_type=Account.FOREIGN)
+        create_transaction('deposit', self.foreign, self.personal, 100,
+                           Transaction.DEPOSIT, date(2017, 1, 1))
+
+    def test_get_or_compute(self):
+        self.assertEqual(caching.get_or_compute('test', lambda: 1), 1)
+        self.assertEqual(caching.get_or_compute('test', lambda: 2), 1)
+        self.assertEqual(caching.get_or_compute('test', lambda: 3, 'other'), 3)
+        caching.bump_ledger_version()
+        self.assertEqual(caching.get_or_compute('test', lambda: 4), 4)
+        stats = caching.get_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 3))
+        self.assertEqual(stats['hit_rate'], 0.25)
+
+    def test_version_survives_eviction(self):
+        version = caching.get_ledger_version()
+        cache.delete(caching.VERSION_KEY)
+        self.assertNotEqual(caching.get_ledger_version(), version)
+
+    def test_signals_bump_version(self):
+        version = caching.get_ledger_version()
+        Category.objects.create(name='foo')
+        self.assertGreater(caching.get_ledger_version(), version)
+        version = caching.get_ledger_version()
+        Split.objects.update(date=date(2017, 1, 2))
+        self.assertGreater(caching.get_ledger_version(), version)
+
+    def test_version_is_bumped_on_commit(self):
+        version = caching.get_ledger_version()
+        with db_transaction.atomic():
+            Category.objects.create(name='foo')
+            self.assertEqual(caching.get_ledger_version(), version)
+        self.assertGreater(caching.get_ledger_version(), version)
+        version = caching.get_ledger_version()
+        try:
+            with db_transaction.atomic():
+                Category.objects.create(name='bar')
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(caching.get_ledger_version(), version)
+
+    def test_index_is_cached_until_ledger_changes(self):
+        context = self.client.get(reverse('index')).context
+        self.assertEqual(context['balance'], 100)
+        with self.assertNumQueries(8):
+            # session, user, messages and the conditional GET validators
+            context = self.client.get(reverse('index')).context
+        self.assertEqual(context['balance'], 100)
+        create_transaction('withdraw', self.personal, self.foreign, 30,
+                           Transaction.WITHDRAW, date(2017, 2, 1))
+        context = self.client.get(reverse('index')).context
+        self.assertEqual(context['balance'], 70)
+
+    def test_accounts_cached_until_ledger_changes(self):
+        self.client.get(reverse('accounts'))
+        self.personal.name = 'renamed'
+        self.personal.save()
+        context = self.client.get(reverse('accounts')).context
+        self.assertEqual(context['accounts'][0]['name'], 'renamed')
+
+    def test_api_cache_stats(self):
+        self.client.get(reverse('accounts'))
+        self.client.get(reverse('accounts'))
+        response = self.client.get(reverse('api_cache_stats'))
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data['hits'], 1)
+        self.assertEqual(data['misses'], 1)
+
+    def test_no_caching_in_local_memory(self):
+        with override_settings(CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertFalse(caching.is_shared())
+            self.assertEqual(caching.get_or_compute('test', lambda: 1), 1)
+            self.assertEqual(caching.get_or_compute('test', lambda: 2), 2)
+        self.assertTrue(caching.is_shared())
@@ -0,0 +1,184 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+from silverstrike.changes import ChangeFeed, decode_cursor, get_changes, parse_since
+from silverstrike.models import Account, Split, Transaction
+from silverstrike.tests import create_transaction
+
+
+class ChangeFeedTests(TestCase):
+    def setUp(self):
+        settle_time = mock.patch('silverstrike.changes.SETTLE_TIME', timedelta(0))
+        settle_time.start()
+        self.addCleanup(settle_time.stop)
+        User.objects.create_superuser(username='admin', email='email@example.com', password='pass')
+        self.client.login(username='admin', password='pass')
+        self.personal = Account.objects.create(name='personal')
+        self.foreign = Account.objects.create(name='foreign', account_type=Account.FOREIGN)
+        self.plumber = create_transaction('Plumber', self.personal, self.foreign, 120,
+                                          Transaction.WITHDRAW, date(2019, 5, 14))
+        self.groceries = create_transaction('Groceries', self.personal, self.foreign, 30,
+                                            Transaction.WITHDRAW, date(2019, 5, 15))
+
+    def keys(self, changes):
+        return [(change['model'], change['id'], change['deleted']) for change in changes]
+
+    def test_all_changes(self):
+        page = get_changes()
+        self.assertFalse(page.has_next)
+        self.assertEqual(len(page), 6)
+        self.assertEqual(
+            sorted(self.keys(page)),
+            sorted([('transaction', self.plumber.pk, False),
+                    ('transaction', self.groceries.pk, False)] +
+                   [('split', pk, False) for pk in Split.objects.values_list('pk', flat=True)]))
+        times = [change['last_modified'] for change in page]
+        self.assertEqual(times, sorted(times))
+        split = [change for change in page if change['model'] == 'split'][0]
+        self.assertEqual(set(split['data']), {
+            'transaction_id', 'account_id', 'opposing_account_id', 'title', 'date',
+            'amount', 'category_id'})
+        self.assertIn(split['data']['amount'], ('-120.00', '120.00', '-30.00', '30.00'))
+
+    def test_changes_after_cursor(self):
+        cursor = get_changes().cursor
+        page = get_changes(cursor)
+        self.assertEqual(len(page), 0)
+        self.assertEqual(page.cursor, cursor)
+
+        split = self.plumber.splits.first()
+        split.title = 'Heating'
+        split.save()
+        page = get_changes(cursor)
+        self.assertEqual(self.keys(page), [('split', split.pk, False)])
+        self.assertEqual(page.changes[0]['data']['title'], 'Heating')
+
+        cursor = page.cursor
+        Split.objects.filter(transaction=self.groceries).update(title='Supermarket')
+        Transaction.objects.filter(pk=self.groceries.pk).update(title='Supermarket')
+        self.assertEqual(len(get_changes(cursor)), 3)
+
+    def test_deletes(self):
+        cursor = get_changes().cursor
+        pk = self.plumber.pk
+        splits = list(self.plumber.splits.values_list('pk', flat=True))
+        self.plumber.delete()
+        self.assertEqual(
+            sorted(self.keys(get_changes(cursor))),
+            sorted([('transaction', pk, True)] +
+                   [('split', pk, True) for pk in splits]))
+        self.assertIsNone(get_changes(cursor).changes[0]['data'])
+
+    def test_pages(self):
+        for i in range(5):
+            create_transaction('Groceries {}'.format(i), self.personal, self.foreign, 1,
+                               Transaction.WITHDRAW, date(2019, 6, 1))
+        Split.objects.filter(title='Groceries 3').delete()
+        everything = self.keys(get_changes())
+        feed = ChangeFeed(page_size=4)
+        self.assertEqual(self.keys(feed), everything)
+        self.assertEqual(feed.count, len(everything))
+        self.assertEqual(feed.cursor, get_changes().cursor)
+
+    def test_recent_changes_are_held_back(self):
+        with mock.patch('silverstrike.changes.SETTLE_TIME', timedelta(minutes=5)):
+            page = get_changes()
+            self.assertEqual(len(page), 0)
+            self.assertIsNone(page.cursor)
+            earlier = timezone.now() - timedelta(minutes=10)
+            Transaction.objects.update(last_modified=earlier)
+            Split.objects.filter(transaction=self.plumber).update(last_modified=earlier)
+            page = get_changes()
+            self.assertEqual(len(page), 4)
+            self.groceries.delete()
+            self.assertEqual(len(get_changes(page.cursor)), 0)
+
+    def test_changes_at_the_same_time(self):
+        now = timezone.now()
+        Split.objects.update(last_modified=now)
+        Transaction.objects.update(last_modified=now)
+        self.assertEqual(self.keys(ChangeFeed(page_size=1)), self.keys(get_changes()))
+
+    def test_parse_since(self):
+        cursor = get_changes().cursor
+        self.assertEqual(parse_since(cursor), cursor)
+        self.assertEqual(len(get_changes(parse_since('2000-01-01'))), 6)
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        self.assertEqual(len(get_changes(parse_since(tomorrow.isoformat()))), 0)
+        last_modified = decode_cursor(cursor)[0]
+        # changes at the given time are included
+        self.assertGreater(len(get_changes(parse_since(last_modified.isoformat()))), 0)
+        with self.assertRaises(ValueError):
+            parse_since('yesterday')
+
+    def test_rest(self):
+        response = self.client.get('/rest/changes', {'since': '2000-01-01'})
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(len(data['results']), 6)
+        self.assertIsNone(data['next'])
+        cursor = data['cursor']
+        self.plumber.delete()
+        data = json.loads(self.client.get(
+            '/rest/changes', {'after': cursor}).content.decode('utf-8'))
+        self.assertEqual(len(data['results']), 3)
+        self.assertTrue(all(change['deleted'] for change in data['results']))
+        self.assertEqual(self.client.get('/rest/changes', {'after': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get('/rest/changes', {'since': 'x'}).status_code, 400)
+
+    def test_rest_settled_changes(self):
+        with mock.patch('silverstrike.changes.SETTLE_TIME', timedelta(minutes=5)):
+            response = self.client.get('/rest/changes', {'since': '2000-01-01'})
+            self.assertEqual(len(json.loads(response.content.decode('utf-8'))['results']), 0)
+            self.assertNotIn('ETag', response)
+            self.assertNotIn('Last-Modified', response)
+            earlier = timezone.now() - timedelta(minutes=10)
+            Transaction.objects.update(last_modified=earlier)
+            Split.objects.update(last_modified=earlier)
+            # a poll once the changes settled returns them, whatever the client sends
+            response = self.client.get('/rest/changes', {'since': '2000-01-01'},
+                                       HTTP_IF_NONE_MATCH='"{}"'.format('0' * 32))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(json.loads(response.content.decode('utf-8'))['results']), 6)
+
+    def test_rest_pages(self):
+        with mock.patch('silverstrike.changes.PAGE_SIZE', 4):
+            data = json.loads(self.client.get(
+                '/rest/changes', {'since': '2000-01-01'}).content.decode('utf-8'))
+            self.assertEqual(len(data['results']), 4)
+            self.assertNotIn('since', data['next'])
+            data = json.loads(self.client.get(data['next']).content.decode('utf-8'))
+            self.assertEqual(len(data['results']), 2)
+            self.assertIsNone(data['next'])
+
+    @mock.patch('builtins.print')
+    def test_command(self, mock_print):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'changes.jsonl')
+        stderr = StringIO()
+        call_command('exporttransactions', file=path, since='2000-01-01', stderr=stderr)
+        mock_print.assert_called_with('Exported 6 changes to {}'.format(path))
+        with open(path) as changes_file:
+            changes = [json.loads(line) for line in changes_file]
+        self.assertEqual(self.keys(changes), self.keys(get_changes()))
+        cursor = stderr.getvalue().split()[-1]
+        self.assertEqual(cursor, get_changes().cursor)
+
+        self.groceries.delete()
+        call_command('exporttransactions', file=path, since=cursor, stderr=StringIO())
+        mock_print.assert_called_with('Exported 3 changes to {}'.format(path))
+
+    def test_command_invalid_since(self):
+        with self.assertRaises(CommandError):
+            call_command('exporttransactions', since='yesterday')
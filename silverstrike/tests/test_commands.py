@@ -1,7 +1,11 @@
+from datetime import timedelta
+from unittest import mock
+
 from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
 
-from silverstrike.models import Transaction
+from silverstrike.models import Account, BalanceSnapshot, Tombstone, Transaction
 
 
 class CommandsTestCase(TestCase):
@@ -10,3 +14,37 @@ class CommandsTestCase(TestCase):
         opts = {}
         Transaction.objects.create(title='meh', transaction_type=1)
         call_command('createtestdata', *args, **opts)
+
+    def test_rebuildbalances(self):
+        account = Account.objects.create(name='foo')
+        account.set_initial_balance(50)
+        BalanceSnapshot.objects.all().update(balance=0)
+        self.assertEqual(account.balance, 0)
+        call_command('rebuildbalances')
+        self.assertEqual(account.balance, 50)
+
+    def test_explainqueries(self):
+        account = Account.objects.create(name='foo')
+        account.set_initial_balance(50)
+        with mock.patch('builtins.print') as output:
+            call_command('explainqueries', 'account balance')
+        self.assertEqual(output.call_args_list[0], mock.call('account balance'))
+        self.assertIn('split_account_date', str(output.call_args_list[1]))
+
+    def test_rebuildcounters(self):
+        account = Account.objects.create(name='foo')
+        account.set_initial_balance(50)
+        Account.objects.update(split_count=0)
+        call_command('rebuildcounters')
+        account.refresh_from_db()
+        self.assertEqual(account.split_count, 1)
+
+    @mock.patch('builtins.print')
+    def test_prunetombstones(self, mock_print):
+        old = Tombstone.objects.create(model='silverstrike.split', object_id=1)
+        recent = Tombstone.objects.create(model='silverstrike.split', object_id=2)
+        Tombstone.objects.filter(pk=old.pk).update(
+            last_modified=timezone.now() - Tombstone.RETENTION - timedelta(days=1))
+        call_command('prunetombstones')
+        mock_print.assert_called_with('Deleted 1 tombstones')
+        self.assertEqual(list(Tombstone.objects.values_list('pk', flat=True)), [recent.pk])
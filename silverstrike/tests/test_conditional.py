@@ -0,0 +1,88 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from silverstrike.models import Account, Split, Tombstone, Transaction
+from silverstrike.tests import create_transaction
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        User.objects.create_superuser(username='admin', email='email@example.com', password='pass')
+        self.client.login(username='admin', password='pass')
+        self.personal = Account.objects.create(name='personal', show_on_dashboard=True)
+        self.foreign = Account.objects.create(name='foreign', account_type=Account.FOREIGN)
+        create_transaction('deposit', self.foreign, self.personal, 100,
+                           Transaction.DEPOSIT, date(2017, 1, 1))
+
+    def assertNotModified(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ETag', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        return response
+
+    def test_html_view(self):
+        self.assertNotModified(reverse('index'))
+        self.assertNotModified(reverse('accounts'))
+        self.assertNotModified(reverse('transactions'))
+
+    def test_form_views_are_not_conditional(self):
+        # their CSRF token changes with every login
+        self.assertNotIn('ETag', self.client.get(reverse('budgets')))
+        self.assertNotIn('ETag', self.client.get(reverse('recurrences')))
+
+    def test_api_views(self):
+        self.assertNotModified(reverse('api_balance', args=['2017-01-01', '2017-01-31']))
+        self.assertNotModified(reverse('category_spending', args=['2017-01-01', '2017-01-31']))
+        self.assertNotModified('/rest/accounts/')
+        self.assertNotModified('/rest/accounts/{}/'.format(self.personal.pk))
+        self.assertNotModified('/rest/transactions/')
+
+    def test_if_modified_since(self):
+        url = reverse('api_balance', args=['2017-01-01', '2017-01-31'])
+        for model in (Account, Split):
+            model.objects.update(last_modified=timezone.now() - timedelta(minutes=1))
+        response = self.client.get(url)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_last_modified_of_the_current_second(self):
+        url = reverse('api_balance', args=['2017-01-01', '2017-01-31'])
+        now = timezone.now()
+        for model in (Account, Split):
+            model.objects.update(last_modified=now + timedelta(minutes=1))
+        response = self.client.get(url)
+        self.assertIn('ETag', response)
+        self.assertNotIn('Last-Modified', response)
+        for model in (Account, Split):
+            model.objects.update(last_modified=now - timedelta(minutes=1))
+        self.assertIn('Last-Modified', self.client.get(url))
+
+    def test_change_invalidates(self):
+        url = reverse('api_balance', args=['2017-01-01', '2017-01-31'])
+        etag = self.client.get(url)['ETag']
+        create_transaction('withdraw', self.personal, self.foreign, 30,
+                           Transaction.WITHDRAW, date(2017, 1, 2))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_delete_invalidates(self):
+        url = reverse('transactions')
+        etag = self.client.get(url)['ETag']
+        Transaction.objects.get(title='deposit').delete()
+        self.assertEqual(Tombstone.objects.filter(model='silverstrike.split').count(), 2)
+        self.assertTrue(Tombstone.objects.filter(model='silverstrike.transaction').exists())
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_post_is_not_conditional(self):
+        response = self.client.get('/rest/accounts/')
+        response = self.client.post('/rest/accounts/', {'name': 'new'},
+                                    HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 201)
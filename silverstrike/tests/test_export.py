@@ -0,0 +1,80 @@
+import csv
+import gzip
+import io
+import os
+import shutil
+import tempfile
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from silverstrike import export
+from silverstrike.models import Account, Category, Split, Transaction
+from silverstrike.tests import create_transaction
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        User.objects.create_superuser(username='admin', email='email@example.com', password='pass')
+        self.client.login(username='admin', password='pass')
+        self.personal = Account.objects.create(name='personal')
+        self.foreign = Account.objects.create(name='foreign', account_type=Account.FOREIGN)
+        self.category = Category.objects.create(name='Home')
+        create_transaction('Plumber', self.personal, self.foreign, 120,
+                           Transaction.WITHDRAW, date(2019, 5, 14), self.category)
+        create_transaction('Groceries', self.personal, self.foreign, 30,
+                           Transaction.WITHDRAW, date(2019, 5, 15))
+        create_transaction('Repair', self.personal, self.foreign, 80,
+                           Transaction.WITHDRAW, date(2018, 3, 1))
+
+    def read(self, content):
+        return list(csv.reader(io.StringIO(content.decode('utf-8')), delimiter=';'))
+
+    def post(self, **data):
+        data.update({'start': '2019-01-01', 'end': '2019-12-31', 'accounts': [self.personal.pk]})
+        return self.client.post(reverse('export'), data)
+
+    def test_export(self):
+        response = self.post()
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(self.read(b''.join(response.streaming_content)), [
+            export.HEADERS,
+            ['personal', 'foreign', '2019-05-15', '-30.00', ''],
+            ['personal', 'foreign', '2019-05-14', '-120.00', 'Home'],
+        ])
+
+    def test_export_gzip(self):
+        response = self.post(compress='on')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('export.csv.gz', response['Content-Disposition'])
+        content = gzip.decompress(b''.join(response.streaming_content))
+        self.assertEqual(len(self.read(content)), 3)
+
+    def test_blocks(self):
+        for i in range(20):
+            create_transaction('Groceries {}'.format(i), self.personal, self.foreign, 1,
+                               Transaction.WITHDRAW, date(2019, 6, 1))
+        splits = Split.objects.filter(account=self.personal)
+        with mock.patch('silverstrike.export.BLOCK_SIZE', 100):
+            blocks = list(export.iter_csv(splits))
+            self.assertGreater(len(blocks), 1)
+            self.assertEqual(len(self.read(b''.join(blocks))), 24)
+            content = gzip.decompress(b''.join(export.iter_csv(splits, compress=True)))
+            self.assertEqual(self.read(content), self.read(b''.join(blocks)))
+
+    @mock.patch('builtins.print')
+    def test_command(self, mock_print):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'export.csv.gz')
+        call_command('exporttransactions', file=path, gzip=True)
+        mock_print.assert_called_with('Exported transactions to {}'.format(path))
+        with gzip.open(path, 'rb') as export_file:
+            rows = self.read(export_file.read())
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[-1], ['personal', 'foreign', '2018-03-01', '-80.00', ''])
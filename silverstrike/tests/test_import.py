@@ -1,8 +1,12 @@
 import os
+from unittest import mock
 
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.test import TestCase
 
 from silverstrike.importers.firefly import import_firefly
+from silverstrike.models import Account, Category, Split, Transaction
 
 
 class FireFlyImportTests(TestCase):
@@ -14,4 +18,42 @@ class FireFlyImportTests(TestCase):
             'firefly.csv')
 
     def test_single_import(self):
+        self.assertEqual(import_firefly(self.csv_file), 21)
+        self.assertEqual(Transaction.objects.count(), 21)
+        self.assertEqual(Account.objects.personal().count(), 2)
+        self.assertEqual(Account.objects.foreign().count(), 12)
+        self.assertEqual(Category.objects.count(), 6)
+        self.assertEqual(Transaction.objects.filter(
+            transaction_type=Transaction.TRANSFER).count(), 1)
+        checking = Account.objects.get(name='Checking Account')
+        self.assertEqual(checking.split_count, 21)
+        shell = Account.objects.get(name='Shell')
+        self.assertEqual(set(Split.objects.filter(account=shell).values_list(
+            'category__name', flat=True)), {'Car'})
+
+    def test_chunks(self):
+        progress = mock.Mock()
+        self.assertEqual(import_firefly(self.csv_file, chunk_size=4, progress=progress), 21)
+        self.assertEqual(progress.call_args_list[0], mock.call(4))
+        self.assertEqual(progress.call_args_list[-1], mock.call(21))
+        self.assertEqual(Account.objects.foreign().count(), 12)
+        self.assertEqual(Category.objects.count(), 6)
+        balance = Account.objects.with_balance().get(name='Checking Account').balance
+        Transaction.objects.all().delete()
+        import_firefly(self.csv_file)
+        self.assertEqual(
+            Account.objects.with_balance().get(name='Checking Account').balance, balance)
+
+    def test_import_again(self):
         import_firefly(self.csv_file)
+        self.assertEqual(import_firefly(self.csv_file), 0)
+        self.assertEqual(Transaction.objects.count(), 21)
+
+    @mock.patch('builtins.print')
+    def test_command(self, mock_print):
+        call_command('importfireflydata', self.csv_file, chunk_size=10)
+        self.assertEqual(Transaction.objects.count(), 21)
+        self.assertIn(mock.call('Read 10 of 21 rows'), mock_print.call_args_list)
+        mock_print.assert_called_with('Imported 21 transactions from {}'.format(self.csv_file))
+        with self.assertRaises(CommandError):
+            call_command('importfireflydata', self.csv_file + '.missing')
@@ -1,10 +1,20 @@
 import os
+import shutil
+import tempfile
 from datetime import date
-from unittest import skipUnless
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
 from silverstrike import importers
+from silverstrike.importers.import_statement import ImportStatement, get_fingerprints
+from silverstrike.jobs import run_pending
+from silverstrike.models import (Account, ImportFile, Job, ParsedStatements, Split,
+                                 Transaction)
 
 
 class ImportTests(TestCase):
@@ -23,6 +33,19 @@ class ImportTests(TestCase):
         self.assertEqual(t.amount, -40.03)
         self.assertEqual(t.book_date, date(2018, 10, 18))
 
+    def test_iter_transactions(self):
+        path = os.path.join(self.base_dir, 'president-choice-mastercard.csv')
+        statements = importers.pc_mastercard.iter_transactions(path)
+        self.assertEqual(next(statements).amount, -40.03)
+        self.assertEqual(len(list(statements)), 3)
+
+    def test_import_statement(self):
+        statement = ImportStatement(book_date=date(2018, 10, 18), amount=-1.5)
+        self.assertEqual(statement.transaction_date, date(2018, 10, 18))
+        self.assertEqual(statement.iban, '')
+        with self.assertRaises(AttributeError):
+            statement.foo = 'bar'
+
     @skipUnless(hasattr(importers, 'ofx'), 'ofxparse is not installed')
     def test_ofx(self):
         transactions = importers.ofx.import_transactions(
@@ -30,3 +53,135 @@ class ImportTests(TestCase):
         t = transactions[0]
         self.assertEqual(t.amount, 34.50)
         self.assertEqual(t.book_date, date(2018, 1, 2))
+
+
+class ImportFileTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings.enable()
+        path = os.path.join(os.path.dirname(__file__), 'fixtures',
+                            'president-choice-mastercard.csv')
+        with open(path, 'rb') as f:
+            self.content = f.read()
+        self.file = ImportFile.objects.create(
+            file=SimpleUploadedFile('statement.csv', self.content))
+        self.importer = importers.IMPORTERS.index(importers.pc_mastercard)
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_statements_are_parsed_once(self):
+        parse = mock.Mock(wraps=importers.pc_mastercard.iter_transactions)
+        with mock.patch.object(importers.pc_mastercard, 'iter_transactions', parse):
+            statements = list(self.file.get_statements(self.importer))
+            cached = list(self.file.get_statements(self.importer))
+        self.assertEqual(parse.call_count, 1)
+        self.assertEqual(len(cached), 4)
+        self.assertEqual([s.to_row() for s in cached], [s.to_row() for s in statements])
+        self.assertEqual(cached[0].book_date, date(2018, 10, 18))
+
+    def test_statements_are_read_lazily(self):
+        self.file.get_statements(self.importer)
+        parsed = self.file.get_statements(self.importer)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(parsed), 4)
+        with mock.patch.object(ParsedStatements, 'BLOCK_SIZE', 16):
+            statements = list(parsed)
+        self.assertEqual(len(statements), 4)
+        self.assertEqual(statements[-1].to_row(), list(
+            importers.pc_mastercard.iter_transactions(self.file.file.path))[-1].to_row())
+
+    @skipUnless(hasattr(importers, 'ofx'), 'ofxparse is not installed')
+    def test_amounts_keep_their_type(self):
+        path = os.path.join(os.path.dirname(__file__), 'fixtures', 'ofx.qfx')
+        with open(path, 'rb') as f:
+            import_file = ImportFile.objects.create(file=SimpleUploadedFile('ofx.qfx', f.read()))
+        importer = importers.IMPORTERS.index(importers.ofx)
+        parsed = [s.amount for s in import_file.get_statements(importer)]
+        cached = [s.amount for s in import_file.get_statements(importer)]
+        self.assertEqual([type(a) for a in parsed], [type(a) for a in cached])
+        self.assertEqual(parsed, cached)
+
+    def test_changed_file_is_parsed_again(self):
+        self.file.get_statements(self.importer)
+        lines = self.content.splitlines(True)
+        with open(self.file.file.path, 'wb') as f:
+            f.writelines(lines[:-1])
+        self.assertEqual(len(self.file.get_statements(self.importer)), 3)
+        self.assertEqual(self.file.parsed_statements.count(), 1)
+
+    def test_book_statements(self):
+        User.objects.create_superuser(username='admin', email='email@example.com', password='pass')
+        self.client.login(username='admin', password='pass')
+        personal = Account.objects.create(name='personal')
+        Account.objects.create(name='Esso', account_type=Account.FOREIGN)
+        url = reverse('import_process', args=[self.file.pk, personal.pk, self.importer])
+        self.client.post(url, {
+            'title-0': 'Groceries', 'account-0': 'Sobeys',
+            'title-1': 'Groceries', 'account-1': 'Sobeys',
+            'title-2': 'Gas', 'account-2': 'Esso',
+        })
+        self.assertFalse(Transaction.objects.exists())
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(Job.objects.get().state, Job.DONE)
+        self.assertEqual(Transaction.objects.count(), 3)
+        self.assertEqual(Account.objects.foreign().count(), 2)
+        sobeys = Account.objects.get(name='Sobeys')
+        self.assertEqual(sobeys.split_count, 2)
+        self.assertEqual(set(Transaction.objects.filter(splits__account=sobeys).values_list(
+            'transaction_type', flat=True)), {Transaction.WITHDRAW})
+        split = Split.objects.get(account=personal, title='Gas')
+        self.assertEqual(split.amount, Decimal('-46.38'))
+        self.assertEqual(split.date, date(2018, 10, 12))
+        self.assertEqual(split.transaction.title, 'Gas')
+        personal = Account.objects.with_balance().get(pk=personal.pk)
+        self.assertEqual(personal.balance, Decimal('-96.40'))
+
+    def test_failed_booking_leaves_nothing_behind(self):
+        personal = Account.objects.create(name='personal')
+        User.objects.create_superuser(username='admin', email='email@example.com', password='pass')
+        self.client.login(username='admin', password='pass')
+        url = reverse('import_process', args=[self.file.pk, personal.pk, self.importer])
+        self.client.post(url, {'title-0': 'Groceries', 'account-0': 'Sobeys'})
+        with mock.patch('silverstrike.models.SplitQuerySet.bulk_create',
+                        side_effect=RuntimeError), self.assertLogs('silverstrike.jobs', 'ERROR'):
+            run_pending()
+        self.assertEqual(Job.objects.get().state, Job.FAILED)
+        self.assertIn('RuntimeError', Job.objects.get().error)
+        self.assertFalse(Transaction.objects.exists())
+        self.assertFalse(Account.objects.foreign().exists())
+
+    def test_duplicates_are_skipped(self):
+        User.objects.create_superuser(username='admin', email='email@example.com', password='pass')
+        self.client.login(username='admin', password='pass')
+        personal = Account.objects.create(name='personal')
+        url = reverse('import_process', args=[self.file.pk, personal.pk, self.importer])
+        self.client.post(url, {'title-0': 'Groceries', 'account-0': 'Sobeys',
+                               'title-2': 'Gas', 'account-2': 'Esso'})
+        run_pending()
+        self.assertEqual(self.client.get(url).context['duplicates'], {0, 2})
+        self.client.post(url, {'title-{}'.format(i): 'Groceries' for i in range(4)})
+        run_pending()
+        self.assertEqual(Transaction.objects.count(), 4)
+        self.assertEqual(Split.objects.filter(title='Gas').count(), 2)
+
+
+class FingerprintTests(TestCase):
+    def test_fingerprint(self):
+        statement = ImportStatement(book_date=date(2018, 10, 18), amount=-40.03,
+                                    notes='SOBEYS  qps', iban='DE123')
+        same = ImportStatement(book_date=date(2018, 10, 18), amount=-40.030,
+                               notes='Sobeys QPS', account='Sobeys', iban='DE123')
+        self.assertEqual(statement.fingerprint(1), same.fingerprint(1))
+        self.assertNotEqual(statement.fingerprint(1), statement.fingerprint(2))
+        other = ImportStatement(book_date=date(2018, 10, 18), amount=-40.04,
+                                notes='Sobeys QPS', iban='DE123')
+        self.assertNotEqual(statement.fingerprint(1), other.fingerprint(1))
+
+    def test_identical_lines_get_different_fingerprints(self):
+        statement = ImportStatement(book_date=date(2018, 10, 18), amount=3, notes='Coffee')
+        first, second = get_fingerprints([statement, statement], 1)
+        self.assertNotEqual(first, second)
+        self.assertEqual(first, statement.fingerprint(1))
@@ -0,0 +1,149 @@
+import json
+import os
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from silverstrike import jobs
+from silverstrike.models import Job
+
+
+class JobTests(TestCase):
+    def setUp(self):
+        User.objects.create_superuser(username='admin', email='email@example.com', password='pass')
+        self.client.login(username='admin', password='pass')
+        self.calls = []
+
+        def count(job, steps):
+            for i in range(steps):
+                self.calls.append(i)
+                job.set_progress(i + 1, steps)
+
+        def fail(job):
+            raise ValueError('broken')
+
+        handlers = mock.patch.dict(jobs.HANDLERS, {'count': count, 'fail': fail})
+        handlers.start()
+        self.addCleanup(handlers.stop)
+
+    def test_claim_takes_the_oldest_job(self):
+        first = Job.objects.enqueue('count', steps=1)
+        Job.objects.enqueue('count', steps=1)
+        claimed = Job.objects.claim()
+        self.assertEqual(claimed, first)
+        self.assertEqual(claimed.state, Job.RUNNING)
+        self.assertIsNotNone(claimed.started)
+        self.assertNotEqual(Job.objects.claim(), first)
+        self.assertIsNone(Job.objects.claim())
+
+    def test_run_pending(self):
+        job = Job.objects.enqueue('count', steps=3)
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(self.calls, [0, 1, 2])
+        job.refresh_from_db()
+        self.assertEqual(job.state, Job.DONE)
+        self.assertEqual((job.progress, job.total), (3, 3))
+        self.assertIsNotNone(job.finished)
+        self.assertEqual(jobs.run_pending(), 0)
+
+    def test_failed_job(self):
+        job = Job.objects.enqueue('fail')
+        Job.objects.enqueue('count', steps=1)
+        with self.assertLogs('silverstrike.jobs', 'ERROR'):
+            self.assertEqual(jobs.run_pending(), 2)
+        job.refresh_from_db()
+        self.assertEqual(job.state, Job.FAILED)
+        self.assertIn('ValueError: broken', job.error)
+        self.assertEqual(self.calls, [0])
+
+    def test_status_endpoint(self):
+        job = Job.objects.enqueue('count', steps=2)
+        response = self.client.get(reverse('api_job', args=[job.pk]))
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data['state'], 'Queued')
+        self.assertFalse(data['done'])
+        jobs.run_pending()
+        response = self.client.get(reverse('api_job', args=[job.pk]))
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertTrue(data['done'])
+        self.assertEqual((data['progress'], data['total']), (2, 2))
+        self.assertEqual(self.client.get(reverse('api_job', args=[job.pk + 1])).status_code, 404)
+
+    def test_job_detail(self):
+        job = Job.objects.enqueue('count', steps=2)
+        response = self.client.get(reverse('job_detail', args=[job.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, reverse('api_job', args=[job.pk]))
+
+    def stop(self, job):
+        """
+        Makes the running job look like its worker was killed a while ago.
+        """
+        Job.objects.filter(pk=job.pk).update(
+            heartbeat=timezone.now() - Job.STALE_AFTER - timedelta(minutes=1))
+        job.refresh_from_db()
+
+    def test_recover_stopped_jobs(self):
+        job = Job.objects.enqueue('count', steps=2)
+        Job.objects.claim().set_progress(1, 2)
+        self.assertEqual(Job.objects.recover(), (0, 0))
+        self.stop(job)
+        self.assertTrue(job.is_stale)
+        self.assertEqual(Job.objects.recover(), (1, 0))
+        job.refresh_from_db()
+        self.assertEqual(job.state, Job.QUEUED)
+        self.assertEqual(jobs.run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.state, job.attempts), (Job.DONE, 2))
+
+    def test_give_up_on_stopped_jobs(self):
+        job = Job.objects.enqueue('count', steps=1)
+        for i in range(Job.MAX_ATTEMPTS):
+            Job.objects.claim()
+            self.stop(job)
+            Job.objects.recover()
+        job.refresh_from_db()
+        self.assertEqual(job.state, Job.FAILED)
+        self.assertTrue(job.error)
+        self.assertIsNone(Job.objects.claim())
+
+    def test_stale_job_detail(self):
+        job = Job.objects.enqueue('count', steps=2)
+        Job.objects.claim()
+        response = self.client.get(reverse('api_job', args=[job.pk]))
+        self.assertFalse(json.loads(response.content.decode('utf-8'))['stale'])
+        self.stop(job)
+        response = self.client.get(reverse('api_job', args=[job.pk]))
+        self.assertTrue(json.loads(response.content.decode('utf-8'))['stale'])
+        response = self.client.get(reverse('job_detail', args=[job.pk]))
+        self.assertContains(response, '<p id="job-stale" class="text-warning">')
+
+    @mock.patch('builtins.print')
+    def test_runworker_recovers_stopped_jobs(self, mock_print):
+        job = Job.objects.enqueue('count', steps=1)
+        Job.objects.claim()
+        self.stop(job)
+        call_command('runworker', once=True)
+        mock_print.assert_any_call('Queued 1 stopped jobs again and gave up on 0')
+        job.refresh_from_db()
+        self.assertEqual(job.state, Job.DONE)
+
+    @mock.patch('builtins.print')
+    def test_runworker_once(self, mock_print):
+        Job.objects.enqueue('count', steps=1)
+        call_command('runworker', once=True)
+        self.assertEqual(Job.objects.get().state, Job.DONE)
+        mock_print.assert_called_with('Ran 1 jobs')
+
+    def test_firefly_job(self):
+        path = os.path.join(os.path.dirname(__file__), 'fixtures', 'firefly.csv')
+        job = Job.objects.enqueue('import_firefly', path=path)
+        jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.state, Job.DONE)
+        self.assertEqual((job.progress, job.total), (21, 21))
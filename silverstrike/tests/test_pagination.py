@@ -0,0 +1,92 @@
+import json
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from silverstrike.models import Account, Split, Transaction
+from silverstrike.pagination import paginate
+from silverstrike.tests import create_transaction
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        User.objects.create_superuser(username='admin', email='email@example.com', password='pass')
+        self.client.login(username='admin', password='pass')
+        self.personal = Account.objects.create(name='personal')
+        self.foreign = Account.objects.create(name='foreign', account_type=Account.FOREIGN)
+        for i in range(60):
+            # two transactions per day so that pages have to break ties by id
+            create_transaction('meh', self.personal, self.foreign, i + 1, Transaction.WITHDRAW,
+                               date(2017, 1, 1) + timedelta(days=i // 2))
+
+    def test_paginate(self):
+        splits = Split.objects.filter(account=self.personal)
+        expected = list(splits.order_by('-date', '-pk'))
+        seen = []
+        page = paginate(splits, 25)
+        self.assertFalse(page.has_previous)
+        while True:
+            seen.extend(page)
+            if not page.has_next:
+                break
+            page = paginate(splits, 25, after=page.next_cursor)
+        self.assertEqual(seen, expected)
+        previous = paginate(splits, 25, before=page.previous_cursor)
+        self.assertEqual(list(previous), expected[25:50])
+        self.assertTrue(previous.has_previous)
+        self.assertTrue(previous.has_next)
+
+    def test_transaction_index(self):
+        context = self.client.get(reverse('transactions')).context
+        self.assertEqual(len(context['transactions']), 50)
+        self.assertEqual(context['total'], 60)
+        self.assertIsNone(context['previous_url'])
+        context = self.client.get(context['next_url']).context
+        self.assertEqual(len(context['transactions']), 10)
+        self.assertIsNone(context['next_url'])
+        self.assertIn('before=', context['previous_url'])
+
+    def test_filters_are_kept(self):
+        url = reverse('transactions') + '?account={}'.format(self.personal.pk)
+        context = self.client.get(url).context
+        self.assertIn('account={}'.format(self.personal.pk), context['next_url'])
+
+    def test_count_opt_out(self):
+        context = self.client.get(reverse('transactions'), {'count': '0'}).context
+        self.assertNotIn('total', context)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('transactions'), {'after': 'foo'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_account_view_all(self):
+        url = reverse('account_detail_all', args=[self.personal.pk])
+        context = self.client.get(url).context
+        self.assertEqual(len(context['transactions']), 50)
+        self.assertEqual(context['total'], 60)
+        self.assertEqual(context['dstart'], date(2017, 1, 1))
+        self.assertEqual(context['dend'], date(2017, 1, 30))
+        self.assertEqual(context['out'], -sum(range(1, 61)))
+
+    def test_rest_account_transactions(self):
+        url = '/rest/accounts/{}/transactions/'.format(self.personal.pk)
+        data = json.loads(self.client.get(url).content.decode('utf-8'))
+        self.assertEqual(data['count'], 60)
+        self.assertIsNone(data['previous'])
+        ids = [s['id'] for s in data['results']]
+        while data['next']:
+            data = json.loads(self.client.get(data['next']).content.decode('utf-8'))
+            ids.extend(s['id'] for s in data['results'])
+        self.assertEqual(ids, list(Split.objects.filter(account=self.personal).order_by(
+            '-date', '-pk').values_list('id', flat=True)))
+        data = json.loads(self.client.get(url, {'count': '0'}).content.decode('utf-8'))
+        self.assertIsNone(data['count'])
+
+    def test_rest_without_page_size_setting(self):
+        url = '/rest/accounts/{}/transactions/'.format(self.personal.pk)
+        with override_settings(REST_FRAMEWORK={}):
+            data = json.loads(self.client.get(url).content.decode('utf-8'))
+        self.assertEqual(len(data['results']), 10)
+        self.assertIsNotNone(data['next'])
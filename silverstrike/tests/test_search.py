@@ -0,0 +1,105 @@
+import json
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from silverstrike.models import Account, SearchDocument, Split, Transaction
+from silverstrike.search import search
+from silverstrike.tests import create_transaction
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        User.objects.create_superuser(username='admin', email='email@example.com', password='pass')
+        self.client.login(username='admin', password='pass')
+        self.personal = Account.objects.create(name='personal')
+        self.foreign = Account.objects.create(name='foreign', account_type=Account.FOREIGN)
+        self.plumber = create_transaction('Plumber', self.personal, self.foreign, 120,
+                                          Transaction.WITHDRAW, date(2019, 5, 14))
+        self.groceries = create_transaction('Groceries', self.personal, self.foreign, 30,
+                                            Transaction.WITHDRAW, date(2019, 5, 15))
+        self.repair = create_transaction('Repair', self.personal, self.foreign, 80,
+                                         Transaction.WITHDRAW, date(2018, 3, 1))
+
+    def results(self, query):
+        return list(search(query)[:])
+
+    def test_search(self):
+        self.assertEqual(self.results('plumber'), [self.plumber])
+        self.assertEqual(self.results('PLUMB'), [self.plumber])
+        self.assertEqual(self.results('2019'), [self.groceries, self.plumber])
+        self.assertEqual(self.results('plumber 2018'), [])
+        self.assertEqual(self.results(''), [])
+        self.assertEqual(search('2019').count(), 2)
+
+    def test_operators_are_not_interpreted(self):
+        self.assertEqual(self.results('plumber AND "NEAR('), [])
+        self.assertEqual(self.results('plumber OR'), [])
+
+    def test_results_have_totals(self):
+        result = self.results('plumber')[0]
+        self.assertEqual(result.amount, -120)
+        self.assertIsNotNone(result.rank)
+
+    def test_index_follows_saves(self):
+        self.plumber.title = 'Heating'
+        self.plumber.notes = 'boiler'
+        self.plumber.save()
+        self.assertEqual(self.results('boiler heat'), [self.plumber])
+        # the splits keep their title
+        self.assertEqual(self.results('plumber'), [self.plumber])
+        split = self.repair.splits.first()
+        split.title = 'Roof'
+        split.save()
+        self.assertEqual(self.results('roof'), [self.repair])
+
+    def test_index_follows_updates(self):
+        Split.objects.filter(transaction=self.groceries).update(title='Supermarket')
+        self.assertEqual(self.results('supermarket'), [self.groceries])
+
+    def test_index_follows_deletes(self):
+        self.plumber.splits.first().delete()
+        self.assertEqual(self.results('plumber'), [self.plumber])
+        self.plumber.delete()
+        self.assertEqual(self.results('plumber'), [])
+        self.assertFalse(SearchDocument.objects.filter(pk=self.plumber.pk).exists())
+
+    def test_rebuild(self):
+        SearchDocument.objects.all().delete()
+        self.assertEqual(self.results('plumber'), [])
+        self.assertEqual(SearchDocument.objects.rebuild(), 3)
+        self.assertEqual(self.results('plumber'), [self.plumber])
+
+    def test_fallback_without_index(self):
+        with mock.patch('silverstrike.search._backend', return_value=None):
+            self.assertEqual(self.results('plumb 2019'), [self.plumber])
+            self.assertIsNone(self.results('plumber')[0].rank)
+            self.assertEqual(search('2019').count(), 2)
+
+    def test_search_view(self):
+        for i in range(55):
+            create_transaction('Plumber {}'.format(i), self.personal, self.foreign, 1,
+                               Transaction.WITHDRAW, date(2019, 6, 1))
+        context = self.client.get(reverse('transaction_search'), {'q': 'plumber'}).context
+        self.assertEqual(len(context['transactions']), 50)
+        self.assertEqual(context['total'], 56)
+        self.assertNotIn('previous_url', context)
+        context = self.client.get(context['next_url']).context
+        self.assertEqual(len(context['transactions']), 6)
+        self.assertNotIn('next_url', context)
+
+    def test_search_view_without_query(self):
+        response = self.client.get(reverse('transaction_search'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['transactions']), 0)
+
+    def test_rest_search(self):
+        response = self.client.get('/rest/transactions/search', {'q': 'plumber'})
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['results'][0]['id'], self.plumber.pk)
+        self.assertEqual(data['results'][0]['amount'], '-120.00')
+        self.assertIn('rank', data['results'][0])
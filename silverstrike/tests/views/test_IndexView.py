@@ -1,10 +1,13 @@
-from datetime import date
+import json
+from datetime import date, timedelta
+from decimal import Decimal
 
 from django.contrib.auth.models import User
 from django.test import TestCase
 from django.urls import reverse
 
-from silverstrike.models import Account, Transaction
+from silverstrike.dashboard import get_summary
+from silverstrike.models import Account, RecurringTransaction, Transaction
 from silverstrike.tests import create_transaction
 
 
@@ -45,22 +48,69 @@ class IndexViewTestCase(TestCase):
         self.assertEqual(context['balance'], 0)
 
     def test_income(self):
-        pass
+        create_transaction('meh', self.foreign, self.account, 1000, Transaction.DEPOSIT)
+        create_transaction('meh', self.account, self.personal, 300, Transaction.TRANSFER)
+        context = self.client.get(reverse('index')).context
+        self.assertEqual(context['income'], 1000)
+        self.assertEqual(context['difference'], 1000)
 
     def test_expenses(self):
-        pass
+        create_transaction('meh', self.account, self.foreign, 400, Transaction.WITHDRAW)
+        context = self.client.get(reverse('index')).context
+        self.assertEqual(context['expenses'], 400)
+        self.assertEqual(context['difference'], -400)
 
     def test_previous_income(self):
-        pass
+        last_month = date.today().replace(day=1) - timedelta(days=1)
+        create_transaction('meh', self.foreign, self.account, 1000,
+                           Transaction.DEPOSIT, last_month)
+        context = self.client.get(reverse('index')).context
+        self.assertEqual(context['income'], 0)
+        self.assertEqual(context['previous_income'], 1000)
 
     def test_previous_expenses(self):
-        pass
+        last_month = date.today().replace(day=1) - timedelta(days=1)
+        create_transaction('meh', self.account, self.foreign, 400,
+                           Transaction.WITHDRAW, last_month)
+        context = self.client.get(reverse('index')).context
+        self.assertEqual(context['expenses'], 0)
+        self.assertEqual(context['previous_expenses'], 400)
+        self.assertEqual(context['previous_difference'], -400)
 
     def test_upcoming_transactions(self):
-        pass
+        tomorrow = date.today() + timedelta(days=1)
+        create_transaction('meh', self.account, self.foreign, 400, Transaction.WITHDRAW, tomorrow)
+        create_transaction('meh', self.account, self.personal, 300,
+                           Transaction.TRANSFER, tomorrow)
+        context = self.client.get(reverse('index')).context
+        self.assertEqual(len(context['upcoming_transactions']), 2)
+        self.assertEqual(context['working_balance'], -400)
 
     def test_upcoming_recurrences(self):
-        pass
+        RecurringTransaction.objects.create(
+            title='rent', date=date.today(), amount=500, src=self.account, dst=self.foreign,
+            interval=RecurringTransaction.MONTHLY, transaction_type=Transaction.WITHDRAW)
+        context = self.client.get(reverse('index')).context
+        self.assertEqual(len(context['upcoming_recurrences']), 1)
+        self.assertTrue(context['overdue_transactions'])
 
     def test_outstanding_balance(self):
-        pass
+        create_transaction('meh', self.foreign, self.account, 1000,
+                           Transaction.DEPOSIT, date(2017, 1, 1))
+        RecurringTransaction.objects.create(
+            title='rent', date=date.today(), amount=500, src=self.account, dst=self.foreign,
+            interval=RecurringTransaction.MONTHLY, transaction_type=Transaction.WITHDRAW)
+        context = self.client.get(reverse('index')).context
+        self.assertEqual(context['outstanding'], -500)
+        self.assertEqual(context['expected_balance'], 500)
+
+    def test_summary_is_one_query(self):
+        with self.assertNumQueries(1):
+            get_summary(recurrences=[])
+
+    def test_api_dashboard(self):
+        create_transaction('meh', self.foreign, self.account, 1000, Transaction.DEPOSIT)
+        data = json.loads(self.client.get(reverse('api_dashboard')).content.decode('utf-8'))
+        self.assertEqual(Decimal(data['balance']), 1000)
+        self.assertEqual(Decimal(data['income']), 1000)
+        self.assertEqual(data['upcoming_recurrences'], [])
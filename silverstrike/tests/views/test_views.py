@@ -22,6 +22,18 @@ class ViewTests(TestCase):
         self.assertEqual(context['menu'], 'transactions')
         self.assertEqual(context['submenu'], 'all')
 
+    def test_TransactionIndex_transaction_type(self):
+        self.personal.set_initial_balance(10)
+        url = reverse('transactions')
+        context = self.client.get(url, {'transaction_type': Transaction.SYSTEM}).context
+        self.assertEqual(len(context['transactions']), 1)
+        context = self.client.get(url, {'transaction_type': Transaction.DEPOSIT}).context
+        self.assertEqual(len(context['transactions']), 0)
+        for transaction_type in ('x', '9'):
+            response = self.client.get(url, {'transaction_type': transaction_type})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.context['transactions']), 1)
+
     def test_context_account_TransactionIndex(self):
         context = self.client.get(self.account.get_absolute_url()).context
         self.assertEqual(context['menu'], 'accounts')
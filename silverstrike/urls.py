@@ -30,6 +30,8 @@ urlpatterns = [
     path('auth/', include('allauth.urls')),
 
     path('transactions/', transaction_views.TransactionIndex.as_view(), name='transactions'),
+    path('transactions/search/',
+         transaction_views.TransactionSearch.as_view(), name='transaction_search'),
     path('transactions/<int:pk>/',
          transaction_views.TransactionDetailView.as_view(), name='transaction_detail'),
     path('transactions/<int:pk>/update/',
@@ -112,6 +114,10 @@ urlpatterns = [
     path('reports/income-expense', report_views.IncomeExpenseReport.as_view(),
          name='income_expense_report'),
 
+    path('api/dashboard/', api.get_dashboard, name='api_dashboard'),
+    path('api/cache_stats/', api.get_cache_stats, name='api_cache_stats'),
+    path('api/jobs/<int:job_id>/', api.get_job, name='api_job'),
+    path('api/charts/', api.get_chart_data, name='api_charts'),
     path('api/accounts/<account_type>/', api.get_accounts, name='api_accounts'),
     path('api/balance/<dstart>/<dend>/', api.get_balances, name='api_balance'),
     path('api/account/<int:account_id>/balance/<dstart>/<dend>/',
@@ -134,6 +140,7 @@ urlpatterns = [
          import_views.ImportProcessView.as_view(), name='import_process'),
 
     path('import/firefly/', import_views.ImportFireflyView.as_view(), name='import_firefly'),
+    path('jobs/<int:pk>/', import_views.JobDetailView.as_view(), name='job_detail'),
 
     path('export/', import_views.ExportView.as_view(), name='export'),
 
@@ -141,6 +148,8 @@ urlpatterns = [
     path('rest/recurrence_names', rest_views.RecurrenceNameView.as_view()),
     path('rest/accounts/personal', rest_views.PersonalAccountsView.as_view()),
     path('rest/accounts/foreign', rest_views.ForeignAccountsView.as_view()),
+    path('rest/transactions/search', rest_views.TransactionSearchView.as_view()),
+    path('rest/changes', rest_views.ChangesView.as_view()),
     path('rest/', include(router.urls)),
     path('api-token-auth/', drf_views.obtain_auth_token),
     path('api-auth/', include('rest_framework.urls', namespace='rest_framework')),
@@ -1,14 +1,17 @@
 from datetime import date, datetime, timedelta
 
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Sum
+from django.db.models import Q, Sum
 from django.http import Http404, HttpResponse, HttpResponseRedirect
 from django.urls import reverse_lazy
 from django.utils.translation import ugettext as _
 from django.views import generic
 
+from silverstrike.caching import get_or_compute
+from silverstrike.conditional import ConditionalMixin
 from silverstrike.forms import AccountCreateForm, ReconcilationForm
 from silverstrike.models import Account, Split, Transaction
+from silverstrike.pagination import KeysetPaginationMixin
 
 
 class AccountCreate(LoginRequiredMixin, generic.edit.CreateView):
@@ -74,35 +77,32 @@ class AccountDelete(LoginRequiredMixin, generic.edit.DeleteView):
         return HttpResponseRedirect(self.success_url)
 
 
-class AccountIndex(LoginRequiredMixin, generic.TemplateView):
+class AccountIndex(LoginRequiredMixin, ConditionalMixin, generic.TemplateView):
     template_name = 'silverstrike/accounts.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['menu'] = 'accounts'
-        balances = Split.objects.personal().past().order_by('account_id').values(
-            'account_id').annotate(Sum('amount'))
-        accounts = list(Account.objects.personal().values('id', 'name', 'active'))
-        for a in accounts:
-            a['balance'] = 0
-        for b in balances:
-            for a in accounts:
-                if a['id'] == b['account_id']:
-                    a['balance'] = b['amount__sum']
-        context['accounts'] = accounts
+        context['accounts'] = get_or_compute('accounts', lambda: list(
+            Account.objects.personal().with_balance().values(
+                'id', 'name', 'active', 'balance', 'split_count', 'last_split_date')))
         return context
 
 
-class ForeignAccountIndex(LoginRequiredMixin, generic.ListView):
+class ForeignAccountIndex(LoginRequiredMixin, ConditionalMixin, generic.ListView):
     template_name = 'silverstrike/foreign_accounts.html'
-    queryset = Account.objects.foreign()
     paginate_by = 20
 
+    def get_queryset(self):
+        return Account.objects.foreign().with_balance()
+
 
-class AccountView(LoginRequiredMixin, generic.ListView):
+class AccountView(LoginRequiredMixin, ConditionalMixin, KeysetPaginationMixin,
+                  generic.ListView):
     template_name = 'silverstrike/account_detail.html'
     context_object_name = 'transactions'
     model = Split
+    paginate_by = 50
 
     def dispatch(self, request, *args, **kwargs):
         try:
@@ -133,32 +133,26 @@ class AccountView(LoginRequiredMixin, generic.ListView):
             queryset = queryset.date_range(self.dstart, self.dend)
         return queryset
 
+    def get_total_count(self, queryset):
+        if not self.dstart:
+            return self.account.split_count
+        return super().get_total_count(queryset)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['account'] = self.account
         context['menu'] = 'accounts'
 
-        income = 0
-        expenses = 0
-        today = date.today()
-        if not self.dend:
-            for s in context['transactions']:
-                self.dend = s.date
-                break
-        first_date = None
-        for s in context['transactions']:
-            first_date = s.date
-            if s.date > today:
-                continue
-            if s.amount < 0:
-                expenses += s.amount
-            elif s.amount > 0:
-                income += s.amount
-        self.dstart = self.dstart or first_date
+        if not self.dstart:
+            self.dstart = self.account.first_split_date
+            self.dend = self.account.last_split_date
+        totals = self.object_list.past().aggregate(
+            income=Sum('amount', filter=Q(amount__gt=0)),
+            expenses=Sum('amount', filter=Q(amount__lt=0)))
         context['dstart'] = self.dstart
         context['dend'] = self.dend
-        context['in'] = income
-        context['out'] = expenses
+        context['in'] = totals['income'] or 0
+        context['out'] = totals['expenses'] or 0
         context['difference'] = context['in'] + context['out']
         context['balance'] = self.account.balance
         return context
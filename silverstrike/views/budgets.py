@@ -7,6 +7,7 @@ from django.db.models import Sum
 from django.urls import reverse_lazy
 from django.views import generic
 
+from silverstrike.caching import get_or_compute
 from silverstrike.forms import BudgetFormSet
 from silverstrike.lib import last_day_of_month
 from silverstrike.models import Budget, Category, Split
@@ -26,8 +27,13 @@ class BudgetIndex(LoginRequiredMixin, generic.edit.FormView):
         return super(BudgetIndex, self).dispatch(request, *args, **kwargs)
 
     def get_initial(self):
+        initial, self.allocated, self.spent = get_or_compute(
+            'budgets', self.get_ledger_data, self.month)
+        return initial
+
+    def get_ledger_data(self):
         # assigned categories
-        self.budgets = Budget.objects.for_month(self.month)
+        self.budgets = Budget.objects.for_month(self.month).select_related('category')
         budget_spending = Split.objects.personal().past().date_range(
             self.month, last_day_of_month(self.month)).values(
                 'category', 'category__name').annotate(spent=Sum('amount'))
@@ -58,7 +64,9 @@ class BudgetIndex(LoginRequiredMixin, generic.edit.FormView):
                 'left': -self.budget_spending.get(category.id, 0),
                 'month': self.month,
             })
-        return initial
+        allocated = sum([x.amount for x in self.budgets])
+        spent = sum([self.budget_spending.get(x.category_id, 0) for x in self.budgets])
+        return initial, allocated, spent
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -67,8 +75,8 @@ class BudgetIndex(LoginRequiredMixin, generic.edit.FormView):
         context['previous_month'] = self.month - relativedelta(months=1)
         context['next_month'] = self.month + relativedelta(months=1)
 
-        context['allocated'] = sum([x.amount for x in self.budgets])
-        context['spent'] = sum([self.budget_spending.get(x.category_id, 0) for x in self.budgets])
+        context['allocated'] = self.allocated
+        context['spent'] = self.spent
         context['left'] = context['allocated'] - context['spent']
         return context
 
@@ -9,12 +9,14 @@ from django.shortcuts import redirect, render
 from django.urls import reverse, reverse_lazy
 from django.views import generic
 
+from silverstrike.caching import get_or_compute
+from silverstrike.conditional import ConditionalMixin
 from silverstrike.forms import CategoryAssignFormset
 from silverstrike.lib import last_day_of_month
 from silverstrike.models import Account, Category, Split
 
 
-class CategoryIndex(LoginRequiredMixin, generic.ListView):
+class CategoryIndex(LoginRequiredMixin, ConditionalMixin, generic.ListView):
     template_name = 'silverstrike/category_index.html'
     model = Category
 
@@ -22,7 +24,7 @@ class CategoryIndex(LoginRequiredMixin, generic.ListView):
         return super().get_queryset().filter(active=True)
 
 
-class CategoryByMonth(LoginRequiredMixin, generic.TemplateView):
+class CategoryByMonth(LoginRequiredMixin, ConditionalMixin, generic.TemplateView):
     template_name = 'silverstrike/category_by_month.html'
 
     def dispatch(self, request, *args, **kwargs):
@@ -35,6 +37,13 @@ class CategoryByMonth(LoginRequiredMixin, generic.TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['menu'] = 'categories'
+        context.update(get_or_compute('category_by_month', self.get_ledger_data, self.month))
+        context['month'] = self.month
+        context['next_month'] = self.month + relativedelta(months=1)
+        context['previous_month'] = self.month - relativedelta(months=1)
+        return context
+
+    def get_ledger_data(self):
         dstart = self.month
         dend = last_day_of_month(dstart)
 
@@ -71,15 +80,11 @@ class CategoryByMonth(LoginRequiredMixin, generic.TemplateView):
                 })
 
         categories.sort(key=lambda c: c['name'])
-
-        context['categories'] = categories
-        context['sum_income'] = sum_income
-        context['sum_expense'] = sum_expense
-
-        context['month'] = self.month
-        context['next_month'] = self.month + relativedelta(months=1)
-        context['previous_month'] = self.month - relativedelta(months=1)
-        return context
+        return {
+            'categories': categories,
+            'sum_income': sum_income,
+            'sum_expense': sum_expense,
+        }
 
 
 class CategoryCreateView(LoginRequiredMixin, generic.edit.CreateView):
@@ -101,7 +106,7 @@ class CategoryDeleteView(LoginRequiredMixin, generic.edit.DeleteView):
     success_url = reverse_lazy('categories')
 
 
-class InactiveCategoriesView(LoginRequiredMixin, generic.ListView):
+class InactiveCategoriesView(LoginRequiredMixin, ConditionalMixin, generic.ListView):
     model = Category
     template_name = 'silverstrike/inactive_categories.html'
 
@@ -124,7 +129,7 @@ def assign_categories(request):
                   {'formset': formset, 'results': results})
 
 
-class CategoryDetailView(LoginRequiredMixin, generic.DetailView):
+class CategoryDetailView(LoginRequiredMixin, ConditionalMixin, generic.DetailView):
     model = Category
     context_object_name = 'category'
 
@@ -1,13 +1,13 @@
-import csv
-
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import HttpResponse, HttpResponseRedirect
+from django.http import HttpResponseRedirect, StreamingHttpResponse
 from django.urls import reverse
 from django.views import generic
 
 from silverstrike import forms
-from silverstrike import importers
 from silverstrike import models
+from silverstrike.export import iter_csv
+from silverstrike.importers import booking
+from silverstrike.importers.import_statement import get_fingerprints
 
 
 class ImportView(LoginRequiredMixin, generic.TemplateView):
@@ -35,7 +35,10 @@ class ImportProcessView(LoginRequiredMixin, generic.TemplateView):
         context = super(ImportProcessView, self).get_context_data(**kwargs)
         file = models.ImportFile.objects.get(uuid=self.kwargs['uuid'])
         importer = self.kwargs['importer']
-        context['data'] = importers.IMPORTERS[importer].import_transactions(file.file.path)
+        context['data'] = file.get_statements(importer)
+        fingerprints = get_fingerprints(context['data'], self.kwargs['account'])
+        duplicates = booking.get_duplicates(fingerprints)
+        context['duplicates'] = {i for i, f in enumerate(fingerprints) if f in duplicates}
         context['recurrences'] = models.RecurringTransaction.objects.exclude(
             interval=models.RecurringTransaction.DISABLED).order_by('title')
         return context
@@ -43,57 +46,18 @@ class ImportProcessView(LoginRequiredMixin, generic.TemplateView):
     def post(self, request, *args, **kwargs):
         file = models.ImportFile.objects.get(uuid=self.kwargs['uuid'])
         importer = self.kwargs['importer']
-        data = importers.IMPORTERS[importer].import_transactions(file.file.path)
-        for i in range(len(data)):
+        choices = []
+        # the number of statements is stored, they are not read for it
+        for i in range(len(file.get_statements(importer))):
             title = request.POST.get('title-{}'.format(i), '')
             account = request.POST.get('account-{}'.format(i), '')
             recurrence = int(request.POST.get('recurrence-{}'.format(i), '-1'))
-            book_date = data[i].book_date
-            date = data[i].transaction_date
-            if not (title or account):
-                continue
-            amount = float(data[i].amount)
-            if amount == 0:
-                continue
-            account, _ = models.Account.objects.get_or_create(
-                name=account,
-                defaults={'account_type': models.Account.FOREIGN})
-            if not account.iban and hasattr(data[i], 'iban'):
-                account.iban = data[i].iban
-                account.save()
-            transaction_type = -1
-            if account.account_type == models.Account.PERSONAL:
-                transaction_type = models.Transaction.TRANSFER
-            elif account.account_type == models.Account.FOREIGN:
-                if amount < 0:
-                    transaction_type = models.Transaction.WITHDRAW
-                else:
-                    transaction_type = models.Transaction.DEPOSIT
-            transaction = models.Transaction()
-            transaction.title = title
-            transaction.date = date
-            transaction.transaction_type = transaction_type
-            if recurrence > 0:
-                transaction.recurrence_id = recurrence
-            transaction.save()
-
-            models.Split.objects.create(
-                title=title,
-                amount=amount,
-                date=book_date,
-                transaction=transaction,
-                account_id=self.kwargs['account'],
-                opposing_account=account
-                )
-            models.Split.objects.create(
-                title=title,
-                amount=-amount,
-                date=date,
-                transaction=transaction,
-                account=account,
-                opposing_account_id=self.kwargs['account']
-                )
-        return HttpResponseRedirect('/')
+            if title or account:
+                choices.append((i, title, account, recurrence))
+        job = models.Job.objects.enqueue(
+            'import_statements', uuid=str(file.uuid), importer=importer,
+            account=self.kwargs['account'], choices=choices)
+        return HttpResponseRedirect(job.get_absolute_url())
 
 
 class ImportFireflyView(LoginRequiredMixin, generic.edit.CreateView):
@@ -103,8 +67,18 @@ class ImportFireflyView(LoginRequiredMixin, generic.edit.CreateView):
 
     def form_valid(self, form):
         self.object = form.save()
-        importers.firefly.import_firefly(self.object.file.path)
-        return HttpResponseRedirect(reverse('index'))
+        job = models.Job.objects.enqueue('import_firefly', path=self.object.file.path)
+        return HttpResponseRedirect(job.get_absolute_url())
+
+
+class JobDetailView(LoginRequiredMixin, generic.DetailView):
+    model = models.Job
+    context_object_name = 'job'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['menu'] = 'settings'
+        return context
 
 
 class ExportView(LoginRequiredMixin, generic.edit.FormView):
@@ -112,23 +86,13 @@ class ExportView(LoginRequiredMixin, generic.edit.FormView):
     form_class = forms.ExportForm
 
     def form_valid(self, form):
-        response = HttpResponse(content_type='text/csv')
-
         splits = models.Split.objects.date_range(
             form.cleaned_data['start'], form.cleaned_data['end']).transfers_once()
         splits = splits.filter(account__in=form.cleaned_data['accounts'])
-        csv_writer = csv.writer(response, delimiter=';')
-        headers = [
-            'account',
-            'opposing_account',
-            'date',
-            'amount',
-            'category'
-            ]
-        csv_writer.writerow(headers)
-        for split in splits.values_list('account__name', 'opposing_account__name',
-                                        'date', 'amount', 'category__name'):
-            csv_writer.writerow(split)
-
-        response['Content-Disposition'] = 'attachment; filename=export.csv'
+        compress = form.cleaned_data['compress']
+        response = StreamingHttpResponse(
+            iter_csv(splits, compress),
+            content_type='application/gzip' if compress else 'text/csv')
+        response['Content-Disposition'] = 'attachment; filename=export.csv{}'.format(
+            '.gz' if compress else '')
         return response
@@ -6,6 +6,7 @@ from django.shortcuts import get_object_or_404
 from django.urls import reverse, reverse_lazy
 from django.views import generic
 
+from silverstrike.conditional import ConditionalMixin, LEDGER_MODELS
 from silverstrike.forms import DepositForm, RecurringTransactionForm, TransferForm, WithdrawForm
 from silverstrike.lib import last_day_of_month
 from silverstrike.models import RecurringTransaction, Transaction
@@ -32,8 +33,9 @@ class ReccurrenceSetNextOccurence(LoginRequiredMixin, generic.View):
         return HttpResponseRedirect(reverse('recurrences'))
 
 
-class RecurrenceDetailView(LoginRequiredMixin, generic.DetailView):
+class RecurrenceDetailView(LoginRequiredMixin, ConditionalMixin, generic.DetailView):
     model = RecurringTransaction
+    conditional_models = LEDGER_MODELS + (RecurringTransaction,)
     context_object_name = 'recurrence'
 
 
@@ -113,7 +115,8 @@ class RecurringTransactionIndex(LoginRequiredMixin, generic.ListView):
         return context
 
 
-class DisabledRecurrencesView(LoginRequiredMixin, generic.ListView):
+class DisabledRecurrencesView(LoginRequiredMixin, ConditionalMixin, generic.ListView):
     template_name = 'silverstrike/disabled_recurrences.html'
+    conditional_models = LEDGER_MODELS + (RecurringTransaction,)
     queryset = RecurringTransaction.objects.filter(interval=RecurringTransaction.DISABLED)
     paginate_by = 20
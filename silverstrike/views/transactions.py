@@ -3,14 +3,20 @@ from django.http import HttpResponseRedirect
 from django.urls import reverse, reverse_lazy
 from django.views import generic
 
+from silverstrike.conditional import ConditionalMixin
 from silverstrike.forms import DepositForm, TransactionFormSet, TransferForm, WithdrawForm
 from silverstrike.models import Account, Split, Transaction
+from silverstrike.pagination import KeysetPaginationMixin
+from silverstrike.search import search
 
 
-class TransactionDetailView(LoginRequiredMixin, generic.DetailView):
+class TransactionDetailView(LoginRequiredMixin, ConditionalMixin, generic.DetailView):
     model = Transaction
     context_object_name = 'transaction'
 
+    def get_queryset(self):
+        return super().get_queryset().with_totals().select_related('recurrence')
+
     def get_context_data(self, **kwargs):
         context = super(TransactionDetailView, self).get_context_data(**kwargs)
         context['menu'] = 'transactions'
@@ -27,17 +33,26 @@ class TransactionDeleteView(LoginRequiredMixin, generic.edit.DeleteView):
         return context
 
 
-class TransactionIndex(LoginRequiredMixin, generic.ListView):
+class TransactionIndex(LoginRequiredMixin, ConditionalMixin, KeysetPaginationMixin,
+                       generic.ListView):
     template_name = 'silverstrike/transaction_overview.html'
     context_object_name = 'transactions'
     model = Split
     paginate_by = 50
 
     def get_queryset(self):
-        queryset = super().get_queryset().filter(account__account_type=Account.PERSONAL)
+        # the type comes from the split, the list still shows the title and date of the
+        # transaction
+        queryset = super().get_queryset().filter(
+            account__account_type=Account.PERSONAL).select_related(
+            'account', 'opposing_account', 'category', 'transaction')
 
         if 'category' in self.request.GET:
             queryset = queryset.filter(category_id=self.request.GET['category'])
+        transaction_type = self.request.GET.get('transaction_type')
+        # unknown types are ignored
+        if transaction_type in {str(t) for t, name in Transaction.TRANSACTION_TYPES}:
+            queryset = queryset.filter(transaction_type=transaction_type)
         if 'recurrence' in self.request.GET:
             queryset = queryset.filter(transaction__recurrence_id=self.request.GET['recurrence'])
         if 'account' in self.request.GET:
@@ -55,6 +70,32 @@ class TransactionIndex(LoginRequiredMixin, generic.ListView):
         return context
 
 
+class TransactionSearch(LoginRequiredMixin, ConditionalMixin, generic.ListView):
+    template_name = 'silverstrike/transaction_search.html'
+    context_object_name = 'transactions'
+    paginate_by = 50
+
+    def get_queryset(self):
+        return search(self.request.GET.get('q', ''))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['menu'] = 'transactions'
+        context['query'] = self.request.GET.get('q', '')
+        context['total'] = context['paginator'].count
+        page = context['page_obj']
+        if page.has_previous():
+            context['previous_url'] = self._page_url(page.previous_page_number())
+        if page.has_next():
+            context['next_url'] = self._page_url(page.next_page_number())
+        return context
+
+    def _page_url(self, number):
+        query = self.request.GET.copy()
+        query['page'] = number
+        return '{}?{}'.format(self.request.path, query.urlencode())
+
+
 class TransactionCreate(LoginRequiredMixin, generic.edit.CreateView):
     model = Transaction
     template_name = 'silverstrike/transaction_edit.html'